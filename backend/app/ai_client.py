@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Optional
+from typing import Optional, Tuple
 
 import httpx
 
@@ -35,6 +35,75 @@ class AIClient:
         if not self.api_key:
             logging.info("AI 未配置 api_key，跳过AI总结，使用降级摘要")
             return None
+        url, headers, payload = self._summary_request(
+            title=title,
+            link=link,
+            pub_date=pub_date,
+            author=author,
+            content=content,
+            system_prompt=system_prompt,
+            user_prompt_template=user_prompt_template,
+        )
+        try:
+            with httpx.Client(timeout=self.timeout) as client:
+                logging.info(f"AI请求: url={url} model={self.model}")
+                resp = client.post(url, headers=headers, json=payload)
+                if resp.status_code >= 400:
+                    logging.warning(f"AI请求失败 status={resp.status_code} body={resp.text[:200]}")
+                resp.raise_for_status()
+                data = resp.json()
+        except Exception as e:
+            logging.warning(f"AI请求异常: {e}")
+            return None
+        return self._parse_summary(data, title=title, link=link, pub_date=pub_date, author=author)
+
+    async def summarize_async(
+        self,
+        *,
+        client: httpx.AsyncClient,
+        title: str,
+        link: str,
+        pub_date: Optional[str],
+        author: Optional[str],
+        content: str,
+        system_prompt: Optional[str] = None,
+        user_prompt_template: Optional[str] = None,
+    ) -> Optional[dict]:
+        if not self.api_key:
+            logging.info("AI 未配置 api_key，跳过AI总结，使用降级摘要")
+            return None
+        url, headers, payload = self._summary_request(
+            title=title,
+            link=link,
+            pub_date=pub_date,
+            author=author,
+            content=content,
+            system_prompt=system_prompt,
+            user_prompt_template=user_prompt_template,
+        )
+        try:
+            logging.info(f"AI请求: url={url} model={self.model}")
+            resp = await client.post(url, headers=headers, json=payload, timeout=self.timeout)
+            if resp.status_code >= 400:
+                logging.warning(f"AI请求失败 status={resp.status_code} body={resp.text[:200]}")
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            logging.warning(f"AI请求异常: {e}")
+            return None
+        return self._parse_summary(data, title=title, link=link, pub_date=pub_date, author=author)
+
+    def _summary_request(
+        self,
+        *,
+        title: str,
+        link: str,
+        pub_date: Optional[str],
+        author: Optional[str],
+        content: str,
+        system_prompt: Optional[str],
+        user_prompt_template: Optional[str],
+    ) -> Tuple[str, dict, dict]:
         url = self._chat_url()
 
         system = system_prompt or (
@@ -74,18 +143,17 @@ class AIClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
-        try:
-            with httpx.Client(timeout=self.timeout) as client:
-                logging.info(f"AI请求: url={url} model={self.model}")
-                resp = client.post(url, headers=headers, json=payload)
-                if resp.status_code >= 400:
-                    logging.warning(f"AI请求失败 status={resp.status_code} body={resp.text[:200]}")
-                resp.raise_for_status()
-                data = resp.json()
-        except Exception as e:
-            logging.warning(f"AI请求异常: {e}")
-            return None
+        return url, headers, payload
 
+    @staticmethod
+    def _parse_summary(
+        data: dict,
+        *,
+        title: str,
+        link: str,
+        pub_date: Optional[str],
+        author: Optional[str],
+    ) -> Optional[dict]:
         try:
             content = data["choices"][0]["message"]["content"].strip()
             # Some models may wrap in ```json ... ```
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import storage
+from .leader import LeaseBusy, hold_lease
+from .models import AppSettings, ArticleInDB
+
+try:  # 可选依赖，未安装时只能使用 gzip
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+_SUFFIXES = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+_MANIFEST = "index.json"
+_lock = threading.RLock()
+# 按时间过滤时先从原始行中取出 created_at，命中后才解析整行
+_CREATED_AT = re.compile(r'"created_at": "([^"]*)"')
+
+
+def archive_dir() -> str:
+    """Archive location; defaults to ``archive/`` next to the database."""
+    return os.path.abspath(
+        os.environ.get("RSS_AI_ARCHIVE_DIR") or os.path.join(os.path.dirname(storage.DB_PATH), "archive")
+    )
+
+
+def archive_articles(settings: AppSettings, batch_size: int = 500) -> int:
+    """Move articles past ``archive.after_days`` or beyond ``fetch.max_items`` into monthly archives.
+
+    Rows are appended and fsynced before they are deleted from SQLite, so a
+    crash in between can only leave duplicates, which readers skip by id.
+    """
+    cfg = settings.archive
+    fmt = cfg.format
+    if fmt == "zstd" and zstandard is None:
+        logging.warning("未安装 zstandard，归档格式回退为 gzip")
+        fmt = "gzip"
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=cfg.after_days)
+    moved = 0
+    try:
+        with hold_lease("archive", ttl_seconds=120), _lock:
+            os.makedirs(archive_dir(), exist_ok=True)
+            _seed_tombstones()
+            while True:
+                rows = storage.articles_to_archive(cutoff, settings.fetch.max_items, limit=batch_size)
+                if not rows:
+                    break
+                _append(rows, fmt)
+                # 删除与写墓碑在同一事务里，归档后的条目再次出现在源中也不会被重复入库
+                storage.delete_articles([a.id for a in rows], tombstone=True)
+                moved += len(rows)
+    except LeaseBusy:
+        logging.debug("其他进程正在归档，跳过")
+        return 0
+    if moved:
+        logging.info("已归档 %s 篇文章到 %s", moved, archive_dir())
+    return moved
+
+
+def _append(rows: List[ArticleInDB], fmt: str):
+    by_month: Dict[str, List[ArticleInDB]] = {}
+    for article in rows:
+        by_month.setdefault(_month_of(article.created_at), []).append(article)
+    manifest = _load_manifest()
+    for month, articles in sorted(by_month.items()):
+        entry = manifest.get(month)
+        if entry is None:
+            # 同一月份始终追加到最初创建的文件，切换格式只影响新月份
+            # members 按压缩成员记录偏移与时间范围，按时间段读取时只解压重叠的成员
+            entry = {"file": f"articles-{month}{_SUFFIXES[fmt]}", "count": 0, "feeds": {}, "members": [], "tombstoned": True}
+            manifest[month] = entry
+        payload = "".join(json.dumps(a.model_dump(), ensure_ascii=False) + "\n" for a in articles).encode("utf-8")
+        offset, size = _write_member(os.path.join(archive_dir(), entry["file"]), payload)
+        entry["count"] += len(articles)
+        for article in articles:
+            entry["feeds"][article.feed_url] = entry["feeds"].get(article.feed_url, 0) + 1
+        created = [a.created_at for a in articles]
+        if entry.get("members") is not None:
+            entry["members"].append({"offset": offset, "size": size, "min_created": min(created), "max_created": max(created)})
+        entry["min_created"] = min([entry.get("min_created") or created[0], *created])
+        entry["max_created"] = max([entry.get("max_created") or created[0], *created])
+    _save_manifest(manifest)
+
+
+def _seed_tombstones():
+    """Record archived items of months written before ``archived_items`` existed, once per month."""
+    manifest = _load_manifest()
+    pending = [month for month, entry in manifest.items() if not entry.get("tombstoned")]
+    for month in pending:
+        storage.add_archived_items([(a.feed_url, a.item_uid) for a in iter_month(month)])
+        manifest[month]["tombstoned"] = True
+    if pending:
+        _save_manifest(manifest)
+        logging.info("已为 %s 个旧归档月份补记已见条目", len(pending))
+
+
+def _write_member(path: str, payload: bytes) -> Tuple[int, int]:
+    """Append one compressed member; returns its ``(offset, size)`` in the file."""
+    # gzip 成员与 zstd 帧都可以直接拼接，追加写无需重写已有内容
+    if path.endswith(_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise RuntimeError("归档文件为 zstd 格式，请安装 zstandard")
+        data = zstandard.ZstdCompressor(level=9).compress(payload)
+    else:
+        data = gzip.compress(payload, compresslevel=6)
+    with open(path, "ab") as fh:
+        offset = fh.seek(0, os.SEEK_END)
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    return offset, len(data)
+
+
+def _read_member(path: str, member: dict) -> List[str]:
+    with open(path, "rb") as fh:
+        fh.seek(member["offset"])
+        data = fh.read(member["size"])
+    if path.endswith(_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise RuntimeError("归档文件为 zstd 格式，请安装 zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = gzip.decompress(data)
+    return raw.decode("utf-8").splitlines()
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path.endswith(_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise RuntimeError("归档文件为 zstd 格式，请安装 zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return gzip.open(path, "rt", encoding="utf-8")
+
+
+def _load_manifest() -> Dict[str, dict]:
+    path = os.path.join(archive_dir(), _MANIFEST)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(manifest: Dict[str, dict]):
+    path = os.path.join(archive_dir(), _MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2, sort_keys=True)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _month_of(created_at: Optional[str]) -> str:
+    return (created_at or "")[:7] or "unknown"
+
+
+def list_months() -> List[dict]:
+    manifest = _load_manifest()
+    return [{"month": month, **manifest[month]} for month in sorted(manifest, reverse=True)]
+
+
+def iter_month(month: str) -> Iterator[ArticleInDB]:
+    """Stream one month's archived articles in archive order, skipping duplicated ids."""
+    entry = _load_manifest().get(month)
+    if entry is None:
+        return
+    path = os.path.join(archive_dir(), entry["file"])
+    if not os.path.exists(path):
+        return
+    seen = set()
+    with _open_text(path) as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            article = ArticleInDB(**json.loads(line))
+            if article.id in seen:
+                continue
+            seen.add(article.id)
+            yield article
+
+
+def search_month(
+    month: str,
+    limit: int = 20,
+    offset: int = 0,
+    feed_url: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> Tuple[int, List[ArticleInDB]]:
+    """Filter one archived month newest first; ``keyword`` matches title or summary."""
+    matches = []
+    for article in iter_month(month):
+        if feed_url and article.feed_url != feed_url:
+            continue
+        if keyword and keyword not in article.title and keyword not in article.summary_text:
+            continue
+        matches.append(article)
+    matches.reverse()
+    return len(matches), matches[offset : offset + limit]
+
+
+def _lines_in_range(month: str, entry: dict, start_str: str, end_str: str) -> Iterator[str]:
+    path = os.path.join(archive_dir(), entry["file"])
+    if not os.path.exists(path):
+        return
+    members = entry.get("members")
+    if members is None:
+        # 旧版归档没有成员索引，只能顺序读完整个文件
+        with _open_text(path) as fh:
+            yield from fh
+        return
+    for member in members:
+        if member["max_created"] < start_str or member["min_created"] >= end_str:
+            continue
+        yield from _read_member(path, member)
+
+
+def articles_in_range(start: datetime, end: datetime) -> List[ArticleInDB]:
+    """Hot articles in ``[start, end)`` plus archived ones.
+
+    Only archive members whose time range overlaps the window are
+    decompressed, and only rows inside it are parsed into models.
+    """
+    start_str = start.strftime("%Y-%m-%d %H:%M:%S")
+    end_str = end.strftime("%Y-%m-%d %H:%M:%S")
+    hot = storage.list_articles_in_range(start, end)
+    merged: Dict[int, ArticleInDB] = {}
+    for month, entry in sorted(_load_manifest().items()):
+        if entry.get("max_created", "") < start_str or entry.get("min_created", "") >= end_str:
+            continue
+        for line in _lines_in_range(month, entry, start_str, end_str):
+            found = _CREATED_AT.search(line)
+            if found is None:
+                if not line.strip():
+                    continue
+                created = json.loads(line).get("created_at") or ""
+            else:
+                created = found.group(1)
+            if start_str <= created < end_str:
+                article = ArticleInDB(**json.loads(line))
+                merged[article.id] = article
+    if not merged:
+        return hot
+    for article in hot:
+        merged[article.id] = article
+    return sorted(merged.values(), key=lambda a: a.created_at)
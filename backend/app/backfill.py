@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from .ai_client import AIClient
+from .archive import articles_in_range
+from .leader import LeaseBusy, hold_lease
+from .models import AppSettings, ReportBackfillResponse, ReportBackfillWindow, ReportInDB
+from .report_service import UTC, ReportSchedule, estimate_report_tokens, generate_report, report_schedules
+from .storage import list_reports_in_range
+
+_running = threading.Lock()
+
+
+class BackfillBusy(Exception):
+    """A backfill is already running in this or another process."""
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _span(schedule: ReportSchedule, now: datetime) -> timedelta:
+    start, end = schedule.window_at(now)
+    return end - start
+
+
+def expected_windows(schedule: ReportSchedule, now: datetime, lookback: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Windows of ``schedule`` that ended within ``lookback`` before ``now``, oldest first."""
+    windows: List[Tuple[datetime, datetime]] = []
+    start, end = schedule.window_at(now)
+    while end > now - lookback:
+        windows.append((start, end))
+        start, end = schedule.window_at(start)
+    windows.reverse()
+    return windows
+
+
+def missing_windows(schedule: ReportSchedule, now: datetime, lookback: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Windows from :func:`expected_windows` that have no row in ``reports``."""
+    windows = expected_windows(schedule, now, lookback)
+    if not windows:
+        return []
+    stored = {
+        (r.timeframe_start, r.timeframe_end)
+        for r in list_reports_in_range(schedule.name, windows[0][0], windows[-1][1])
+    }
+    return [(start, end) for start, end in windows if (_iso(start), _iso(end)) not in stored]
+
+
+def _source_reports(
+    shorter: List[ReportSchedule], start: datetime, end: datetime, article_count: int
+) -> Tuple[Optional[str], Optional[List[ReportInDB]]]:
+    # 从周期最长的候选开始，只有当其报告覆盖了全部文章时才复用，否则会漏掉内容
+    for candidate in reversed(shorter):
+        reports = list_reports_in_range(candidate.name, start, end)
+        if reports and sum(r.article_count for r in reports) == article_count:
+            return candidate.name, reports
+    return None, None
+
+
+def run_backfill(
+    settings: AppSettings,
+    ai_client: Optional[AIClient],
+    *,
+    report_types: Optional[Iterable[str]] = None,
+    hours: Optional[int] = None,
+    days: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    dry_run: bool = False,
+) -> ReportBackfillResponse:
+    """Generate reports for missed windows, in parallel and within an estimated token budget.
+
+    Covers every enabled schedule (or ``report_types``), shortest windows
+    first so longer ones can summarise their reports. Windows without
+    articles are skipped, and backfilled reports are not pushed to Telegram.
+    Raises :class:`BackfillBusy` if a backfill is running.
+    """
+    if not _running.acquire(blocking=False):
+        raise BackfillBusy()
+    try:
+        with hold_lease("report-backfill", ttl_seconds=60):
+            return _backfill(settings, ai_client, report_types, hours, days, token_budget, dry_run)
+    except LeaseBusy as exc:
+        raise BackfillBusy() from exc
+    finally:
+        _running.release()
+
+
+def _backfill(
+    settings: AppSettings,
+    ai_client: Optional[AIClient],
+    report_types: Optional[Iterable[str]],
+    hours: Optional[int],
+    days: Optional[int],
+    token_budget: Optional[int],
+    dry_run: bool,
+) -> ReportBackfillResponse:
+    cfg = settings.reports
+    budget = cfg.backfill_token_budget if token_budget is None else token_budget
+    # 不足一天的周期按小时回溯，其余按天回溯
+    short_lookback = timedelta(hours=cfg.backfill_hours if hours is None else hours)
+    long_lookback = timedelta(days=cfg.backfill_days if days is None else days)
+    now = datetime.now(UTC)
+    # 明确指定类型时也补齐已停用的计划
+    schedules = sorted(
+        report_schedules(settings, enabled_only=report_types is None).values(), key=lambda sc: _span(sc, now)
+    )
+    wanted = set(report_types) if report_types is not None else None
+    spent = 0
+    windows: List[ReportBackfillWindow] = []
+
+    for index, schedule in enumerate(schedules):
+        if wanted is not None and schedule.name not in wanted:
+            continue
+        report_type = schedule.name
+        lookback = short_lookback if _span(schedule, now) < timedelta(days=1) else long_lookback
+        planned = []
+        for start, end in missing_windows(schedule, now, lookback):
+            articles = articles_in_range(start, end)
+            if not articles:
+                continue
+            source_type, sources = _source_reports(schedules[:index], start, end, len(articles))
+            estimate = estimate_report_tokens(settings, articles, sources) if ai_client is not None else 0
+            window = ReportBackfillWindow(
+                report_type=report_type,
+                timeframe_start=_iso(start),
+                timeframe_end=_iso(end),
+                article_count=len(articles),
+                estimated_tokens=estimate,
+                status="planned",
+                source_report_type=source_type,
+            )
+            windows.append(window)
+            # 预算为 0 表示不限制
+            if budget and spent + estimate > budget:
+                window.status = "over_budget"
+                continue
+            spent += estimate
+            planned.append((window, start, end, articles, sources))
+        if dry_run or not planned:
+            continue
+
+        def work(item):
+            window, start, end, articles, sources = item
+            return generate_report(
+                report_type,
+                settings=settings,
+                ai_client=ai_client,
+                telegram_client=None,
+                start_override=start,
+                end_override=end,
+                articles=articles,
+                source_reports=sources,
+            )
+
+        with ThreadPoolExecutor(max_workers=cfg.backfill_concurrency, thread_name_prefix=f"Backfill-{report_type}") as pool:
+            futures = [(item[0], pool.submit(work, item)) for item in planned]
+            for window, future in futures:
+                try:
+                    window.report_id = future.result()
+                except Exception:
+                    logging.exception("补齐报告失败：%s %s", window.report_type, window.timeframe_start)
+                window.status = "generated" if window.report_id is not None else "failed"
+
+    counts = {status: sum(1 for w in windows if w.status == status) for status in ("generated", "failed", "over_budget")}
+    if windows:
+        logging.info(
+            "补齐报告%s：缺失 %s 份，生成 %s 份，失败 %s 份，超出预算 %s 份，预估 token %s",
+            "（试运行）" if dry_run else "",
+            len(windows),
+            counts["generated"],
+            counts["failed"],
+            counts["over_budget"],
+            spent,
+        )
+    return ReportBackfillResponse(windows=windows, token_budget=budget, estimated_tokens=spent)
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from . import storage
+from .models import AppSettings
+
+# 不影响页面内容的跟踪参数，归一化时去掉
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "igshid", "mc_cid", "mc_eid"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def cache_path() -> str:
+    """Cache database; defaults to ``content_cache.sqlite`` next to the main database."""
+    return os.path.abspath(
+        os.environ.get("RSS_AI_CONTENT_CACHE")
+        or os.path.join(os.path.dirname(storage.DB_PATH), "content_cache.sqlite")
+    )
+
+
+def normalize_url(url: str) -> str:
+    """Cache key for ``url``: lower-cased scheme/host, no default port, fragment or tracking params, sorted query."""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in _TRACKING_PARAMS and not k.startswith(_TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    text: Optional[str]  # None 表示页面可访问但未抽取到正文
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_ts: int
+    fresh: bool
+
+
+class ContentCache:
+    """Extracted article text on disk, keyed by normalized URL.
+
+    Entries are fresh for ``ttl_seconds``; stale entries keep their
+    ETag/Last-Modified so the next fetch can be a conditional request. When
+    the cache grows past ``max_bytes`` the least recently used entries go first.
+    """
+
+    OUTCOMES = ("hits", "shared", "revalidated", "stale", "misses")
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 72 * 3600, max_bytes: int = 64 << 20):
+        self._path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._db_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._ready_path: Optional[str] = None
+        self._counters: Dict[str, int] = {name: 0 for name in (*self.OUTCOMES, "evictions")}
+
+    @property
+    def path(self) -> str:
+        return self._path or cache_path()
+
+    def configure(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        path = self.path
+        with self._db_lock:
+            if self._ready_path != path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=10)
+            try:
+                if self._ready_path != path:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS pages (
+                            url TEXT PRIMARY KEY,
+                            text BLOB,
+                            etag TEXT,
+                            last_modified TEXT,
+                            size INTEGER NOT NULL,
+                            fetched_ts INTEGER NOT NULL,
+                            accessed_ts INTEGER NOT NULL
+                        )
+                        """
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages(accessed_ts)")
+                    self._ready_path = path
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    def record(self, outcome: str):
+        with self._stats_lock:
+            self._counters[outcome] += 1
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        now = int(time.time())
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE pages SET accessed_ts = ? WHERE url = ? RETURNING text, etag, last_modified, fetched_ts",
+                (now, key),
+            ).fetchone()
+        if row is None:
+            return None
+        text, etag, last_modified, fetched_ts = row
+        return CachedPage(
+            text=zlib.decompress(text).decode("utf-8") if text is not None else None,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_ts=fetched_ts,
+            fresh=now - fetched_ts < self.ttl_seconds,
+        )
+
+    def put(self, key: str, text: Optional[str], etag: Optional[str] = None, last_modified: Optional[str] = None):
+        blob = zlib.compress(text.encode("utf-8"), 6) if text is not None else None
+        now = int(time.time())
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO pages (url, text, etag, last_modified, size, fetched_ts, accessed_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    text = excluded.text, etag = excluded.etag, last_modified = excluded.last_modified,
+                    size = excluded.size, fetched_ts = excluded.fetched_ts, accessed_ts = excluded.accessed_ts
+                """,
+                (key, blob, etag, last_modified, len(key) + len(blob or b""), now, now),
+            )
+            self._evict(conn, now)
+
+    def touch(self, key: str):
+        """Mark an entry fresh again after a ``304 Not Modified``."""
+        now = int(time.time())
+        with self._connect() as conn:
+            conn.execute("UPDATE pages SET fetched_ts = ?, accessed_ts = ? WHERE url = ?", (now, now, key))
+
+    def _evict(self, conn: sqlite3.Connection, now: int):
+        # 过期且无法条件请求的条目已无用处，直接删除
+        removed = conn.execute(
+            "DELETE FROM pages WHERE fetched_ts < ? AND etag IS NULL AND last_modified IS NULL",
+            (now - int(self.ttl_seconds),),
+        ).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total > self.max_bytes:
+            # 按最近访问时间淘汰到上限的 90%，避免每次写入都触发淘汰
+            target = total - int(self.max_bytes * 0.9)
+            for url, size in conn.execute("SELECT url, size FROM pages ORDER BY accessed_ts").fetchall():
+                if target <= 0:
+                    break
+                conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                target -= size
+                removed += 1
+        if removed:
+            with self._stats_lock:
+                self._counters["evictions"] += removed
+            logging.debug("正文缓存淘汰 %s 条", removed)
+
+    def counters(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._counters)
+
+    def stats(self) -> dict:
+        """Persisted size plus hit counters of this process since start."""
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        counters = self.counters()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": int(self.ttl_seconds),
+            **counters,
+            "hit_rate": hit_rate(counters),
+        }
+
+
+def hit_rate(counters: Dict[str, int]) -> float:
+    """Share of lookups answered without downloading and extracting the page again."""
+    lookups = sum(counters.get(name, 0) for name in ContentCache.OUTCOMES)
+    if not lookups:
+        return 0.0
+    saved = counters.get("hits", 0) + counters.get("shared", 0) + counters.get("revalidated", 0)
+    return round(saved / lookups, 4)
+
+
+content_cache = ContentCache()
+
+
+def for_settings(settings: AppSettings) -> Optional[ContentCache]:
+    """The shared cache configured from ``settings``, or None when caching is disabled."""
+    cfg = settings.content_cache
+    if not cfg.enabled:
+        return None
+    content_cache.configure(cfg.ttl_hours * 3600, cfg.max_mb << 20)
+    return content_cache
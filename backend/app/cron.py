@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+# (最小值, 最大值) 依次为 分 时 日 月 周
+_BOUNDS: List[Tuple[int, int]] = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+_MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_WEEKDAYS = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+_MACROS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+# 查找下一次触发时间时最多向前/向后搜索的天数（覆盖 2 月 29 日这类四年一次的表达式）
+_SEARCH_DAYS = 366 * 8
+
+
+class CronError(ValueError):
+    """Invalid cron expression."""
+
+
+def _parse_value(token: str, index: int) -> int:
+    names = _MONTHS if index == 3 else _WEEKDAYS if index == 4 else None
+    if names and token.lower() in names:
+        return names.index(token.lower()) + (1 if index == 3 else 0)
+    if not token.isdigit():
+        raise CronError(f"无法识别的取值: {token}")
+    return int(token)
+
+
+def _parse_field(field: str, index: int) -> List[int]:
+    lo, hi = _BOUNDS[index]
+    values = set()
+    for part in field.split(","):
+        rng, _, step_s = part.partition("/")
+        step = int(step_s) if step_s.isdigit() else None
+        if step_s and not step:
+            raise CronError(f"非法步长: {part}")
+        if rng == "*":
+            start, end = lo, hi
+        elif "-" in rng:
+            a, b = rng.split("-", 1)
+            start, end = _parse_value(a, index), _parse_value(b, index)
+        else:
+            start = _parse_value(rng, index)
+            # “5/15” 表示从 5 开始每 15 个单位
+            end = hi if step else start
+        if not (lo <= start <= hi and lo <= end <= hi) or start > end:
+            raise CronError(f"取值超出范围 {lo}-{hi}: {part}")
+        values.update(range(start, end + 1, step or 1))
+    if index == 4 and 7 in values:
+        values.discard(7)
+        values.add(0)
+    return sorted(values)
+
+
+class CronExpr:
+    """Five-field cron expression (minute hour day-of-month month day-of-week).
+
+    Supports ``*``, lists, ranges, ``/`` steps, month/weekday names and the
+    ``@daily``-style macros. Like Vixie cron, when both day fields are
+    restricted a day matches if either does. Times are evaluated on the wall
+    clock of the datetime passed in.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = " ".join(expr.split())
+        fields = _MACROS.get(self.expr.lower(), self.expr).split()
+        if len(fields) != 5:
+            raise CronError(f"cron 表达式需要 5 个字段: {expr!r}")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(field, i) for i, field in enumerate(fields)
+        )
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+        # 尽早发现永远不会触发的表达式（如 2 月 30 日）
+        self.next_after(datetime(2000, 1, 1))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CronExpr) and other.expr == self.expr
+
+    def __hash__(self) -> int:
+        return hash(self.expr)
+
+    def __repr__(self) -> str:
+        return f"CronExpr({self.expr!r})"
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = day.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, when: datetime) -> datetime:
+        """First fire time strictly after ``when``."""
+        t = when.replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(_SEARCH_DAYS):
+            if self._day_matches(t):
+                for hour in self.hours:
+                    if hour < t.hour:
+                        continue
+                    for minute in self.minutes:
+                        if hour == t.hour and minute < t.minute:
+                            continue
+                        return t.replace(hour=hour, minute=minute, tzinfo=when.tzinfo)
+            t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+        raise CronError(f"cron 表达式不会触发: {self.expr!r}")
+
+    def last_at_or_before(self, when: datetime) -> datetime:
+        """Latest fire time at or before ``when``."""
+        t = when.replace(tzinfo=None, second=0, microsecond=0)
+        for _ in range(_SEARCH_DAYS):
+            if self._day_matches(t):
+                for hour in reversed(self.hours):
+                    if hour > t.hour:
+                        continue
+                    for minute in reversed(self.minutes):
+                        if hour == t.hour and minute > t.minute:
+                            continue
+                        return t.replace(hour=hour, minute=minute, tzinfo=when.tzinfo)
+            t = (t - timedelta(days=1)).replace(hour=23, minute=59)
+        raise CronError(f"cron 表达式不会触发: {self.expr!r}")
@@ -0,0 +1,452 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from html import escape
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+import httpx
+
+from .models import AppSettings, SettingsDestination
+from .telegram_client import TelegramClient
+
+TELEGRAM_MAX_CHARS = 4096
+
+_STOP = object()
+# 各目标下一次允许发送的时间（monotonic），跨抓取轮次保留，按名称区分
+_next_send_at: Dict[str, float] = {}
+
+
+def format_telegram_message(item: dict, matched_keywords: Optional[list[str]] = None) -> str:
+    # item has title, link, pubDate, author, summary_text
+    title = escape(item.get("title", ""), quote=False)
+    link = escape(item.get("link", ""))
+    pub_date = escape(item.get("pubDate", ""), quote=False)
+    author = escape(item.get("author", ""), quote=False)
+    summary_text = escape(item.get("summary_text", ""), quote=False)
+    keywords = [escape(kw, quote=False) for kw in matched_keywords or []]
+    # HTML formatting for Telegram
+    parts = [
+        f"<b>{title}</b>",
+        f"<a href=\"{link}\">原文链接</a>",
+    ]
+    meta = []
+    if pub_date:
+        meta.append(f"发布时间：{pub_date}")
+    if author:
+        meta.append(f"作者：{author}")
+    if keywords:
+        meta.append("关键词：" + "、".join(keywords))
+    if meta:
+        parts.append(" | ".join(meta))
+    if summary_text:
+        parts.append("\n" + summary_text)
+    return "\n".join(parts)
+
+
+def fit_telegram_message(item: dict, matched_keywords: Optional[list[str]] = None, limit: int = TELEGRAM_MAX_CHARS) -> str:
+    """:func:`format_telegram_message` within ``limit`` chars.
+
+    The plain summary (then the title) is shortened before formatting, so
+    the cut never lands inside a tag or an escaped entity.
+    """
+    item = dict(item)
+    text = format_telegram_message(item, matched_keywords)
+    for key in ("summary_text", "title"):
+        value = item.get(key) or ""
+        if len(text) <= limit or not value:
+            continue
+        # 转义会改变长度，二分查找仍能放下的最长前缀
+        lo, hi = 0, len(value) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            item[key] = value[:mid] + "…"
+            if len(format_telegram_message(item, matched_keywords)) <= limit:
+                lo = mid
+            else:
+                hi = mid - 1
+        item[key] = value[:lo] + "…" if lo else ""
+        text = format_telegram_message(item, matched_keywords)
+    return text
+
+
+def pack_messages(texts: Iterable[str], limit: int = TELEGRAM_MAX_CHARS, sep: str = "\n\n") -> List[str]:
+    """Join ``texts`` into as few messages of at most ``limit`` chars as possible.
+
+    Messages are only split between texts, which must each fit in ``limit``
+    (see :func:`fit_telegram_message`).
+    """
+    messages: List[str] = []
+    current = ""
+    for text in texts:
+        if current and len(current) + len(sep) + len(text) <= limit:
+            current += sep + text
+            continue
+        if current:
+            messages.append(current)
+        current = text
+    if current:
+        messages.append(current)
+    return messages
+
+
+@dataclass
+class Delivery:
+    """A stored article on its way to the destinations."""
+
+    article_id: int
+    feed_url: str
+    title: str
+    link: str
+    pub_date: str
+    author: str
+    summary_text: str
+    matched_keywords: List[str] = field(default_factory=list)
+
+    def telegram_text(self, limit: int = TELEGRAM_MAX_CHARS) -> str:
+        item = {
+            "title": self.title,
+            "link": self.link,
+            "pubDate": self.pub_date,
+            "author": self.author,
+            "summary_text": self.summary_text,
+        }
+        return fit_telegram_message(item, self.matched_keywords, limit)
+
+
+class KeywordMatcher:
+    """Finds which of many keywords occur in a text with a single regex scan."""
+
+    def __init__(self, keywords: Iterable[str]):
+        words = sorted({kw for kw in keywords if kw}, key=len, reverse=True)
+        # 零宽前瞻让每个位置都尝试匹配，较长的关键词优先
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, words)) + "))") if words else None
+        # 命中较长关键词时，它包含的较短关键词也必然出现在文本中
+        self._implied = {w: frozenset(o for o in words if o != w and o in w) for w in words}
+
+    def find(self, text: str) -> FrozenSet[str]:
+        if self._pattern is None or not text:
+            return frozenset()
+        hits = {m.group(1) for m in self._pattern.finditer(text)}
+        for word in list(hits):
+            hits |= self._implied[word]
+        return frozenset(hits)
+
+
+class TelegramSink:
+    def __init__(self, tg: TelegramClient, chat_id: str, digest: bool = False):
+        self.tg = tg
+        self.chat_id = chat_id
+        self.digest = digest
+
+    def chunks(self, batch: List[Delivery]) -> List[Any]:
+        if not self.digest:
+            texts = [d.telegram_text() for d in batch]
+            return [(text, len(batch) > 1) for text in pack_messages(texts)]
+        # 为标题预留长度，分条时标注页码
+        title = f"RSS-AI 文章摘要 · 共 {len(batch)} 篇"
+        limit = TELEGRAM_MAX_CHARS - len(f"<b>{title} ({len(batch)}/{len(batch)})</b>\n\n")
+        messages = pack_messages([d.telegram_text(limit) for d in batch], limit)
+        chunks = []
+        for i, text in enumerate(messages, 1):
+            page = f" ({i}/{len(messages)})" if len(messages) > 1 else ""
+            chunks.append((f"<b>{title}{page}</b>\n\n{text}", True))
+        return chunks
+
+    async def deliver(self, payload, client: httpx.AsyncClient) -> bool:
+        text, merged = payload
+        return await self.tg.send_message_async(
+            self.chat_id,
+            text,
+            client=client,
+            parse_mode="HTML",
+            # 合并多篇时关闭链接预览，否则只会预览第一篇
+            disable_web_page_preview=merged,
+        )
+
+
+class WebhookSink:
+    def __init__(self, url: str):
+        self.url = url
+
+    def chunks(self, batch: List[Delivery]) -> List[Any]:
+        return [[asdict(d) for d in batch]]
+
+    async def deliver(self, payload, client: httpx.AsyncClient) -> bool:
+        try:
+            resp = await client.post(self.url, json={"articles": payload})
+        except Exception as exc:
+            logging.warning("Webhook 请求异常 %s: %s", self.url, exc)
+            return False
+        if resp.status_code >= 400:
+            logging.warning("Webhook 调用失败 %s status=%s body=%s", self.url, resp.status_code, resp.text[:300])
+            return False
+        return True
+
+
+class FileSink:
+    def __init__(self, path: str):
+        self.path = path
+
+    def chunks(self, batch: List[Delivery]) -> List[Any]:
+        return ["".join(json.dumps(asdict(d), ensure_ascii=False) + "\n" for d in batch)]
+
+    async def deliver(self, payload, client: httpx.AsyncClient) -> bool:
+        await asyncio.to_thread(self._append, payload)
+        return True
+
+    def _append(self, text: str):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(text)
+
+
+@dataclass
+class _Destination:
+    name: str
+    sink: Any
+    include: FrozenSet[str] = frozenset()
+    exclude: FrozenSet[str] = frozenset()
+    feeds: FrozenSet[str] = frozenset()
+    only_matched: bool = True
+    batch_size: int = 1
+    interval: float = 0.0
+    digest: bool = False
+    digest_window: float = 0.0
+    digest_max: int = 1
+    queue: Optional[asyncio.Queue] = None
+
+    def accepts(self, feed_url: str, found: FrozenSet[str], keywords_matched: bool) -> bool:
+        if self.only_matched and not keywords_matched:
+            return False
+        if self.feeds and feed_url not in self.feeds:
+            return False
+        if self.exclude & found:
+            return False
+        return not self.include or bool(self.include & found)
+
+
+def _build_sink(cfg: SettingsDestination, settings: AppSettings):
+    if cfg.type == "telegram":
+        token = cfg.bot_token or settings.telegram.bot_token
+        if not (token and cfg.chat_id):
+            return None
+        client = TelegramClient(bot_token=token, api_base=settings.telegram.api_base)
+        return TelegramSink(client, cfg.chat_id, digest=cfg.mode == "digest")
+    if cfg.type == "webhook":
+        return WebhookSink(cfg.url) if cfg.url else None
+    return FileSink(cfg.path) if cfg.path else None
+
+
+def _clean(words: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(w.strip() for w in words if isinstance(w, str) and w.strip())
+
+
+def build_destinations(settings: AppSettings) -> List[_Destination]:
+    """Destinations from ``settings.destinations`` plus the legacy ``telegram.chat_id`` one."""
+    configs: List[SettingsDestination] = []
+    tg = settings.telegram
+    if tg.enabled and tg.bot_token and tg.chat_id:
+        configs.append(
+            SettingsDestination(
+                name="telegram",
+                type="telegram",
+                chat_id=tg.chat_id,
+                rate_per_minute=tg.rate_per_minute,
+                mode=tg.mode,
+                digest_window_seconds=tg.digest_window_seconds,
+                digest_max_articles=tg.digest_max_articles,
+            )
+        )
+    configs.extend(settings.destinations)
+    destinations: List[_Destination] = []
+    seen = set()
+    for cfg in configs:
+        if not cfg.enabled:
+            continue
+        if cfg.name in seen:
+            logging.warning(f"投递目标重名，已忽略: {cfg.name}")
+            continue
+        sink = _build_sink(cfg, settings)
+        if sink is None:
+            logging.warning(f"投递目标 {cfg.name} 配置不完整，已忽略")
+            continue
+        seen.add(cfg.name)
+        destinations.append(
+            _Destination(
+                name=cfg.name,
+                sink=sink,
+                include=_clean(cfg.include_keywords),
+                exclude=_clean(cfg.exclude_keywords),
+                feeds=frozenset(cfg.feeds),
+                only_matched=cfg.only_matched,
+                batch_size=cfg.batch_size,
+                interval=60.0 / cfg.rate_per_minute if cfg.rate_per_minute else 0.0,
+                digest=cfg.mode == "digest",
+                digest_window=float(cfg.digest_window_seconds),
+                digest_max=cfg.digest_max_articles,
+            )
+        )
+    return destinations
+
+
+class DigestBuffer:
+    """Articles held back for digest-mode destinations, kept across fetch cycles.
+
+    A destination's digest goes out once it holds ``digest_max_articles``
+    articles or ``digest_window_seconds`` after the first one was buffered,
+    whichever comes first.
+    """
+
+    def __init__(self):
+        self._items: Dict[str, List[Delivery]] = {}
+        self._senders: Dict[str, Callable[[List[Delivery]], Awaitable[None]]] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+
+    def add(self, name: str, delivery: Delivery, send, window: float, max_articles: int) -> Optional[List[Delivery]]:
+        """Buffer ``delivery``; returns the digest to send right away once it is full."""
+        items = self._items.setdefault(name, [])
+        items.append(delivery)
+        # 定时发送时使用最新一轮的目标配置
+        self._senders[name] = send
+        if len(items) >= max_articles:
+            return self.take(name)
+        if window > 0 and name not in self._timers:
+            self._timers[name] = asyncio.create_task(self._send_later(name, window))
+        return None
+
+    def take(self, name: str) -> List[Delivery]:
+        timer = self._timers.pop(name, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        return self._items.pop(name, [])
+
+    async def _send_later(self, name: str, delay: float):
+        await asyncio.sleep(delay)
+        items = self.take(name)
+        if items:
+            await self._senders[name](items)
+
+    async def flush(self):
+        """Send every buffered digest now, e.g. before shutting down."""
+        for name in list(self._items):
+            items = self.take(name)
+            if items:
+                await self._senders[name](items)
+
+
+class DeliveryRouter:
+    """Fans stored articles out to every destination whose rules they pass.
+
+    All destinations' keywords are matched in one scan per article. Each
+    destination has its own queue and sender task, so a slow or rate-limited
+    destination holds up neither the others nor the ingest pipeline.
+    Digest-mode destinations buffer in ``digests``; without one, their
+    digest is sent when the cycle ends.
+    """
+
+    def __init__(self, settings: AppSettings, client: httpx.AsyncClient, digests: Optional[DigestBuffer] = None):
+        self.client = client
+        self._digests = digests or DigestBuffer()
+        self._flush_digests = digests is None
+        self.destinations = build_destinations(settings)
+        self._matcher = KeywordMatcher(kw for d in self.destinations for kw in (*d.include, *d.exclude))
+        self._tasks: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+
+    def route(self, delivery: Delivery, haystack: str, keywords_matched: bool) -> int:
+        """Queue ``delivery`` for every matching destination; returns how many."""
+        if not self.destinations:
+            return 0
+        if not self._tasks:
+            for dest in self.destinations:
+                dest.queue = asyncio.Queue()
+                self._tasks.append(asyncio.create_task(self._drain(dest)))
+        found = self._matcher.find(haystack)
+        count = 0
+        for dest in self.destinations:
+            if dest.accepts(delivery.feed_url, found, keywords_matched):
+                dest.queue.put_nowait(delivery)
+                count += 1
+        return count
+
+    def close(self) -> Optional[asyncio.Task]:
+        """Stop taking articles; returns a task that ends once the queued ones are sent."""
+        if not self._tasks:
+            return None
+        for dest in self.destinations:
+            dest.queue.put_nowait(_STOP)
+        return asyncio.create_task(self._wait_senders())
+
+    async def aclose(self):
+        """Send whatever is still queued and wait for the senders."""
+        task = self.close()
+        if task is not None:
+            await task
+
+    async def _wait_senders(self):
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            self._tasks = []
+        if self.sent or self.failed:
+            logging.info(f"投递完成: 成功 {self.sent} 条消息，失败 {self.failed} 条")
+
+    async def _drain(self, dest: _Destination):
+        if dest.digest:
+            return await self._drain_digest(dest)
+        batch: List[Delivery] = []
+        while True:
+            item = await dest.queue.get()
+            if item is not _STOP:
+                batch.append(item)
+                if len(batch) < dest.batch_size:
+                    continue
+            if batch:
+                await self._send(dest, batch)
+                batch = []
+            if item is _STOP:
+                return
+
+    async def _drain_digest(self, dest: _Destination):
+        async def send(batch: List[Delivery]):
+            await self._send(dest, batch)
+
+        while True:
+            item = await dest.queue.get()
+            if item is _STOP:
+                break
+            full = self._digests.add(dest.name, item, send, dest.digest_window, dest.digest_max)
+            if full:
+                await self._send(dest, full)
+        if self._flush_digests or dest.digest_window <= 0:
+            batch = self._digests.take(dest.name)
+            if batch:
+                await self._send(dest, batch)
+
+    async def _send(self, dest: _Destination, batch: List[Delivery]):
+        for payload in dest.sink.chunks(batch):
+            # 按目标限速：两次发送之间至少间隔 60 / rate_per_minute 秒；先占位再等待，定时发送的摘要也共用同一节奏
+            now = time.monotonic()
+            slot = max(now, _next_send_at.get(dest.name, 0.0))
+            _next_send_at[dest.name] = slot + dest.interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            try:
+                ok = await dest.sink.deliver(payload, self.client)
+            except Exception:
+                logging.exception(f"投递 {dest.name} 异常")
+                ok = False
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+            logging.info(f"投递 {dest.name}（{len(batch)} 篇）: {'成功' if ok else '失败'}")
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class EventBroker:
+    """In-process pub/sub feeding the ``/api/stream`` SSE endpoint.
+
+    ``publish`` may be called from any thread (storage writes happen in
+    worker threads); each subscriber owns a bounded asyncio queue on its
+    event loop. Slow subscribers lose their oldest events rather than
+    blocking publishers.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self._queue_size = queue_size
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event: str, data: dict):
+        with self._lock:
+            if not self._subscribers:
+                return
+            targets = list(self._subscribers.items())
+        message = (event, json.dumps(data, ensure_ascii=False))
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                # loop 已关闭
+                self.unsubscribe(queue)
+
+
+def _offer(queue: asyncio.Queue, message: Tuple[str, str]):
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(message)
+
+
+def format_sse(event: Optional[str], data: str) -> str:
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+broker = EventBroker()
+
+
+def publish(event: str, data: dict):
+    try:
+        broker.publish(event, data)
+    except Exception:
+        logging.debug("事件推送失败: %s", event, exc_info=True)
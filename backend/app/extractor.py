@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
 import re
 import httpx
-from bs4 import BeautifulSoup
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+from .content_cache import ContentCache, normalize_url
 
 
 POSITIVE_HINTS = re.compile(
@@ -18,16 +23,17 @@ NEGATIVE_HINTS = re.compile(
 )
 
 
+_HTML_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36 RSS-AI/1.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+
 def fetch_html(url: str, timeout: float = 15.0) -> Optional[str]:
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36 RSS-AI/1.0",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        }
         with httpx.Client(timeout=timeout, follow_redirects=True) as client:
-            resp = client.get(url, headers=headers)
+            resp = client.get(url, headers=_HTML_HEADERS)
             resp.raise_for_status()
-            enc = resp.encoding or "utf-8"
             text = resp.text
             logging.info(f"抓取原文成功 {url} status={resp.status_code} bytes={len(resp.content)}")
             return text
@@ -36,6 +42,18 @@ def fetch_html(url: str, timeout: float = 15.0) -> Optional[str]:
         return None
 
 
+async def fetch_html_async(url: str, client: httpx.AsyncClient, timeout: float = 15.0) -> Optional[str]:
+    try:
+        resp = await client.get(url, headers=_HTML_HEADERS, timeout=timeout, follow_redirects=True)
+        resp.raise_for_status()
+        text = resp.text
+        logging.info(f"抓取原文成功 {url} status={resp.status_code} bytes={len(resp.content)}")
+        return text
+    except Exception as e:
+        logging.warning(f"抓取原文失败 {url}: {e}")
+        return None
+
+
 def _clean_soup(soup: BeautifulSoup) -> None:
     for tag in soup(["script", "style", "noscript", "iframe", "svg", "canvas", "form", "input", "button"]):
         tag.decompose()
@@ -93,6 +111,9 @@ def _extract_best_node(soup: BeautifulSoup):
 
 
 def extract_main_text(html: str) -> str:
+    # bs4 只在抽取正文时需要，延迟导入以加快启动
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
     _clean_soup(soup)
     node = _extract_best_node(soup)
@@ -113,6 +134,90 @@ def extract_from_url(url: str, timeout: float = 15.0) -> Optional[str]:
     html = fetch_html(url, timeout=timeout)
     if not html:
         return None
+    return _extract_or_none(url, html)
+
+
+async def extract_from_url_async(
+    url: str,
+    client: httpx.AsyncClient,
+    timeout: float = 15.0,
+    cache: Optional[ContentCache] = None,
+) -> Optional[str]:
+    if cache is None:
+        html = await fetch_html_async(url, client, timeout=timeout)
+        if not html:
+            return None
+        # BeautifulSoup 解析为 CPU 密集操作，放到线程中避免阻塞事件循环
+        return await asyncio.to_thread(_extract_or_none, url, html)
+    key = normalize_url(url)
+    task = _inflight.get(key)
+    if task is not None and task.get_loop() is asyncio.get_running_loop():
+        # 同一链接出现在多个源中时，共享正在进行的抓取
+        cache.record("shared")
+    else:
+        task = asyncio.ensure_future(_extract_cached(key, url, client, timeout, cache))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _inflight.pop(key, None) if _inflight.get(key) is t else None)
+    return await asyncio.shield(task)
+
+
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _extract_cached(
+    key: str,
+    url: str,
+    client: httpx.AsyncClient,
+    timeout: float,
+    cache: ContentCache,
+) -> Optional[str]:
+    try:
+        entry = await asyncio.to_thread(cache.get, key)
+    except Exception as e:
+        logging.warning(f"读取正文缓存失败 {url}: {e}")
+        entry = None
+    if entry is not None and entry.fresh:
+        cache.record("hits")
+        return entry.text
+    headers = dict(_HTML_HEADERS)
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    try:
+        resp = await client.get(url, headers=headers, timeout=timeout, follow_redirects=True)
+        if resp.status_code == 304 and entry is not None:
+            cache.record("revalidated")
+            logging.info(f"原文未变化，使用缓存 {url}")
+            await asyncio.to_thread(cache.touch, key)
+            return entry.text
+        resp.raise_for_status()
+    except Exception as e:
+        logging.warning(f"抓取原文失败 {url}: {e}")
+        if entry is not None:
+            # 源站暂时不可用时沿用过期缓存
+            cache.record("stale")
+            return entry.text
+        cache.record("misses")
+        return None
+    cache.record("misses")
+    logging.info(f"抓取原文成功 {url} status={resp.status_code} bytes={len(resp.content)}")
+    text = await asyncio.to_thread(_extract_or_none, url, resp.text)
+    try:
+        await asyncio.to_thread(
+            cache.put,
+            key,
+            text,
+            resp.headers.get("etag"),
+            resp.headers.get("last-modified"),
+        )
+    except Exception as e:
+        logging.warning(f"写入正文缓存失败 {url}: {e}")
+    return text
+
+
+def _extract_or_none(url: str, html: str) -> Optional[str]:
     try:
         text = extract_main_text(html)
         if text and len(text) > 80:
@@ -120,4 +225,3 @@ def extract_from_url(url: str, timeout: float = 15.0) -> Optional[str]:
     except Exception as e:
         logging.warning(f"正文抽取失败 {url}: {e}")
     return None
-
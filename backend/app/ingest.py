@@ -0,0 +1,548 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import CancelledError, Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from .ai_client import AIClient, fallback_summary
+from . import content_cache
+from .archive import archive_articles
+from .config import load_settings
+from .delivery import Delivery, DeliveryRouter, DigestBuffer
+from .extractor import extract_from_url_async
+from .jobs import FetchCancelled, FetchJob
+from .models import AppSettings, ArticleCreate, FetchResponse
+from .rss_service import RSSItem, fetch_feed_async
+from .storage import exists_article, get_feed_watermark, insert_article, prune_articles, save_feed_watermark
+from .telegram_client import TelegramClient
+
+
+_STOP = object()
+
+
+def build_ai_client(settings: AppSettings) -> Optional[AIClient]:
+    if settings.ai.enabled and settings.ai.api_key:
+        return AIClient(
+            base_url=settings.ai.base_url,
+            api_key=settings.ai.api_key,
+            model=settings.ai.model,
+            temperature=settings.ai.temperature,
+        )
+    return None
+
+
+def build_telegram_client(settings: AppSettings) -> Optional[TelegramClient]:
+    if settings.telegram.enabled and settings.telegram.bot_token and settings.telegram.chat_id:
+        return TelegramClient(bot_token=settings.telegram.bot_token, api_base=settings.telegram.api_base)
+    return None
+
+
+@dataclass
+class _CycleStats:
+    feeds_count: int = 0
+    feeds_done: int = 0
+    processed: int = 0
+    new_items: int = 0
+    duplicates: int = 0
+    failed_items: int = 0
+    ai_calls: int = 0
+    ai_success: int = 0
+    ai_failed: int = 0
+    tokens_prompt: int = 0
+    tokens_completion: int = 0
+    tokens_total: int = 0
+    feed_fetch_failed: int = 0
+    unchanged_feeds: int = 0
+    keyword_match_hits: int = 0
+    keyword_match_articles: int = 0
+
+
+@dataclass
+class _Processed:
+    feed: str
+    entry: RSSItem
+    ai_obj: dict
+    matched_keywords: List[str] = field(default_factory=list)
+    keywords_matched: bool = True
+    haystack: str = ""
+
+
+def _entries_digest(entries: List[RSSItem]) -> str:
+    """Order-independent digest of the entry ids in the processed window.
+
+    Reordering the same entries keeps the digest; a new or backdated entry
+    entering the window, or an old one leaving it, changes it.
+    """
+    h = hashlib.sha1()
+    for uid in sorted(e.uid for e in entries):
+        h.update(uid.encode("utf-8", errors="ignore"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class _Cycle:
+    """State of one fetch cycle: fetch → summarize → store/push.
+
+    Stages are linked by bounded queues so slow AI calls throttle feed
+    fetching instead of piling parsed entries up in memory.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        settings: AppSettings,
+        force: bool,
+        job: Optional[FetchJob],
+        feeds: Optional[List[str]] = None,
+        push_summary: bool = True,
+        digests: Optional[DigestBuffer] = None,
+    ):
+        self.client = client
+        self.settings = settings
+        self.force = force
+        self.job = job
+        self.feeds = list(settings.fetch.feeds if feeds is None else feeds)
+        self.push_summary = push_summary
+        self.failed_feeds: List[str] = []
+        self.ai = build_ai_client(settings)
+        self.tg = build_telegram_client(settings)
+        self.router = DeliveryRouter(settings, client, digests)
+        # 本轮入库文章的后台投递任务，由 IngestEngine 跟踪
+        self.delivery: Optional[asyncio.Task] = None
+        raw_keywords = getattr(settings.fetch, "filter_keywords", []) or []
+        self.filter_keywords = [kw.strip() for kw in raw_keywords if isinstance(kw, str) and kw.strip()]
+        self.stats = _CycleStats(feeds_count=len(self.feeds))
+        self.content_cache = content_cache.for_settings(settings) if settings.fetch.use_article_page else None
+        queue_size = max(1, int(settings.fetch.queue_size))
+        self.feed_q: asyncio.Queue = asyncio.Queue()
+        self.item_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.write_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # 有新条目的源：待写入条数与本轮水位，全部写入成功后才保存水位
+        self._pending: Dict[str, int] = {}
+        self._marks: Dict[str, Tuple[str, int, str]] = {}
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job is not None and self.job.cancel_requested
+
+    def _report_progress(self):
+        if self.job is not None:
+            self.job.update_progress(
+                feeds_total=self.stats.feeds_count,
+                feeds_done=self.stats.feeds_done,
+                processed_items=self.stats.processed,
+                new_items=self.stats.new_items,
+            )
+
+    async def run(self) -> FetchResponse:
+        fetch_workers = max(1, int(self.settings.fetch.feed_concurrency))
+        ai_workers = max(1, int(self.settings.fetch.ai_concurrency))
+        for feed in self.feeds:
+            self.feed_q.put_nowait(feed)
+        for _ in range(fetch_workers):
+            self.feed_q.put_nowait(_STOP)
+        self._report_progress()
+        cache_before = self.content_cache.counters() if self.content_cache is not None else None
+
+        fetchers = [asyncio.create_task(self._fetch_stage()) for _ in range(fetch_workers)]
+        processors = [asyncio.create_task(self._process_stage()) for _ in range(ai_workers)]
+        writer = asyncio.create_task(self._write_stage())
+        try:
+            await asyncio.gather(*fetchers)
+            for _ in processors:
+                await self.item_q.put(_STOP)
+            await asyncio.gather(*processors)
+            await self.write_q.put(_STOP)
+            await writer
+        except BaseException:
+            for task in (*fetchers, *processors, writer):
+                task.cancel()
+            await asyncio.gather(*fetchers, *processors, writer, return_exceptions=True)
+            raise
+        finally:
+            # 已入库的文章在后台继续投递，抓取任务与租约不等待限速发送
+            self.delivery = self.router.close()
+
+        if self.cancelled:
+            raise FetchCancelled()
+        if self.settings.archive.enabled:
+            # 分层存储：超出 max_items 或超过 after_days 的文章整批移入月度归档，而不是逐条删除
+            try:
+                await asyncio.to_thread(archive_articles, self.settings)
+            except Exception:
+                logging.exception("归档文章失败")
+        if self.push_summary:
+            await self._push_summary()
+        if cache_before is not None:
+            after = self.content_cache.counters()
+            delta = {k: after[k] - cache_before.get(k, 0) for k in after}
+            lookups = sum(delta[k] for k in content_cache.ContentCache.OUTCOMES)
+            if lookups:
+                logging.info(
+                    f"正文缓存: 查询 {lookups} 次，命中率 {content_cache.hit_rate(delta):.0%}（未变化 {delta['revalidated']}，共享 {delta['shared']}）"
+                )
+        stats = self.stats
+        logging.info(
+            f"抓取完成: 源 {stats.feeds_count} 个（无变化 {stats.unchanged_feeds}），处理 {stats.processed} 条，新增 {stats.new_items}，重复 {stats.duplicates}"
+        )
+        return FetchResponse(
+            fetched_feeds=stats.feeds_count,
+            new_items=stats.new_items,
+            processed_items=stats.processed,
+            message="完成",
+            failed_feeds=self.failed_feeds,
+        )
+
+    async def _fetch_stage(self):
+        while True:
+            feed = await self.feed_q.get()
+            if feed is _STOP:
+                return
+            if self.cancelled:
+                continue
+            try:
+                await self._fetch_one(feed)
+            except Exception as e:
+                logging.exception(f"抓取失败 {feed}: {e}")
+                self.stats.feed_fetch_failed += 1
+                self.failed_feeds.append(feed)
+            self.stats.feeds_done += 1
+            self._report_progress()
+
+    async def _fetch_one(self, feed: str):
+        logging.info(f"开始抓取: {feed}")
+        limit = max(1, int(self.settings.fetch.per_feed_limit))
+        entries = await fetch_feed_async(feed, self.client, limit)
+        logging.info(f"抓取完成: {feed}，条目数 {len(entries)}")
+        # 按时间倒序优先处理，并限制单源抓取上限
+        if entries:
+            try:
+                entries.sort(key=lambda x: getattr(x, 'sort_ts', 0), reverse=True)
+            except Exception:
+                pass
+            if len(entries) > limit:
+                logging.info(f"限制单源抓取上限为 {limit} 条（优先最新）")
+                entries = entries[:limit]
+        digest = _entries_digest(entries)
+        if not self.force and entries:
+            mark = await asyncio.to_thread(get_feed_watermark, feed)
+            newest = entries[0]
+            # 摘要覆盖窗口内的条目集合，最新条目的时间与 ID 捕捉置顶条目被重新发布（更新时间变化）的情况
+            if (
+                mark is not None
+                and mark["seen_digest"] == digest
+                and mark["seen_uid"] == newest.uid
+                and mark["seen_ts"] == int(newest.sort_ts)
+            ):
+                self.stats.processed += len(entries)
+                self.stats.duplicates += len(entries)
+                self.stats.unchanged_feeds += 1
+                logging.info(f"源无变化，跳过: {feed}（{len(entries)} 条均已入库）")
+                return
+        dup = 0
+        for e in entries:
+            if self.cancelled:
+                return
+            self.stats.processed += 1
+            if not self.force and await asyncio.to_thread(exists_article, feed, e.uid):
+                dup += 1
+                continue
+            self._pending[feed] = self._pending.get(feed, 0) + 1
+            await self.item_q.put((feed, e))
+        self.stats.duplicates += dup
+        logging.info(f"汇总 {feed}: 重复 {dup}，本次处理 {len(entries)} 条")
+        if not entries:
+            return
+        newest = entries[0]
+        if dup == len(entries):
+            await asyncio.to_thread(save_feed_watermark, feed, digest, newest.sort_ts, newest.uid)
+        else:
+            # 新条目写入后才推进水位，处理失败或取消的源下一轮仍会逐条检查
+            self._marks[feed] = (digest, newest.sort_ts, newest.uid)
+
+    async def _settle(self, feed: str, ok: bool):
+        """Count one queued entry of ``feed`` as done; save its watermark once all were stored."""
+        if not ok:
+            self._marks.pop(feed, None)
+        left = self._pending[feed] = self._pending[feed] - 1
+        if left == 0 and feed in self._marks:
+            digest, newest_ts, newest_uid = self._marks.pop(feed)
+            try:
+                await asyncio.to_thread(save_feed_watermark, feed, digest, newest_ts, newest_uid)
+            except Exception:
+                logging.exception(f"保存水位失败 {feed}")
+
+    async def _process_stage(self):
+        while True:
+            item = await self.item_q.get()
+            if item is _STOP:
+                return
+            if self.cancelled:
+                continue
+            feed, e = item
+            try:
+                processed = await self._process_one(feed, e)
+            except Exception as ex:
+                self.stats.failed_items += 1
+                logging.exception(f"处理条目异常: {ex}")
+                await self._settle(feed, False)
+                continue
+            await self.write_q.put(processed)
+
+    async def _process_one(self, feed: str, e: RSSItem) -> _Processed:
+        settings = self.settings
+        stats = self.stats
+        # Prefer extracted fulltext for downstream usage
+        extracted_content = None
+        if settings.fetch.use_article_page and e.link:
+            extracted_content = await extract_from_url_async(
+                e.link,
+                self.client,
+                timeout=float(settings.fetch.article_timeout_seconds),
+                cache=self.content_cache,
+            )
+            if extracted_content:
+                logging.info("使用原文抽取正文进行内容处理")
+
+        content_source = extracted_content or e.content or ""
+        haystack_parts = [e.title, e.author, e.content, extracted_content]
+        haystack = " \n ".join(part for part in haystack_parts if part)
+        matched_keywords: list[str] = []
+        if self.filter_keywords:
+            matched_keywords = [kw for kw in self.filter_keywords if kw and kw in haystack]
+            if matched_keywords:
+                matched_keywords = list(dict.fromkeys(matched_keywords))
+            keywords_matched = bool(matched_keywords)
+            if keywords_matched:
+                stats.keyword_match_articles += 1
+                stats.keyword_match_hits += len(matched_keywords)
+            else:
+                logging.debug("关键词未匹配，跳过AI总结与推送: %s", e.title)
+        else:
+            keywords_matched = True
+
+        # summarize via AI when keywords matched; otherwise fallback
+        ai_obj = None
+        attempted_ai = False
+        if self.ai is not None and keywords_matched:
+            logging.debug(f"AI总结开始: {e.title}")
+            attempted_ai = True
+            stats.ai_calls += 1
+            ai_obj = await self.ai.summarize_async(
+                client=self.client,
+                title=e.title,
+                link=e.link,
+                pub_date=e.pub_date,
+                author=e.author,
+                content=content_source,
+                system_prompt=settings.ai.system_prompt,
+                user_prompt_template=settings.ai.user_prompt_template,
+            )
+            if ai_obj is None:
+                stats.ai_failed += 1
+        if ai_obj is None:
+            if attempted_ai:
+                logging.info("AI调用失败，使用降级摘要")
+            ai_obj = fallback_summary(
+                e.title,
+                e.link,
+                e.pub_date,
+                e.author,
+                content_source or e.content,
+            )
+        else:
+            stats.ai_success += 1
+            usage = ai_obj.get("_ai_usage") if isinstance(ai_obj, dict) else None
+            if isinstance(usage, dict):
+                stats.tokens_prompt += int(usage.get("prompt_tokens", 0) or 0)
+                stats.tokens_completion += int(usage.get("completion_tokens", 0) or 0)
+                stats.tokens_total += int(usage.get("total_tokens", 0) or 0)
+        return _Processed(
+            feed=feed,
+            entry=e,
+            ai_obj=ai_obj,
+            matched_keywords=matched_keywords,
+            keywords_matched=keywords_matched,
+            haystack=haystack,
+        )
+
+    async def _write_stage(self):
+        while True:
+            item = await self.write_q.get()
+            if item is _STOP:
+                return
+            try:
+                await self._write_one(item)
+            except Exception as ex:
+                self.stats.failed_items += 1
+                logging.exception(f"入库过程中异常: {ex}")
+                await self._settle(item.feed, False)
+            else:
+                await self._settle(item.feed, True)
+            self._report_progress()
+
+    async def _write_one(self, item: _Processed):
+        e = item.entry
+        ai_obj = item.ai_obj
+        article = ArticleCreate(
+            feed_url=item.feed,
+            item_uid=e.uid,
+            title=ai_obj.get("title") or e.title,
+            link=e.link,
+            pub_date=ai_obj.get("pubDate") or e.pub_date,
+            author=ai_obj.get("author") or e.author,
+            summary_text=ai_obj.get("summary_text") or "",
+            matched_keywords=item.matched_keywords,
+        )
+        row_id = await asyncio.to_thread(insert_article, article)
+        if not row_id:
+            logging.debug(f"入库跳过或失败(可能重复): {article.title}")
+            return
+        self.stats.new_items += 1
+        logging.info(f"新文章入库: {article.title} ({row_id})")
+        if not self.settings.archive.enabled:
+            await asyncio.to_thread(prune_articles, self.settings.fetch.max_items)
+        # 按各投递目标的规则分发（含 telegram.chat_id 默认目标）
+        self.router.route(
+            Delivery(
+                article_id=row_id,
+                feed_url=article.feed_url,
+                title=article.title,
+                link=article.link,
+                pub_date=article.pub_date or "",
+                author=article.author or "",
+                summary_text=article.summary_text,
+                matched_keywords=item.matched_keywords,
+            ),
+            item.haystack,
+            item.keywords_matched,
+        )
+
+    async def _push_summary(self):
+        # 抓取汇总后报告到 Telegram（可选）
+        if self.tg is None or not self.settings.telegram.push_summary:
+            return
+        stats = self.stats
+        summary_lines = [
+            "<b>RSS-AI 抓取汇总</b>",
+            f"RSS 源：{stats.feeds_count} 个",
+            f"获取条目：{stats.processed} 条",
+            f"新增入库：{stats.new_items} 条",
+            f"重复跳过：{stats.duplicates} 条",
+            f"处理失败：{stats.failed_items} 条",
+        ]
+        if self.ai is not None:
+            summary_lines.extend([
+                f"AI 调用：{stats.ai_calls} 次（成功 {stats.ai_success}，失败 {stats.ai_failed}）",
+                f"Token 消耗：prompt {stats.tokens_prompt}，completion {stats.tokens_completion}，total {stats.tokens_total}",
+            ])
+        if self.filter_keywords:
+            summary_lines.append(
+                f"关键词匹配：{stats.keyword_match_hits} 次，命中文章：{stats.keyword_match_articles} 篇"
+            )
+        if stats.feed_fetch_failed:
+            summary_lines.append(f"源抓取失败：{stats.feed_fetch_failed} 个源")
+        await self.tg.send_message_async(
+            self.settings.telegram.chat_id,
+            "\n".join(summary_lines),
+            client=self.client,
+            parse_mode="HTML",
+            disable_web_page_preview=True,
+        )
+
+
+class IngestEngine:
+    """Runs fetch cycles as coroutines on the application's event loop."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._deliveries: Set[asyncio.Task] = set()
+        self._closing = False
+        # 摘要模式下跨抓取轮次缓冲的文章
+        self._digests = DigestBuffer()
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and not self._closing
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+        self._closing = False
+        logging.info("抓取引擎已启动")
+
+    async def run_cycle(
+        self,
+        force: bool = False,
+        job: Optional[FetchJob] = None,
+        feeds: Optional[List[str]] = None,
+        push_summary: bool = True,
+    ) -> FetchResponse:
+        """Run one fetch cycle over ``feeds`` (default: all configured feeds)."""
+        if self._client is None or self._closing:
+            raise RuntimeError("抓取引擎未运行")
+        settings = load_settings()
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks.add(task)
+        cycle = _Cycle(self._client, settings, force, job, feeds=feeds, push_summary=push_summary, digests=self._digests)
+        try:
+            return await cycle.run()
+        finally:
+            if task is not None:
+                self._tasks.discard(task)
+            if cycle.delivery is not None:
+                self._deliveries.add(cycle.delivery)
+                cycle.delivery.add_done_callback(self._deliveries.discard)
+
+    def submit(self, coro: Any) -> Future:
+        """Schedule ``coro`` on the engine loop from another thread."""
+        if self._loop is None or self._closing:
+            coro.close()
+            raise RuntimeError("抓取引擎未运行")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run_cycle_blocking(self, force: bool = False, job: Optional[FetchJob] = None) -> FetchResponse:
+        try:
+            return self.submit(self.run_cycle(force=force, job=job)).result()
+        except CancelledError:
+            raise FetchCancelled()
+
+    async def aclose(self, timeout: float = 10.0):
+        self._closing = True
+        pending = [t for t in self._tasks if not t.done()]
+        if pending:
+            logging.info("等待进行中的抓取结束…")
+            _, still_running = await asyncio.wait(pending, timeout=timeout)
+            for task in still_running:
+                task.cancel()
+            if still_running:
+                await asyncio.wait(still_running, timeout=2)
+        deliveries = [t for t in self._deliveries if not t.done()]
+        if deliveries:
+            logging.info("等待后台投递完成…")
+            _, still_sending = await asyncio.wait(deliveries, timeout=timeout)
+            for task in still_sending:
+                task.cancel()
+            if still_sending:
+                logging.warning(f"仍有 {len(still_sending)} 个投递任务未完成，已取消")
+                await asyncio.wait(still_sending, timeout=2)
+        if self._client is not None:
+            try:
+                await self._digests.flush()
+            except Exception:
+                logging.exception("发送缓冲的摘要失败")
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
+        logging.info("抓取引擎已停止")
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .events import publish
+from .storage import (
+    fetch_job_cancel_requested,
+    list_fetch_jobs,
+    load_fetch_job,
+    request_fetch_job_cancel,
+    save_fetch_job,
+)
+
+# 进度持久化与跨进程取消检查的间隔（秒）
+_SYNC_INTERVAL = 2.0
+
+
+class FetchCancelled(Exception):
+    """Raised inside a fetch cycle when its job has been asked to stop."""
+
+
+class FetchJob:
+    def __init__(self, force: bool = False, source: str = "manual"):
+        self.id = uuid.uuid4().hex
+        self.force = force
+        self.source = source
+        self.status = "pending"  # pending / running / succeeded / failed / cancelled
+        self.created_at = _utcnow()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.message = ""
+        self.coalesced = 0
+        self.progress: Dict[str, int] = {
+            "feeds_total": 0,
+            "feeds_done": 0,
+            "processed_items": 0,
+            "new_items": 0,
+        }
+        self.result: Optional[dict] = None
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+        self._lock = threading.Lock()
+        self._persist = False
+        self._dirty = False
+
+    @property
+    def cancel_requested(self) -> bool:
+        # 只读内存中的标志：抓取在事件循环上频繁检查，不能在这里访问数据库
+        return self._cancel_event.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._done_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_requested:
+            raise FetchCancelled()
+
+    def update_progress(self, **values: int):
+        with self._lock:
+            self.progress.update(values)
+        self._changed(final=False)
+
+    def _changed(self, final: bool = True):
+        snapshot = self.snapshot()
+        publish("fetch", snapshot)
+        if not self._persist:
+            return
+        if not final:
+            # 进度更新来自抓取事件循环，由 _sync_loop 线程按间隔写入
+            self._dirty = True
+            return
+        self._save(snapshot)
+
+    def _save(self, snapshot: dict):
+        try:
+            save_fetch_job(snapshot)
+        except Exception:
+            logging.warning("保存抓取任务状态失败: %s", self.id, exc_info=True)
+
+    def _sync_loop(self):
+        """Persist progress and pick up cancel requests from other workers until the job ends."""
+        while not self._done_event.wait(_SYNC_INTERVAL):
+            if self._dirty:
+                self._dirty = False
+                self._save(self.snapshot())
+            try:
+                if fetch_job_cancel_requested(self.id):
+                    self._cancel_event.set()
+            except Exception:
+                logging.debug("检查取消状态失败: %s", self.id, exc_info=True)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done_event.wait(timeout)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "force": self.force,
+                "source": self.source,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "message": self.message,
+                "coalesced": self.coalesced,
+                "progress": dict(self.progress),
+                "result": self.result,
+            }
+
+
+class FetchJobManager:
+    """Runs at most one fetch cycle at a time.
+
+    Triggers that arrive while a cycle is running are folded into a single
+    pending job which starts as soon as the current one finishes. With
+    ``persist`` enabled, job snapshots are written to SQLite so any worker
+    process can report on (or cancel) a job started by another.
+    """
+
+    def __init__(self, runner: Callable[[FetchJob], dict], history: int = 20, persist: bool = False):
+        self._runner = runner
+        self._history = max(1, history)
+        self._persist = persist
+        self._jobs: "OrderedDict[str, FetchJob]" = OrderedDict()
+        self._current: Optional[FetchJob] = None
+        self._pending: Optional[FetchJob] = None
+        self._lock = threading.RLock()
+        self._closed = False
+
+    def submit(self, force: bool = False, source: str = "manual") -> Tuple[FetchJob, bool]:
+        """Queue a fetch cycle; returns ``(job, coalesced)``."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("job manager is closed")
+            if self._current is None:
+                job = self._new_job(force, source)
+                self._start(job)
+                return job, False
+            if self._pending is None:
+                job = self._new_job(force, source)
+                self._pending = job
+                job._changed()
+                logging.info("抓取任务进行中，新触发排队等待: %s", job.id)
+                return job, False
+            pending = self._pending
+            with pending._lock:
+                pending.force = pending.force or force
+                pending.coalesced += 1
+            pending._changed()
+            logging.info("抓取触发已合并到排队任务: %s", pending.id)
+            return pending, True
+
+    def get(self, job_id: str) -> Optional[FetchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[FetchJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def get_snapshot(self, job_id: str) -> Optional[dict]:
+        job = self.get(job_id)
+        if job is not None:
+            return job.snapshot()
+        return load_fetch_job(job_id) if self._persist else None
+
+    def list_snapshots(self, limit: int = 20) -> List[dict]:
+        local = {job.id: job.snapshot() for job in self.list()}
+        if not self._persist:
+            return list(local.values())[:limit]
+        merged = [local.pop(s["job_id"], s) for s in list_fetch_jobs(limit)]
+        merged = list(local.values()) + merged
+        merged.sort(key=lambda s: s.get("created_at") or "", reverse=True)
+        return merged[:limit]
+
+    def cancel_snapshot(self, job_id: str) -> Optional[dict]:
+        job = self.cancel(job_id)
+        if job is not None:
+            return job.snapshot()
+        if self._persist and request_fetch_job_cancel(job_id):
+            logging.info("已请求取消其他进程中的抓取任务: %s", job_id)
+            return load_fetch_job(job_id)
+        return None
+
+    def current(self) -> Optional[FetchJob]:
+        with self._lock:
+            return self._current
+
+    def cancel(self, job_id: str) -> Optional[FetchJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return job
+            job._cancel_event.set()
+            if job is self._pending:
+                self._pending = None
+                self._finish(job, "cancelled", "已取消")
+            else:
+                logging.info("已请求取消抓取任务: %s", job.id)
+            return job
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, None
+            current = self._current
+        if pending is not None:
+            pending._cancel_event.set()
+            self._finish(pending, "cancelled", "服务停止")
+        if current is not None:
+            current._cancel_event.set()
+            current.wait(timeout)
+
+    def _new_job(self, force: bool, source: str) -> FetchJob:
+        job = FetchJob(force=force, source=source)
+        job._persist = self._persist
+        self._remember(job)
+        return job
+
+    def _remember(self, job: FetchJob):
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.done:
+                break
+            del self._jobs[oldest_id]
+
+    def _start(self, job: FetchJob):
+        self._current = job
+        with job._lock:
+            job.status = "running"
+            job.started_at = _utcnow()
+        job._changed()
+        if job._persist:
+            threading.Thread(target=job._sync_loop, name=f"FetchJobSync-{job.id[:8]}", daemon=True).start()
+        thread = threading.Thread(target=self._run, args=(job,), name=f"FetchJob-{job.id[:8]}", daemon=True)
+        thread.start()
+
+    def _run(self, job: FetchJob):
+        logging.info("抓取任务开始: %s (来源 %s, force=%s)", job.id, job.source, job.force)
+        try:
+            result = self._runner(job)
+        except FetchCancelled:
+            self._finish(job, "cancelled", "已取消")
+        except Exception as exc:
+            if job.cancel_requested:
+                # 服务停止时引擎先于任务关闭，此时的异常视为取消
+                logging.info("抓取任务在取消过程中中止: %s (%s)", job.id, exc)
+                self._finish(job, "cancelled", "已取消")
+            else:
+                logging.exception("抓取任务失败: %s", job.id)
+                self._finish(job, "failed", str(exc) or exc.__class__.__name__)
+        else:
+            if job.cancel_requested:
+                self._finish(job, "cancelled", "已取消", result)
+            else:
+                self._finish(job, "succeeded", (result or {}).get("message", ""), result)
+        finally:
+            with self._lock:
+                self._current = None
+                nxt, self._pending = self._pending, None
+                if nxt is not None and not self._closed:
+                    self._start(nxt)
+
+    @staticmethod
+    def _finish(job: FetchJob, status: str, message: str, result: Optional[dict] = None):
+        with job._lock:
+            job.status = status
+            job.message = message
+            job.result = result
+            job.finished_at = _utcnow()
+        job._done_event.set()
+        job._changed()
+        logging.info("抓取任务结束: %s 状态 %s", job.id, status)
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
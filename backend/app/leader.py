@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from .storage import release_lease, try_acquire_lease
+
+
+def process_identity() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseBusy(Exception):
+    """The lease is currently held by another process."""
+
+
+class LeaderElector:
+    """Keeps at most one process across all workers as leader via a SQLite lease.
+
+    The leader renews its lease every ``ttl / 3`` seconds. If it dies, the
+    lease expires and another worker takes over on its next attempt.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        on_renewed: Optional[Callable[[], None]] = None,
+        holder: Optional[str] = None,
+    ):
+        self.name = name
+        self.holder = holder or process_identity()
+        self._ttl = max(float(ttl_seconds), 3.0)
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._on_renewed = on_renewed
+        self._is_leader = False
+        self._last_renewed = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"LeaderElector-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self):
+        logging.info("选主已启动: %s (holder=%s)", self.name, self.holder)
+        while not self._stop_event.is_set():
+            self._tick()
+            self._stop_event.wait(self._ttl / 3)
+        if self._is_leader:
+            self._demote()
+            try:
+                release_lease(self.name, self.holder)
+            except Exception:
+                logging.exception("释放租约失败: %s", self.name)
+        logging.info("选主已停止: %s", self.name)
+
+    def _tick(self):
+        try:
+            acquired = try_acquire_lease(self.name, self.holder, self._ttl)
+        except Exception as exc:
+            logging.warning("续约失败: %s err=%s", self.name, exc)
+            # 短暂的数据库忙不立即让出，只有租约可能已过期时才降级
+            if self._is_leader and time.time() - self._last_renewed > self._ttl * 0.8:
+                self._demote()
+            return
+        if acquired:
+            self._last_renewed = time.time()
+            if not self._is_leader:
+                self._is_leader = True
+                logging.info("当前进程成为主节点: %s", self.holder)
+                self._safe_call(self._on_elected)
+            elif self._on_renewed is not None:
+                self._safe_call(self._on_renewed)
+        elif self._is_leader:
+            self._demote()
+
+    def _demote(self):
+        self._is_leader = False
+        logging.info("当前进程不再是主节点: %s", self.holder)
+        self._safe_call(self._on_demoted)
+
+    @staticmethod
+    def _safe_call(cb: Callable[[], None]):
+        try:
+            cb()
+        except Exception:
+            logging.exception("主节点切换回调异常")
+
+
+@contextmanager
+def hold_lease(name: str, ttl_seconds: float = 60.0, holder: Optional[str] = None) -> Iterator[str]:
+    """Hold lease ``name`` for the duration of the block, renewing it in the background.
+
+    Raises :class:`LeaseBusy` if another process holds it.
+    """
+    holder = holder or process_identity()
+    if not try_acquire_lease(name, holder, ttl_seconds):
+        raise LeaseBusy(name)
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(ttl_seconds / 3):
+            try:
+                try_acquire_lease(name, holder, ttl_seconds)
+            except Exception as exc:
+                logging.warning("续约失败: %s err=%s", name, exc)
+
+    renewer = threading.Thread(target=renew, name=f"Lease-{name}", daemon=True)
+    renewer.start()
+    try:
+        yield holder
+    finally:
+        stop.set()
+        renewer.join(timeout=2)
+        try:
+            release_lease(name, holder)
+        except Exception:
+            logging.exception("释放租约失败: %s", name)
@@ -1,43 +1,71 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import re
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from .config import load_settings, save_settings
+from .config import config_path, load_settings, save_settings
 from .models import (
+    AllocationSnapshot,
     AppSettings,
+    ArchiveListResponse,
     ArticleInDB,
     ArticleListResponse,
+    ContentCacheStats,
+    FetchJobListResponse,
+    FetchJobResponse,
+    FeedQueueResponse,
     FetchRequest,
     FetchResponse,
     HealthResponse,
+    ReadinessResponse,
+    ReportBackfillRequest,
+    ReportBackfillResponse,
     ReportInDB,
     ReportListResponse,
+    ReportScheduleInfo,
     ReportGenerateRequest,
     UpdateSettingsRequest,
 )
 from .storage import (
     init_db,
+    enqueue_feeds,
+    list_feed_queue,
+    write_version,
+    ARTICLE_FIELDS,
+    list_article_rows,
     list_articles,
     get_article,
-    insert_article,
-    prune_articles,
-    exists_article,
     list_reports,
     get_report,
 )
-from .rss_service import fetch_feed
-from .extractor import extract_from_url
-from .ai_client import AIClient, fallback_summary
-from .telegram_client import TelegramClient
-from .scheduler import FetchScheduler, AlignedScheduler
-from .report_service import generate_report as run_report, BEIJING_TZ
+from .ingest import IngestEngine, build_ai_client as _build_ai_client, build_telegram_client as _build_telegram_client
+from .scheduler import TimerService
+from .jobs import FetchJob, FetchJobManager
+from .leader import LeaderElector, LeaseBusy, hold_lease
+from .response_cache import ResponseCache, dumps_json
+from .events import broker, format_sse
+from .content_cache import content_cache
+from .profiler import ProfilerBusy, allocation_snapshot, format_collapsed, sample_stacks
+from .archive import list_months as list_archive_months, search_month
+from .report_service import (
+    BEIJING_TZ,
+    ReportSchedule,
+    build_schedule,
+    generate_report as run_report,
+    report_schedules,
+)
+from .backfill import BackfillBusy, run_backfill
 
 
 app = FastAPI(title="RSS-AI API", version="0.1.0")
@@ -51,8 +79,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-_scheduler: Optional[FetchScheduler] = None
-_report_schedulers: Dict[str, AlignedScheduler] = {}
+# 主节点上抓取与报告共用的定时器
+_timers: Optional[TimerService] = None
+_report_specs: Dict[str, ReportSchedule] = {}
+_jobs: Optional[FetchJobManager] = None
+_engine: Optional[IngestEngine] = None
+_page_cache = ResponseCache()
+_elector: Optional[LeaderElector] = None
+# 保护调度器的启停（选主线程与设置接口都会调用）
+_schedulers_lock = threading.RLock()
+_applied_config_mtime: Optional[float] = None
+# 启动完成前为 None，用于就绪检查
+_ready_seconds: Optional[float] = None
 
 
 def _setup_logging():
@@ -68,322 +106,239 @@ def _setup_logging():
     logging.getLogger().addHandler(fh)
 
 
-def _build_ai_client(settings: AppSettings) -> Optional[AIClient]:
-    if settings.ai.enabled and settings.ai.api_key:
-        return AIClient(
-            base_url=settings.ai.base_url,
-            api_key=settings.ai.api_key,
-            model=settings.ai.model,
-            temperature=settings.ai.temperature,
-        )
-    return None
-
-
-def _build_telegram_client(settings: AppSettings) -> Optional[TelegramClient]:
-    if settings.telegram.enabled and settings.telegram.bot_token and settings.telegram.chat_id:
-        return TelegramClient(bot_token=settings.telegram.bot_token)
-    return None
-
-
-def _next_top_of_hour(now: datetime) -> datetime:
-    local = now.astimezone(BEIJING_TZ)
-    aligned = local.replace(minute=0, second=0, microsecond=0)
-    if local >= aligned:
-        aligned += timedelta(hours=1)
-    return aligned.astimezone(timezone.utc)
-
-
-def _next_midnight(now: datetime) -> datetime:
-    local = now.astimezone(BEIJING_TZ)
-    aligned = local.replace(hour=0, minute=0, second=0, microsecond=0)
-    if local >= aligned:
-        aligned += timedelta(days=1)
-    return aligned.astimezone(timezone.utc)
-
-
 def _run_report(report_type: str):
     settings = load_settings()
-    if report_type == "daily" and not settings.reports.daily_enabled:
-        logging.debug("日报已禁用，跳过生成")
-        return
-    if report_type == "hourly" and not settings.reports.hourly_enabled:
-        logging.debug("小时报已禁用，跳过生成")
+    if report_type not in report_schedules(settings, enabled_only=True):
+        logging.debug("报告已禁用，跳过生成: %s", report_type)
         return
     ai = _build_ai_client(settings)
     tg = _build_telegram_client(settings)
     run_report(report_type, settings=settings, ai_client=ai, telegram_client=tg)
 
 
-def _configure_report_schedulers(settings: AppSettings):
-    global _report_schedulers
-
-    def ensure_scheduler(report_type: str, enabled: bool, compute):
-        scheduler = _report_schedulers.get(report_type)
-        if enabled:
-            if scheduler is None:
-                scheduler = AlignedScheduler(
-                    name=f"ReportScheduler-{report_type}",
-                    compute_next_run=compute,
-                    task=lambda rt=report_type: _run_report(rt),
-                )
-                _report_schedulers[report_type] = scheduler
-                # Generate once immediately for当前时间段
-                _run_report(report_type)
-            scheduler.start()
-        else:
-            if scheduler is not None:
-                scheduler.stop()
-                del _report_schedulers[report_type]
-
-    ensure_scheduler("hourly", settings.reports.hourly_enabled, _next_top_of_hour)
-    ensure_scheduler("daily", settings.reports.daily_enabled, _next_midnight)
-
-
-def _manual_report_timeframe(report_type: str) -> Tuple[datetime, datetime]:
+def _run_initial_reports(report_types: List[str]):
+    for report_type in report_types:
+        try:
+            _run_report(report_type)
+        except Exception:
+            logging.exception("首次生成报告失败: %s", report_type)
+    # 首次报告完成后再补齐停机期间漏掉的时间段，避免同一时间段重复生成
+    settings = load_settings()
+    if not settings.reports.backfill_enabled:
+        return
+    try:
+        run_backfill(settings, _build_ai_client(settings), report_types=report_types)
+    except BackfillBusy:
+        logging.info("其他进程正在补齐报告，本次跳过")
+    except Exception:
+        logging.exception("补齐报告失败")
+
+
+def _report_job(report_type: str) -> str:
+    return f"report:{report_type}"
+
+
+def _configure_report_schedulers(timers: TimerService, settings: AppSettings):
+    desired = report_schedules(settings, enabled_only=True)
+    started: List[str] = []
+    for name in list(_report_specs):
+        if name not in desired:
+            timers.remove(_report_job(name))
+            del _report_specs[name]
+    for name, schedule in desired.items():
+        if _report_specs.get(name) == schedule:
+            continue
+        if name not in _report_specs:
+            started.append(name)
+        timers.add(_report_job(name), schedule.next_run, lambda rt=name: _run_report(rt))
+        _report_specs[name] = schedule
+    if started:
+        # 立即为当前时间段生成一次；AI 调用可能耗时较长，放到后台线程，不占用调度锁
+        threading.Thread(
+            target=_run_initial_reports,
+            args=(started,),
+            name="InitialReports",
+            daemon=True,
+        ).start()
+
+
+def _manual_report_timeframe(schedule: ReportSchedule) -> Tuple[datetime, datetime]:
     now_local = datetime.now(BEIJING_TZ)
-    if report_type == "daily":
+    if schedule.name == "daily":
         start_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
         end_local = now_local
-    elif report_type == "hourly":
+    elif schedule.name == "hourly":
         end_local = now_local
         start_local = end_local - timedelta(hours=1)
     else:
-        raise ValueError("unsupported report type")
+        # 自定义计划：从上一次触发时间到现在
+        end_local = now_local
+        start_local = schedule.cron.last_at_or_before(now_local.astimezone(schedule.tz))
+        if end_local.replace(microsecond=0) <= start_local:
+            # 恰好在触发时刻手动生成时窗口为空，改用上一次触发时间，避免写入与后续正式报告同指纹的空报告
+            start_local = schedule.cron.last_at_or_before(start_local - timedelta(minutes=1))
     start_utc = start_local.astimezone(timezone.utc)
     end_utc = end_local.astimezone(timezone.utc)
     return start_utc, end_utc
 
 
-def _format_telegram_message(item: dict, matched_keywords: Optional[list[str]] = None) -> str:
-    # item has title, link, pubDate, author, summary_text
-    title = item.get("title", "")
-    link = item.get("link", "")
-    pub_date = item.get("pubDate", "")
-    author = item.get("author", "")
-    summary_text = item.get("summary_text", "")
-    keywords = matched_keywords or []
-    # HTML formatting for Telegram
-    parts = [
-        f"<b>{title}</b>",
-        f"<a href=\"{link}\">原文链接</a>",
-    ]
-    meta = []
-    if pub_date:
-        meta.append(f"发布时间：{pub_date}")
-    if author:
-        meta.append(f"作者：{author}")
-    if keywords:
-        meta.append("关键词：" + "、".join(keywords))
-    if meta:
-        parts.append(" | ".join(meta))
-    if summary_text:
-        parts.append("\n" + summary_text)
-    return "\n".join(parts)
-
-
-def do_fetch_once(force: bool = False) -> FetchResponse:
+def do_fetch_once(force: bool = False, job: Optional[FetchJob] = None) -> FetchResponse:
+    if _engine is None:
+        raise RuntimeError("抓取引擎未运行")
+    return _engine.run_cycle_blocking(force=force, job=job)
+
+
+def _run_fetch_job(job: FetchJob) -> dict:
     settings = load_settings()
-    ai = _build_ai_client(settings)
-    tg = _build_telegram_client(settings)
+    if settings.queue.enabled:
+        # 队列模式：只负责派发，由独立的抓取 worker（python -m app.main worker）处理
+        feeds = list(settings.fetch.feeds)
+        enqueue_feeds(feeds, force=job.force)
+        job.update_progress(feeds_total=len(feeds), feeds_done=len(feeds))
+        logging.info("已加入队列 %s 个源", len(feeds))
+        return FetchResponse(
+            fetched_feeds=0,
+            new_items=0,
+            processed_items=0,
+            message=f"已加入队列 {len(feeds)} 个源",
+        ).model_dump()
+    # 跨进程互斥：任一 worker 上同时只允许一轮抓取
+    try:
+        with hold_lease("fetch-cycle", ttl_seconds=60):
+            return do_fetch_once(force=job.force, job=job).model_dump()
+    except LeaseBusy:
+        logging.info("其他进程正在抓取，本次任务跳过: %s", job.id)
+        return FetchResponse(
+            fetched_feeds=0,
+            new_items=0,
+            processed_items=0,
+            message="其他进程正在抓取，本次跳过",
+        ).model_dump()
+
+
+def _scheduled_fetch():
+    if _jobs is None:
+        return
+    job, _ = _jobs.submit(force=False, source="scheduler")
+    # 等待本轮（或合并后的）任务结束，保持抓取间隔从上一轮结束时开始计算
+    job.wait()
+
+
+def _config_mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(config_path())
+    except OSError:
+        return None
+
+
+def _apply_settings(settings: AppSettings):
+    """(Re)configure the schedulers on the leader process."""
+    global _timers, _applied_config_mtime
+    with _schedulers_lock:
+        _applied_config_mtime = _config_mtime()
+        interval = settings.fetch.interval_minutes * 60
+        if _timers is None:
+            _timers = TimerService("Timers")
+            _timers.every("fetch", interval, _scheduled_fetch, jitter=settings.fetch.jitter_seconds)
+            _timers.start()
+        else:
+            # 原地调整间隔，不会因保存设置而立即触发一轮抓取
+            _timers.set_interval("fetch", interval, jitter=settings.fetch.jitter_seconds)
+        _configure_report_schedulers(_timers, settings)
+
+
+def _become_leader():
+    # 配置调度器需要等待旧调度线程退出，放到独立线程中，避免阻塞续约
+    threading.Thread(
+        target=lambda: _apply_settings(load_settings()),
+        name="LeaderStartup",
+        daemon=True,
+    ).start()
+
+
+def _step_down():
+    global _timers
+    with _schedulers_lock:
+        if _timers:
+            _timers.stop()
+            _timers = None
+        _report_specs.clear()
 
-    new_items = 0
-    processed = 0
-    feeds_count = len(settings.fetch.feeds)
-    duplicates = 0
-    failed_items = 0
-    ai_calls = 0
-    ai_success = 0
-    ai_failed = 0
-    tokens_prompt = 0
-    tokens_completion = 0
-    tokens_total = 0
-    feed_fetch_failed = 0
-    raw_keywords = getattr(settings.fetch, "filter_keywords", []) or []
-    filter_keywords = [kw.strip() for kw in raw_keywords if isinstance(kw, str) and kw.strip()]
-    keyword_terms = list(filter_keywords)
-    keyword_match_hits = 0
-    keyword_match_articles = 0
-    for feed in settings.fetch.feeds:
-        logging.info(f"开始抓取: {feed}")
-        try:
-            entries = fetch_feed(feed)
-        except Exception as e:
-            logging.exception(f"抓取失败 {feed}: {e}")
-            feed_fetch_failed += 1
-            continue
-        logging.info(f"抓取完成: {feed}，条目数 {len(entries)}")
-        # 按时间倒序优先处理，并限制单源抓取上限
-        if entries:
-            try:
-                entries.sort(key=lambda x: getattr(x, 'sort_ts', 0), reverse=True)
-            except Exception:
-                pass
-            limit = max(1, int(settings.fetch.per_feed_limit))
-            if len(entries) > limit:
-                logging.info(f"限制单源抓取上限为 {limit} 条（优先最新）")
-                entries = entries[:limit]
-        dup = 0
-        for e in entries:
-            processed += 1
-            if not force and exists_article(feed, e.uid):
-                dup += 1
-                continue
-
-            # Prefer extracted fulltext for downstream usage
-            extracted_content = None
-            if settings.fetch.use_article_page and e.link:
-                extracted_content = extract_from_url(
-                    e.link,
-                    timeout=float(settings.fetch.article_timeout_seconds),
-                )
-                if extracted_content:
-                    logging.info("使用原文抽取正文进行内容处理")
-
-            content_source = extracted_content or e.content or ""
-            haystack_parts = [e.title, e.author, e.content, extracted_content]
-            haystack = " \n ".join(part for part in haystack_parts if part)
-            matched_keywords: list[str] = []
-            if keyword_terms:
-                matched_keywords = [kw for kw in keyword_terms if kw and kw in haystack]
-                if matched_keywords:
-                    matched_keywords = list(dict.fromkeys(matched_keywords))
-                keywords_matched = bool(matched_keywords)
-                if keywords_matched:
-                    keyword_match_articles += 1
-                    keyword_match_hits += len(matched_keywords)
-            else:
-                keywords_matched = True
-            if not keywords_matched and filter_keywords:
-                logging.debug("关键词未匹配，跳过AI总结与推送: %s", e.title)
-
-            # summarize via AI when keywords matched; otherwise fallback
-            ai_obj = None
-            attempted_ai = False
-            if ai is not None and keywords_matched:
-                logging.debug(f"AI总结开始: {e.title}")
-                attempted_ai = True
-                ai_calls += 1
-                ai_obj = ai.summarize(
-                    title=e.title,
-                    link=e.link,
-                    pub_date=e.pub_date,
-                    author=e.author,
-                    content=content_source,
-                    system_prompt=settings.ai.system_prompt,
-                    user_prompt_template=settings.ai.user_prompt_template,
-                )
-                if ai_obj is None:
-                    ai_failed += 1
-            if ai_obj is None:
-                if attempted_ai:
-                    logging.info("AI调用失败，使用降级摘要")
-                ai_obj = fallback_summary(
-                    e.title,
-                    e.link,
-                    e.pub_date,
-                    e.author,
-                    content_source or e.content,
-                )
-            else:
-                ai_success += 1
-                usage = ai_obj.get("_ai_usage") if isinstance(ai_obj, dict) else None
-                if isinstance(usage, dict):
-                    tokens_prompt += int(usage.get("prompt_tokens", 0) or 0)
-                    tokens_completion += int(usage.get("completion_tokens", 0) or 0)
-                    tokens_total += int(usage.get("total_tokens", 0) or 0)
-
-            from .models import ArticleCreate  # local import to avoid circular
-
-            article = ArticleCreate(
-                feed_url=feed,
-                item_uid=e.uid,
-                title=ai_obj.get("title") or e.title,
-                link=e.link,
-                pub_date=ai_obj.get("pubDate") or e.pub_date,
-                author=ai_obj.get("author") or e.author,
-                summary_text=ai_obj.get("summary_text") or "",
-                matched_keywords=matched_keywords,
-            )
-            try:
-                row_id = insert_article(article)
-                if row_id:
-                    new_items += 1
-                    logging.info(f"新文章入库: {article.title} ({row_id})")
-                    prune_articles(settings.fetch.max_items)
-                    # send to telegram
-                    if tg is not None and keywords_matched:
-                        text = _format_telegram_message(ai_obj, matched_keywords)
-                        ok = tg.send_message(settings.telegram.chat_id, text, parse_mode="HTML", disable_web_page_preview=False)
-                        logging.info(f"推送Telegram: {'成功' if ok else '失败'}")
-                else:
-                    logging.debug(f"入库跳过或失败(可能重复): {article.title}")
-            except Exception as ex:
-                failed_items += 1
-                logging.exception(f"入库过程中异常: {ex}")
-        logging.info(f"汇总 {feed}: 新增 {new_items}，重复 {dup}，本次处理 {len(entries)} 条")
-        duplicates += dup
-    # 抓取汇总后报告到 Telegram（可选）
-    if tg is not None and settings.telegram.push_summary:
-        summary_lines = [
-            "<b>RSS-AI 抓取汇总</b>",
-            f"RSS 源：{feeds_count} 个",
-            f"获取条目：{processed} 条",
-            f"新增入库：{new_items} 条",
-            f"重复跳过：{duplicates} 条",
-            f"处理失败：{failed_items} 条",
-        ]
-        if ai is not None:
-            summary_lines.extend([
-                f"AI 调用：{ai_calls} 次（成功 {ai_success}，失败 {ai_failed}）",
-                f"Token 消耗：prompt {tokens_prompt}，completion {tokens_completion}，total {tokens_total}",
-            ])
-        if filter_keywords:
-            summary_lines.append(
-                f"关键词匹配：{keyword_match_hits} 次，命中文章：{keyword_match_articles} 篇"
-            )
-        if feed_fetch_failed:
-            summary_lines.append(f"源抓取失败：{feed_fetch_failed} 个源")
-        tg.send_message(settings.telegram.chat_id, "\n".join(summary_lines), parse_mode="HTML", disable_web_page_preview=True)
-
-    return FetchResponse(
-        fetched_feeds=feeds_count,
-        new_items=new_items,
-        processed_items=processed,
-        message="完成",
-    )
+
+def _on_leader_renewed():
+    # 设置可能由其他 worker 保存，主节点通过配置文件修改时间感知并重新配置
+    mtime = _config_mtime()
+    if mtime is not None and mtime != _applied_config_mtime:
+        logging.info("检测到配置变更，重新配置调度器")
+        _apply_settings(load_settings())
 
 
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
+    started = time.perf_counter()
     _setup_logging()
     settings = load_settings()
     logging.info("应用启动中…")
     init_db()
-    global _scheduler
-    _scheduler = FetchScheduler(settings.fetch.interval_minutes, task=lambda: do_fetch_once(force=False))
-    _scheduler.start()
-    _configure_report_schedulers(settings)
-    logging.info("应用已启动")
+    global _jobs, _engine, _elector, _ready_seconds
+    _engine = IngestEngine()
+    await _engine.start()
+    _jobs = FetchJobManager(_run_fetch_job, persist=True)
+    # 多 worker 部署时仅主节点运行定时抓取与报告调度，其余进程只提供 API
+    _elector = LeaderElector(
+        "schedulers",
+        ttl_seconds=settings.server.leader_lease_seconds,
+        on_elected=_become_leader,
+        on_demoted=_step_down,
+        on_renewed=_on_leader_renewed,
+    )
+    _elector.start()
+    # 首次抓取与报告由主节点在后台线程中触发，不阻塞接收请求
+    _ready_seconds = time.perf_counter() - started
+    logging.info("应用已启动，用时 %.3f 秒", _ready_seconds)
 
 
 @app.on_event("shutdown")
-def on_shutdown():
+async def on_shutdown():
+    global _ready_seconds
+    _ready_seconds = None
     logging.info("应用即将停止…")
-    global _scheduler
-    if _scheduler:
-        _scheduler.stop()
-    global _report_schedulers
-    for sched in list(_report_schedulers.values()):
-        sched.stop()
-    _report_schedulers.clear()
+    # 先让进行中的抓取协作式退出并关闭连接池，再停止等待抓取结果的调度线程
+    if _jobs is not None:
+        _jobs.shutdown(timeout=0)
+    if _engine is not None:
+        await _engine.aclose()
+    if _elector is not None:
+        # 停止选主会释放租约并停止调度器，其他 worker 可立即接管
+        await asyncio.to_thread(_elector.stop)
+    await asyncio.to_thread(_step_down)
     logging.info("应用已停止")
 
 
 @app.get("/api/health", response_model=HealthResponse)
-def health():
+async def health():
     return HealthResponse()
 
 
+@app.get("/api/ready", response_model=ReadinessResponse)
+async def ready(response: Response):
+    """Readiness (unlike ``/api/health``): 503 until startup has finished and while shutting down."""
+    checks = {
+        "startup": _ready_seconds is not None,
+        "engine": _engine is not None and _engine.running,
+        "jobs": _jobs is not None,
+    }
+    ok = all(checks.values())
+    if not ok:
+        response.status_code = 503
+    return ReadinessResponse(
+        ready=ok,
+        checks=checks,
+        startup_seconds=round(_ready_seconds, 3) if _ready_seconds is not None else None,
+        leader=_elector is not None and _elector.is_leader,
+    )
+
+
 @app.get("/api/settings", response_model=AppSettings)
 def get_settings():
     s = load_settings()
@@ -393,6 +348,9 @@ def get_settings():
         safe.ai.api_key = "***"
     if safe.telegram.bot_token:
         safe.telegram.bot_token = "***"
+    for dest in safe.destinations:
+        if dest.bot_token:
+            dest.bot_token = "***"
     if safe.security and safe.security.admin_password:
         safe.security.admin_password = ""
     # 为避免用户从零填写提示词，若为空则回填默认提示词
@@ -410,16 +368,20 @@ def get_settings():
     return safe
 
 
+def _check_admin_password(password: Optional[str], settings: Optional[AppSettings] = None):
+    password = (password or "").strip()
+    if not (password.isdigit() and len(password) == 4):
+        raise HTTPException(status_code=400, detail="密码必须为4位数字")
+    if password != (settings or load_settings()).security.admin_password:
+        raise HTTPException(status_code=403, detail="密码错误")
+
+
 @app.put("/api/settings", response_model=AppSettings)
 def update_settings(req: UpdateSettingsRequest):
     # 注意：允许前端传入完整设置；若前端传***，不覆盖旧密钥
     old = load_settings()
 
-    password = (req.password or "").strip()
-    if not (password.isdigit() and len(password) == 4):
-        raise HTTPException(status_code=400, detail="密码必须为4位数字")
-    if password != old.security.admin_password:
-        raise HTTPException(status_code=403, detail="密码错误")
+    _check_admin_password(req.password, old)
 
     new_settings = req.settings
     # 若提示词为空，填充为默认值，避免出现空白
@@ -429,6 +391,10 @@ def update_settings(req: UpdateSettingsRequest):
         new_settings.ai.api_key = old.ai.api_key
     if new_settings.telegram.bot_token == "***":
         new_settings.telegram.bot_token = old.telegram.bot_token
+    old_tokens = {d.name: d.bot_token for d in old.destinations}
+    for dest in new_settings.destinations:
+        if dest.bot_token == "***":
+            dest.bot_token = old_tokens.get(dest.name, "")
 
     if not (new_settings.ai.system_prompt and new_settings.ai.system_prompt.strip()):
         new_settings.ai.system_prompt = defaults.ai.system_prompt
@@ -442,6 +408,15 @@ def update_settings(req: UpdateSettingsRequest):
         new_settings.reports.report_timeout_seconds = defaults.reports.report_timeout_seconds
     if new_settings.security is None:
         new_settings.security = defaults.security
+    names = set()
+    for item in new_settings.reports.schedules:
+        if item.name in names:
+            raise HTTPException(status_code=400, detail=f"报告计划名称重复: {item.name}")
+        names.add(item.name)
+        try:
+            build_schedule(item)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"报告计划 {item.name} 无效: {exc}")
 
     new_password = (req.new_password or "").strip()
     if new_password:
@@ -453,25 +428,169 @@ def update_settings(req: UpdateSettingsRequest):
 
     save_settings(new_settings)
     logging.info("配置已更新")
-    # 重启调度器
-    global _scheduler
-    if _scheduler:
-        _scheduler.update_interval(new_settings.fetch.interval_minutes)
-    _configure_report_schedulers(new_settings)
+    # 重启调度器（非主节点由主节点在下次续约时感知配置变更）
+    if _elector is not None and _elector.is_leader:
+        _apply_settings(new_settings)
     return get_settings()
 
 
-@app.post("/api/fetch", response_model=FetchResponse)
-def fetch_now(req: FetchRequest):
+def _require_jobs() -> FetchJobManager:
+    if _jobs is None:
+        raise HTTPException(status_code=503, detail="抓取任务管理器未就绪")
+    return _jobs
+
+
+@app.post("/api/fetch", response_model=FetchJobResponse, status_code=202)
+async def fetch_now(req: FetchRequest):
     logging.info("手动触发抓取…")
-    result = do_fetch_once(force=req.force)
-    return result
+    job, _ = await asyncio.to_thread(_require_jobs().submit, force=req.force, source="manual")
+    return job.snapshot()
+
+
+@app.get("/api/fetch/jobs", response_model=FetchJobListResponse)
+async def list_fetch_jobs():
+    items = await asyncio.to_thread(_require_jobs().list_snapshots)
+    return FetchJobListResponse(items=items)
+
+
+@app.get("/api/fetch/jobs/{job_id}", response_model=FetchJobResponse)
+async def get_fetch_job(job_id: str):
+    snapshot = await asyncio.to_thread(_require_jobs().get_snapshot, job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return snapshot
+
+
+@app.post("/api/fetch/jobs/{job_id}/cancel", response_model=FetchJobResponse)
+async def cancel_fetch_job(job_id: str):
+    snapshot = await asyncio.to_thread(_require_jobs().cancel_snapshot, job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return snapshot
+
+
+@app.get("/api/queue", response_model=FeedQueueResponse)
+async def get_feed_queue():
+    items = await asyncio.to_thread(list_feed_queue)
+    return FeedQueueResponse(items=items)
+
+
+@app.get("/api/content-cache", response_model=ContentCacheStats)
+async def get_content_cache_stats():
+    """Extracted-content cache size and this process's hit counters."""
+    return ContentCacheStats(**await asyncio.to_thread(content_cache.stats))
+
+
+@app.get("/api/debug/profile", response_class=PlainTextResponse)
+async def api_profile(
+    seconds: float = Query(10, gt=0, le=120),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    thread: Optional[str] = None,
+    x_admin_password: Optional[str] = Header(None),
+):
+    """Sample all threads of this process; collapsed stacks for flamegraph.pl / speedscope."""
+    _check_admin_password(x_admin_password)
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000, thread)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="已有采样在进行中")
+    return PlainTextResponse(
+        format_collapsed(stacks),
+        headers={"X-Profile-Samples": str(sum(stacks.values()))},
+    )
+
+
+@app.get("/api/debug/allocations", response_model=AllocationSnapshot)
+async def api_allocations(
+    seconds: float = Query(10, ge=0, le=300),
+    limit: int = Query(30, ge=1, le=500),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    x_admin_password: Optional[str] = Header(None),
+):
+    """Top tracemalloc allocation sites (growth over ``seconds`` when tracing was off)."""
+    _check_admin_password(x_admin_password)
+    try:
+        return await asyncio.to_thread(allocation_snapshot, seconds, limit, group_by)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="已有采样在进行中")
+
+
+@app.get("/api/stream")
+async def api_stream(request: Request):
+    """Server-Sent Events: ``article`` / ``report`` / ``fetch`` (job progress).
+
+    Writes made by other worker processes are not seen by this process's
+    broker; they surface as a generic ``changed`` event when the storage
+    write version moves without a local event.
+    """
+    queue = broker.subscribe()
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            last_version = await asyncio.to_thread(write_version)
+            idle = 0.0
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=2)
+                except asyncio.TimeoutError:
+                    version = await asyncio.to_thread(write_version)
+                    if version != last_version:
+                        last_version = version
+                        yield format_sse("changed", "{}")
+                    idle += 2
+                    if idle < 15:
+                        continue
+                    idle = 0.0
+                    if await request.is_disconnected():
+                        break
+                    # 心跳，防止中间代理因空闲断开连接
+                    yield ": ping\n\n"
+                    continue
+                if event in ("article", "report"):
+                    last_version = await asyncio.to_thread(write_version)
+                yield format_sse(event, data)
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/articles", response_model=ArticleListResponse)
-def api_list_articles(limit: int = 20, offset: int = 0, feed: Optional[str] = None):
-    total, items = list_articles(limit=limit, offset=offset, feed_url=feed)
-    return ArticleListResponse(total=total, items=items)
+def api_list_articles(
+    request: Request,
+    limit: int = 20,
+    offset: int = 0,
+    feed: Optional[str] = None,
+    fields: Optional[str] = None,
+    summary_chars: Optional[int] = Query(None, ge=0),
+):
+    if fields is None and summary_chars is None:
+
+        def build():
+            total, items = list_articles(limit=limit, offset=offset, feed_url=feed)
+            return ArticleListResponse(total=total, items=items)
+
+        return _page_cache.respond(request, ("articles", limit, offset, feed), build)
+
+    # 投影模式：只取所需列，摘要可截断，行直接编码为 JSON，不经过 Pydantic
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(ARTICLE_FIELDS)
+    unknown = [f for f in selected if f not in ARTICLE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(unknown)}")
+
+    def build_projection():
+        total, items = list_article_rows(
+            limit=limit, offset=offset, feed_url=feed, fields=selected, summary_chars=summary_chars
+        )
+        return dumps_json({"total": total, "items": items})
+
+    key = ("articles", limit, offset, feed, tuple(selected), summary_chars)
+    return _page_cache.respond(request, key, build_projection)
 
 
 @app.get("/api/articles/{article_id}", response_model=ArticleInDB)
@@ -482,17 +601,63 @@ def api_get_article(article_id: int):
     return item
 
 
+@app.get("/api/archive", response_model=ArchiveListResponse)
+def api_list_archive():
+    return ArchiveListResponse(items=list_archive_months())
+
+
+@app.get("/api/archive/{month}/articles", response_model=ArticleListResponse)
+def api_search_archive(
+    month: str,
+    limit: int = 20,
+    offset: int = 0,
+    feed: Optional[str] = None,
+    q: Optional[str] = None,
+):
+    if not re.fullmatch(r"\d{4}-\d{2}", month):
+        raise HTTPException(status_code=400, detail="月份格式应为 YYYY-MM")
+    total, items = search_month(month, limit=limit, offset=offset, feed_url=feed, keyword=q)
+    return ArticleListResponse(total=total, items=items)
+
+
 @app.get("/api/reports", response_model=ReportListResponse)
-def api_list_reports(limit: int = 10, offset: int = 0, report_type: Optional[str] = None):
-    total, items = list_reports(limit=limit, offset=offset, report_type=report_type)
-    return ReportListResponse(total=total, items=items)
+def api_list_reports(request: Request, limit: int = 10, offset: int = 0, report_type: Optional[str] = None):
+    def build():
+        total, items = list_reports(limit=limit, offset=offset, report_type=report_type)
+        return ReportListResponse(total=total, items=items)
+
+    return _page_cache.respond(request, ("reports", limit, offset, report_type), build)
+
+
+@app.get("/api/reports/schedules", response_model=List[ReportScheduleInfo])
+def api_report_schedules():
+    settings = load_settings()
+    enabled = report_schedules(settings, enabled_only=True)
+    next_runs = _timers.next_runs() if _timers is not None else {}
+    items = []
+    for name, schedule in report_schedules(settings).items():
+        next_run = next_runs.get(_report_job(name))
+        items.append(
+            ReportScheduleInfo(
+                name=name,
+                label=schedule.label,
+                cron=schedule.cron.expr,
+                timezone=schedule.timezone_name,
+                enabled=name in enabled,
+                next_run=next_run.strftime("%Y-%m-%dT%H:%M:%SZ") if next_run else None,
+            )
+        )
+    return items
 
 
 @app.post("/api/reports/generate", response_model=ReportInDB)
 def api_generate_report(req: ReportGenerateRequest):
     settings = load_settings()
     report_type = req.report_type
-    start_utc, end_utc = _manual_report_timeframe(report_type)
+    schedule = report_schedules(settings).get(report_type)
+    if schedule is None:
+        raise HTTPException(status_code=400, detail=f"未知的报告类型：{report_type}")
+    start_utc, end_utc = _manual_report_timeframe(schedule)
     ai = _build_ai_client(settings)
     tg = _build_telegram_client(settings)
     report_id = run_report(
@@ -511,10 +676,47 @@ def api_generate_report(req: ReportGenerateRequest):
     return report
 
 
+@app.post("/api/reports/backfill", response_model=ReportBackfillResponse)
+def api_backfill_reports(req: ReportBackfillRequest, x_admin_password: Optional[str] = Header(None)):
+    """Generate reports for missed windows; ``dry_run`` only lists them with token estimates."""
+    settings = load_settings()
+    _check_admin_password(x_admin_password, settings)
+    # 请求中的预算只能收紧配置的 backfill_token_budget（0 表示不限），不能放宽
+    budget = settings.reports.backfill_token_budget
+    if req.token_budget and (budget == 0 or req.token_budget < budget):
+        budget = req.token_budget
+    try:
+        return run_backfill(
+            settings,
+            _build_ai_client(settings),
+            report_types=req.report_types,
+            hours=req.hours,
+            days=req.days,
+            token_budget=budget,
+            dry_run=req.dry_run,
+        )
+    except BackfillBusy:
+        raise HTTPException(status_code=409, detail="已有补齐报告任务在运行")
+
+
 def run():
     settings = load_settings()
-    uvicorn.run("app.main:app", host=settings.server.host, port=settings.server.port, reload=False)
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server.host,
+        port=settings.server.port,
+        workers=max(1, settings.server.workers),
+        reload=False,
+    )
 
 
 if __name__ == "__main__":
-    run()
+    import sys
+
+    if sys.argv[1:2] == ["worker"]:
+        from .worker import run_worker
+
+        _setup_logging()
+        run_worker()
+    else:
+        run()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from pydantic import BaseModel, Field, HttpUrl
 
 
@@ -8,14 +8,26 @@ class HealthResponse(BaseModel):
     status: str = "ok"
 
 
+class ReadinessResponse(BaseModel):
+    ready: bool
+    checks: Dict[str, bool] = Field(default_factory=dict)
+    startup_seconds: Optional[float] = None
+    leader: bool = False
+
+
 class SettingsFetch(BaseModel):
     interval_minutes: int = Field(10, ge=1, le=24 * 60)
+    # 每轮抓取随机延后 0~N 秒，避免多个实例同时请求源站
+    jitter_seconds: int = Field(0, ge=0, le=600)
     max_items: int = Field(500, ge=10, le=50000)
     feeds: List[str] = Field(default_factory=list)
     filter_keywords: List[str] = Field(default_factory=list)
     use_article_page: bool = True
     article_timeout_seconds: int = Field(15, ge=5, le=60)
     per_feed_limit: int = Field(20, ge=1, le=1000)
+    feed_concurrency: int = Field(4, ge=1, le=32)
+    ai_concurrency: int = Field(4, ge=1, le=32)
+    queue_size: int = Field(32, ge=1, le=1000)
 
 
 class SettingsAI(BaseModel):
@@ -45,12 +57,58 @@ class SettingsTelegram(BaseModel):
     bot_token: str = ""
     chat_id: str = ""
     push_summary: bool = False
+    api_base: str = "https://api.telegram.org"
+    rate_per_minute: int = Field(0, ge=0, le=600)  # 每分钟最多推送的消息数，0 表示不限速
+    # article：每篇一条消息；digest：缓冲后合并为接近 4096 字符的少量消息
+    mode: Literal["article", "digest"] = "article"
+    digest_window_seconds: int = Field(300, ge=0, le=86400)  # 0 表示每轮抓取结束时发送
+    digest_max_articles: int = Field(50, ge=1, le=1000)
+
+
+class SettingsDestination(BaseModel):
+    name: str = Field(..., pattern=r"^[A-Za-z0-9_-]{1,64}$")
+    type: Literal["telegram", "webhook", "file"] = "telegram"
+    enabled: bool = True
+    chat_id: str = ""  # telegram
+    bot_token: str = ""  # telegram，留空时使用 telegram.bot_token
+    url: str = ""  # webhook，以 JSON POST 投递
+    path: str = ""  # file，按 JSON Lines 追加写入
+    # 过滤规则：命中任一 include_keywords（留空表示不限），且不含 exclude_keywords
+    include_keywords: List[str] = Field(default_factory=list)
+    exclude_keywords: List[str] = Field(default_factory=list)
+    feeds: List[str] = Field(default_factory=list)  # 只投递这些源，留空表示全部
+    only_matched: bool = True  # 只投递命中 fetch.filter_keywords 的文章
+    batch_size: int = Field(1, ge=1, le=100)  # 每条消息/每次请求合并的文章数
+    rate_per_minute: int = Field(0, ge=0, le=600)  # 0 表示不限速
+    mode: Literal["article", "digest"] = "article"  # digest 模式下忽略 batch_size
+    digest_window_seconds: int = Field(300, ge=0, le=86400)
+    digest_max_articles: int = Field(50, ge=1, le=1000)
+
+
+class SettingsReportSchedule(BaseModel):
+    name: str = Field(..., pattern=r"^[a-z0-9_-]{1,32}$")
+    label: str = ""  # 显示名称，如“周报”；留空时使用 name
+    cron: str = "0 9 * * 1"
+    timezone: str = "Asia/Shanghai"
+    enabled: bool = True
+    # 留空时使用 reports 中的提示词
+    system_prompt: str = ""
+    user_prompt_template: str = ""
+    push_telegram: bool = True
 
 
 class SettingsReports(BaseModel):
     daily_enabled: bool = False
     hourly_enabled: bool = False
     report_timeout_seconds: int = Field(60, ge=10, le=300)
+    # 启动时补齐停机期间漏掉的报告
+    backfill_enabled: bool = False  # 开启后启动时自动补齐；默认关闭，避免升级后未经确认就批量调用 AI
+    backfill_hours: int = Field(48, ge=0, le=24 * 31)
+    backfill_days: int = Field(7, ge=0, le=366)
+    backfill_concurrency: int = Field(2, ge=1, le=16)
+    backfill_token_budget: int = Field(200000, ge=0)
+    # 小时报、日报之外的自定义报告计划
+    schedules: List[SettingsReportSchedule] = []
     system_prompt: str = (
         "你是一名资深中文资讯编辑，需要汇总给定时间范围内的RSS内容。"
         "请输出结构化的纯文本报告，包含以下部分：\n"
@@ -72,6 +130,27 @@ class SettingsReports(BaseModel):
     )
 
 
+class SettingsQueue(BaseModel):
+    enabled: bool = False
+    visibility_timeout_seconds: int = Field(300, ge=30, le=3600)
+    max_attempts: int = Field(3, ge=1, le=20)
+    retry_delay_seconds: int = Field(60, ge=1, le=3600)
+    poll_interval_seconds: int = Field(5, ge=1, le=300)
+    worker_concurrency: int = Field(2, ge=1, le=32)
+
+
+class SettingsArchive(BaseModel):
+    enabled: bool = False
+    after_days: int = Field(30, ge=1, le=3650)
+    format: Literal["gzip", "zstd"] = "gzip"
+
+
+class SettingsContentCache(BaseModel):
+    enabled: bool = True
+    ttl_hours: int = Field(72, ge=1, le=24 * 365)
+    max_mb: int = Field(64, ge=1, le=10240)
+
+
 class SettingsLogging(BaseModel):
     level: str = "INFO"
     file: str = "logs/app.log"
@@ -80,6 +159,8 @@ class SettingsLogging(BaseModel):
 class ServerSettings(BaseModel):
     host: str = "0.0.0.0"
     port: int = 3601
+    workers: int = Field(1, ge=1, le=64)
+    leader_lease_seconds: int = Field(30, ge=5, le=600)
 
 
 class SettingsSecurity(BaseModel):
@@ -91,7 +172,12 @@ class AppSettings(BaseModel):
     fetch: SettingsFetch = SettingsFetch()
     ai: SettingsAI = SettingsAI()
     telegram: SettingsTelegram = SettingsTelegram()
+    # 文章投递目标；telegram.chat_id 仍作为默认目标
+    destinations: List[SettingsDestination] = Field(default_factory=list)
     reports: SettingsReports = SettingsReports()
+    queue: SettingsQueue = SettingsQueue()
+    archive: SettingsArchive = SettingsArchive()
+    content_cache: SettingsContentCache = SettingsContentCache()
     logging: SettingsLogging = SettingsLogging()
     security: SettingsSecurity = SettingsSecurity()
 
@@ -125,6 +211,47 @@ class ArticleListResponse(BaseModel):
     items: List[ArticleInDB]
 
 
+class ArchiveMonth(BaseModel):
+    month: str
+    file: str
+    count: int
+    feeds: Dict[str, int] = Field(default_factory=dict)
+
+
+class ArchiveListResponse(BaseModel):
+    items: List[ArchiveMonth]
+
+
+class ContentCacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    ttl_seconds: int
+    hits: int = 0
+    shared: int = 0
+    revalidated: int = 0
+    stale: int = 0
+    misses: int = 0
+    evictions: int = 0
+    hit_rate: float = 0.0
+
+
+class AllocationStat(BaseModel):
+    location: List[str]
+    size_kib: float
+    count: int
+    size_diff_kib: float = 0.0
+    count_diff: int = 0
+
+
+class AllocationSnapshot(BaseModel):
+    seconds: float
+    group_by: str
+    traced_current_kib: float
+    traced_peak_kib: float
+    items: List[AllocationStat]
+
+
 class ReportInDB(BaseModel):
     id: int
     report_type: str
@@ -143,6 +270,7 @@ class ReportCreate(BaseModel):
     timeframe_start: str
     timeframe_end: str
     article_count: int
+    input_fingerprint: Optional[str] = None
 
 
 class ReportListResponse(BaseModel):
@@ -151,7 +279,43 @@ class ReportListResponse(BaseModel):
 
 
 class ReportGenerateRequest(BaseModel):
-    report_type: Literal["daily", "hourly"]
+    report_type: str
+
+
+class ReportScheduleInfo(BaseModel):
+    name: str
+    label: str
+    cron: str
+    timezone: str
+    enabled: bool
+    next_run: Optional[str] = None
+
+
+class ReportBackfillRequest(BaseModel):
+    report_types: Optional[List[str]] = None
+    hours: Optional[int] = Field(None, ge=0, le=24 * 31)
+    days: Optional[int] = Field(None, ge=0, le=366)
+    token_budget: Optional[int] = Field(None, ge=0)
+    dry_run: bool = False
+
+
+class ReportBackfillWindow(BaseModel):
+    report_type: str
+    timeframe_start: str
+    timeframe_end: str
+    article_count: int
+    estimated_tokens: int
+    # planned / generated / over_budget / failed
+    status: str
+    report_id: Optional[int] = None
+    # 由更短周期的报告汇总而成时为其类型
+    source_report_type: Optional[str] = None
+
+
+class ReportBackfillResponse(BaseModel):
+    windows: List[ReportBackfillWindow]
+    token_budget: int
+    estimated_tokens: int
 
 
 class FetchRequest(BaseModel):
@@ -163,6 +327,48 @@ class FetchResponse(BaseModel):
     new_items: int
     processed_items: int
     message: str = ""
+    failed_feeds: List[str] = Field(default_factory=list)
+
+
+class FetchJobProgress(BaseModel):
+    feeds_total: int = 0
+    feeds_done: int = 0
+    processed_items: int = 0
+    new_items: int = 0
+
+
+class FetchJobResponse(BaseModel):
+    job_id: str
+    status: Literal["pending", "running", "succeeded", "failed", "cancelled"]
+    force: bool = False
+    source: str = "manual"
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    message: str = ""
+    coalesced: int = 0
+    progress: FetchJobProgress = FetchJobProgress()
+    result: Optional[FetchResponse] = None
+
+
+class FetchJobListResponse(BaseModel):
+    items: List[FetchJobResponse]
+
+
+class FeedQueueItem(BaseModel):
+    feed_url: str
+    force: bool = False
+    status: str
+    attempts: int = 0
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    available_at: float
+    last_error: Optional[str] = None
+    updated_at: float
+
+
+class FeedQueueResponse(BaseModel):
+    items: List[FeedQueueItem]
 
 
 class UpdateSettingsRequest(BaseModel):
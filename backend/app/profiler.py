@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 同一时间只允许一个采样，避免多个请求叠加开销
+_busy = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already being collected."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename
+    if path.startswith(_BACKEND_DIR):
+        path = os.path.relpath(path, _BACKEND_DIR)
+    else:
+        marker = "site-packages" + os.sep
+        idx = path.rfind(marker)
+        path = path[idx + len(marker):] if idx >= 0 else os.path.basename(path)
+    # collapsed 格式以分号分隔栈帧
+    return f"{code.co_name} ({path}:{frame.f_lineno})".replace(";", ":")
+
+
+def sample_stacks(seconds: float, interval: float = 0.01, thread_filter: Optional[str] = None) -> Counter:
+    """Sample every thread's Python stack for ``seconds``; returns collapsed stack -> sample count.
+
+    Stacks are rooted at the thread name, so the output of :func:`format_collapsed`
+    can be fed straight to flamegraph.pl / speedscope. Only the sampling thread
+    itself is skipped; threads blocked in waits show up as such (wall-clock profile).
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        stacks: Counter = Counter()
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while True:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                name = names.get(ident, f"thread-{ident}")
+                if thread_filter and thread_filter not in name:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(name.replace(";", ":").replace(" ", "_"))
+                stacks[";".join(reversed(labels))] += 1
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(interval)
+        return stacks
+    finally:
+        _busy.release()
+
+
+def format_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def allocation_snapshot(seconds: float, limit: int = 30, group_by: str = "lineno", frames: int = 10) -> dict:
+    """Top allocation sites via tracemalloc.
+
+    If tracing is off it is switched on for ``seconds`` and the growth over
+    that window is reported, then switched off again. If it was already on
+    (e.g. ``PYTHONTRACEMALLOC``), ``seconds=0`` reports everything traced so far.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy()
+    started = False
+    try:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            started = True
+        before = tracemalloc.take_snapshot() if seconds > 0 else None
+        if seconds > 0:
+            time.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ]
+        after = after.filter_traces(filters)
+        if before is not None:
+            stats = after.compare_to(before.filter_traces(filters), group_by)
+        else:
+            stats = after.statistics(group_by)
+        items: List[dict] = []
+        for stat in stats[:limit]:
+            items.append(
+                {
+                    "location": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+                    "size_kib": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                    "size_diff_kib": round(getattr(stat, "size_diff", 0) / 1024, 1),
+                    "count_diff": getattr(stat, "count_diff", 0),
+                }
+            )
+        return {
+            "seconds": seconds,
+            "group_by": group_by,
+            "traced_current_kib": round(current / 1024, 1),
+            "traced_peak_kib": round(peak / 1024, 1),
+            "items": items,
+        }
+    finally:
+        if started:
+            tracemalloc.stop()
+        _busy.release()
@@ -1,33 +1,111 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 from collections import Counter
-from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
 from html import escape
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from .ai_client import AIClient
-from .models import AppSettings, ReportCreate, SettingsReports
-from .storage import insert_report, list_articles_in_range
+from .cron import CronExpr
+from .models import AppSettings, ReportCreate, ReportInDB, SettingsReportSchedule, SettingsReports
+from .archive import articles_in_range
+from .storage import insert_report, report_fingerprint
 from .telegram_client import TelegramClient
 
 
 UTC = timezone.utc
 BEIJING_TZ = timezone(timedelta(hours=8))
+# 预估报告输出的 token 数
+_COMPLETION_TOKENS = 1000
 
 
-def _floor_to_hour(dt: datetime) -> datetime:
-    return dt.replace(minute=0, second=0, microsecond=0)
+@dataclass(frozen=True)
+class ReportSchedule:
+    """One report type: its cron schedule, timezone and optional prompt overrides.
 
+    Each run covers the window between the previous fire time and this one.
+    """
 
-def _floor_to_day(dt: datetime) -> datetime:
-    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    name: str
+    label: str
+    cron: CronExpr
+    tz: tzinfo
+    system_prompt: str = ""
+    user_prompt_template: str = ""
+    push_telegram: bool = True
 
+    @property
+    def timezone_name(self) -> str:
+        return "Asia/Shanghai" if self.tz is BEIJING_TZ else str(self.tz)
 
-def _format_range_local(start: datetime, end: datetime) -> str:
-    start_local = start.astimezone(BEIJING_TZ)
-    end_local = end.astimezone(BEIJING_TZ)
-    return f"{start_local.strftime('%Y-%m-%d %H:%M')} - {end_local.strftime('%Y-%m-%d %H:%M')} 北京时间"
+    def window_at(self, when: datetime) -> Tuple[datetime, datetime]:
+        """Latest complete window ending at or before ``when``, in UTC."""
+        end = self.cron.last_at_or_before(when.astimezone(self.tz))
+        start = self.cron.last_at_or_before(end - timedelta(minutes=1))
+        return start.astimezone(UTC), end.astimezone(UTC)
+
+    def next_run(self, now: datetime) -> datetime:
+        return self.cron.next_after(now.astimezone(self.tz)).astimezone(UTC)
+
+
+BUILTIN_SCHEDULES: Dict[str, ReportSchedule] = {
+    "hourly": ReportSchedule("hourly", "小时报", CronExpr("0 * * * *"), BEIJING_TZ),
+    "daily": ReportSchedule("daily", "日报", CronExpr("0 0 * * *"), BEIJING_TZ),
+}
+
+
+def build_schedule(cfg: SettingsReportSchedule) -> ReportSchedule:
+    """Raises ``ValueError`` for a bad cron expression or unknown timezone."""
+    if cfg.name in BUILTIN_SCHEDULES:
+        raise ValueError(f"报告计划名称与内置报告重复: {cfg.name}")
+    try:
+        tz = ZoneInfo(cfg.timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"未知的时区: {cfg.timezone}")
+    return ReportSchedule(
+        name=cfg.name,
+        label=cfg.label or cfg.name,
+        cron=CronExpr(cfg.cron),
+        tz=tz,
+        system_prompt=cfg.system_prompt,
+        user_prompt_template=cfg.user_prompt_template,
+        push_telegram=cfg.push_telegram,
+    )
+
+
+def report_schedules(settings: AppSettings, enabled_only: bool = False) -> Dict[str, ReportSchedule]:
+    """Built-in hourly/daily plus the configured custom schedules, keyed by report type."""
+    cfg = settings.reports or SettingsReports()
+    result: Dict[str, ReportSchedule] = {}
+    for name, enabled in (("hourly", cfg.hourly_enabled), ("daily", cfg.daily_enabled)):
+        if enabled or not enabled_only:
+            result[name] = BUILTIN_SCHEDULES[name]
+    for item in cfg.schedules:
+        if enabled_only and not item.enabled:
+            continue
+        if item.name in result:
+            logging.warning("报告计划重复，忽略: %s", item.name)
+            continue
+        try:
+            result[item.name] = build_schedule(item)
+        except ValueError as exc:
+            logging.warning("报告计划配置无效，忽略: %s err=%s", item.name, exc)
+    return result
+
+
+def _tz_label(tz: tzinfo) -> str:
+    return "北京时间" if tz is BEIJING_TZ else str(tz)
+
+
+def _format_range_local(start: datetime, end: datetime, tz: tzinfo = BEIJING_TZ) -> str:
+    start_local = start.astimezone(tz)
+    end_local = end.astimezone(tz)
+    return f"{start_local.strftime('%Y-%m-%d %H:%M')} - {end_local.strftime('%Y-%m-%d %H:%M')} {_tz_label(tz)}"
 
 
 def _fallback_report_summary(
@@ -64,6 +142,62 @@ def _build_article_lines(articles: list, max_items: int) -> list[str]:
     return lines
 
 
+def _input_fingerprint(
+    report_type: str,
+    timeframe_start: str,
+    timeframe_end: str,
+    articles: list,
+    ai_client: Optional[AIClient],
+    system_prompt: str,
+    user_prompt_template: str,
+    source_reports: Optional[List[ReportInDB]] = None,
+) -> str:
+    """Hash of everything the report text depends on: window, articles, model and prompts."""
+    payload = {
+        "report_type": report_type,
+        "timeframe": [timeframe_start, timeframe_end],
+        # 摘要重新生成后内容会变，因此连同标题与摘要一起计入
+        "articles": sorted([a.id, a.title, a.summary_text] for a in articles),
+        "model": [ai_client.base_url, ai_client.model, ai_client.temperature] if ai_client is not None else None,
+        "system_prompt": system_prompt,
+        "user_prompt_template": user_prompt_template,
+    }
+    if source_reports is not None:
+        payload["source_reports"] = [[r.id, r.summary_text] for r in source_reports]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _estimate_tokens(text: str) -> int:
+    # 中文约 1-2 字符一个 token，英文约 4 字符，按 2 字符估算偏保守
+    return len(text) // 2 + 1
+
+
+def estimate_report_tokens(
+    settings: AppSettings,
+    articles: list,
+    source_reports: Optional[List[ReportInDB]] = None,
+) -> int:
+    """Rough token cost of one AI report call over ``articles`` (or the shorter ``source_reports``)."""
+    report_cfg = settings.reports or SettingsReports()
+    if source_reports is not None:
+        body = sum(_estimate_tokens(r.summary_text) for r in source_reports)
+    else:
+        body = sum(_estimate_tokens(a.title) + _estimate_tokens(a.summary_text) + 30 for a in articles)
+    prompts = _estimate_tokens(report_cfg.system_prompt) + _estimate_tokens(report_cfg.user_prompt_template)
+    return body + prompts + _COMPLETION_TOKENS
+
+
+def _source_report_details(source_reports: List[ReportInDB]) -> str:
+    blocks = []
+    for report in source_reports:
+        span = _format_range_local(
+            datetime.fromisoformat(report.timeframe_start.replace("Z", "+00:00")),
+            datetime.fromisoformat(report.timeframe_end.replace("Z", "+00:00")),
+        )
+        blocks.append(f"【{span}，{report.article_count} 篇】\n{report.summary_text}")
+    return "以下为该时间段内各分时段报告（已汇总全部文章）：\n\n" + "\n\n".join(blocks)
+
+
 def generate_report(
     report_type: str,
     *,
@@ -72,14 +206,20 @@ def generate_report(
     telegram_client: Optional[TelegramClient],
     start_override: Optional[datetime] = None,
     end_override: Optional[datetime] = None,
+    articles: Optional[list] = None,
+    source_reports: Optional[List[ReportInDB]] = None,
 ) -> Optional[int]:
-    label_map = {"daily": "日报", "hourly": "小时报"}
-    label = label_map.get(report_type)
-    if not label:
+    """Generate and store the report for one window; returns its id.
+
+    ``articles`` may be passed when the caller already loaded the window.
+    With ``source_reports`` (e.g. the hourly reports covering a day) the AI
+    summarises those instead of every article.
+    """
+    schedule = report_schedules(settings).get(report_type)
+    if schedule is None:
         logging.warning(f"未知的报告类型：{report_type}")
         return None
-
-    delta_default = timedelta(days=1) if report_type == "daily" else timedelta(hours=1)
+    label = schedule.label
 
     if start_override and end_override:
         start = start_override.astimezone(UTC)
@@ -88,34 +228,29 @@ def generate_report(
         logging.warning("报告生成参数不完整，缺少开始或结束时间")
         return None
     else:
-        now_local = datetime.now(BEIJING_TZ)
-        if report_type == "daily":
-            end_local = _floor_to_day(now_local)
-        else:
-            end_local = _floor_to_hour(now_local)
-        start_local = end_local - delta_default
-        start = start_local.astimezone(UTC)
-        end = end_local.astimezone(UTC)
+        start, end = schedule.window_at(datetime.now(UTC))
 
     if end <= start:
         logging.debug("报告时间范围非法，跳过")
         return None
 
-    articles = list_articles_in_range(start, end)
+    if articles is None:
+        articles = articles_in_range(start, end)
     article_count = len(articles)
 
-    timeframe_display = _format_range_local(start, end)
+    timeframe_display = _format_range_local(start, end, schedule.tz)
     feed_counts = Counter(a.feed_url for a in articles)
-    max_fallback_items = 50 if report_type == "daily" else 30
+    max_fallback_items = 50 if end - start >= timedelta(days=1) else 30
     article_lines = _build_article_lines(articles, max_fallback_items)
 
-    start_local = start.astimezone(BEIJING_TZ)
-    end_local = end.astimezone(BEIJING_TZ)
-    report_title = (
-        f"RSS-AI 每日汇总（{start_local.strftime('%Y-%m-%d')}）"
-        if report_type == "daily"
-        else f"RSS-AI 小时汇总（{start_local.strftime('%Y-%m-%d %H:%M')} - {end_local.strftime('%H:%M')}）"
-    )
+    start_local = start.astimezone(schedule.tz)
+    end_local = end.astimezone(schedule.tz)
+    if report_type == "daily":
+        report_title = f"RSS-AI 每日汇总（{start_local.strftime('%Y-%m-%d')}）"
+    elif report_type == "hourly":
+        report_title = f"RSS-AI 小时汇总（{start_local.strftime('%Y-%m-%d %H:%M')} - {end_local.strftime('%H:%M')}）"
+    else:
+        report_title = f"RSS-AI {label}（{start_local.strftime('%Y-%m-%d %H:%M')} - {end_local.strftime('%Y-%m-%d %H:%M')}）"
 
     summary_text: Optional[str] = None
     report_defaults = SettingsReports()
@@ -123,19 +258,42 @@ def generate_report(
 
     timeout_seconds = report_cfg.report_timeout_seconds or report_defaults.report_timeout_seconds
     timeout_seconds = max(10, min(timeout_seconds, 300))
+    # 自定义计划可覆盖提示词，留空时沿用 reports 的设置
+    system_prompt = schedule.system_prompt or report_cfg.system_prompt or report_defaults.system_prompt
+    template = schedule.user_prompt_template or report_cfg.user_prompt_template or report_defaults.user_prompt_template
+
+    timeframe_start_str = start.strftime("%Y-%m-%dT%H:%M:%SZ")
+    timeframe_end_str = end.strftime("%Y-%m-%dT%H:%M:%SZ")
+    fingerprint = _input_fingerprint(
+        report_type,
+        timeframe_start_str,
+        timeframe_end_str,
+        articles,
+        ai_client,
+        system_prompt,
+        template,
+        source_reports,
+    )
+    existing = report_fingerprint(report_type, timeframe_start_str, timeframe_end_str)
+    if existing is not None and existing[1] == fingerprint:
+        # 文章、提示词与模型均未变化，沿用已有报告，不再调用 AI 与推送
+        logging.info(f"{label}输入未变化，跳过生成：时间段 {timeframe_display}，ID={existing[0]}")
+        return existing[0]
 
+    ai_failed = False
     if ai_client is not None and article_count > 0:
-        system_prompt = report_cfg.system_prompt or report_defaults.system_prompt
-        article_details = []
-        for idx, article in enumerate(articles, start=1):
-            article_details.append(
-                f"{idx}. 标题：{article.title}\n   来源：{article.feed_url}\n   发布时间：{article.pub_date or article.created_at}\n   摘要：{article.summary_text}"
-            )
         feed_stats = "\n".join(
             f"- {feed}: {count} 篇" for feed, count in feed_counts.most_common()
         ) or "- （无文章）"
-        article_details_block = "\n".join(article_details) or "(无文章)"
-        template = report_cfg.user_prompt_template or report_defaults.user_prompt_template
+        if source_reports:
+            article_details_block = _source_report_details(source_reports)
+        else:
+            article_details = []
+            for idx, article in enumerate(articles, start=1):
+                article_details.append(
+                    f"{idx}. 标题：{article.title}\n   来源：{article.feed_url}\n   发布时间：{article.pub_date or article.created_at}\n   摘要：{article.summary_text}"
+                )
+            article_details_block = "\n".join(article_details) or "(无文章)"
         try:
             user_prompt = template.format(
                 label=label,
@@ -166,6 +324,7 @@ def generate_report(
             summary_text = None
 
     if not summary_text:
+        ai_failed = ai_client is not None and article_count > 0
         summary_text = _fallback_report_summary(
             label=label,
             timeframe_display=timeframe_display,
@@ -174,9 +333,6 @@ def generate_report(
             article_lines=article_lines,
         )
 
-    timeframe_start_str = start.strftime("%Y-%m-%dT%H:%M:%SZ")
-    timeframe_end_str = end.strftime("%Y-%m-%dT%H:%M:%SZ")
-
     report = ReportCreate(
         report_type=report_type,
         title=report_title,
@@ -184,13 +340,15 @@ def generate_report(
         timeframe_start=timeframe_start_str,
         timeframe_end=timeframe_end_str,
         article_count=article_count,
+        # AI 失败时的降级报告不记录指纹，下次仍会重试
+        input_fingerprint=None if ai_failed else fingerprint,
     )
     report_id = insert_report(report)
     logging.info(
         f"生成{label}完成：时间段 {timeframe_display}，文章 {article_count} 篇，ID={report_id}"
     )
 
-    if telegram_client is not None and settings.telegram.enabled:
+    if telegram_client is not None and settings.telegram.enabled and schedule.push_telegram:
         header = f"RSS-AI {label}"
         body_lines = [
             header,
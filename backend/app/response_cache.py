@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Union
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from .storage import write_version
+
+try:  # 可选依赖，未安装时回退到标准库 json
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Encode plain dicts/lists straight to JSON bytes, bypassing Pydantic."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CachedResponse:
+    __slots__ = ("version", "body", "etag")
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class ResponseCache:
+    """Serialized JSON pages keyed by route + query, valid for one write version.
+
+    Any insert/prune/report upsert bumps ``storage.write_version()``, which
+    makes every cached page stale at once without explicit invalidation.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: int, body: bytes) -> CachedResponse:
+        entry = CachedResponse(version, body)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def respond(self, request: Request, key: Hashable, build: Callable[[], Union[BaseModel, bytes]]) -> Response:
+        """Serve ``key`` from cache (304 on matching If-None-Match) or build it.
+
+        ``build`` returns either a model or already-encoded JSON bytes.
+        """
+        version = write_version()
+        entry = self.get(key, version)
+        if entry is None:
+            body = build()
+            if isinstance(body, BaseModel):
+                body = body.model_dump_json().encode("utf-8")
+            entry = self.put(key, version, body)
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip() == etag for tag in header.split(","))
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
+import io
 import logging
-from typing import List, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterator, List, Optional
 import time
 import calendar
+from xml.etree import ElementTree
 
-import feedparser
 import httpx
 
 
@@ -54,23 +58,55 @@ class RSSItem:
         self.sort_ts: int = ts
 
 
-def fetch_feed(feed_url: str) -> List[RSSItem]:
+_FEED_HEADERS = {
+    "User-Agent": "RSS-AI/1.0 (+https://github.com/)",
+    "Accept": "application/rss+xml, application/atom+xml, application/xml, text/xml;q=0.9, */*;q=0.8",
+}
+
+
+def fetch_feed(feed_url: str, limit: Optional[int] = None) -> List[RSSItem]:
     """Fetch RSS/Atom feed with httpx first (for better diagnostics),
     then parse with feedparser. Fallback to feedparser direct on failure.
     """
     content: Optional[bytes] = None
     try:
-        headers = {
-            "User-Agent": "RSS-AI/1.0 (+https://github.com/)",
-            "Accept": "application/rss+xml, application/atom+xml, application/xml, text/xml;q=0.9, */*;q=0.8",
-        }
         with httpx.Client(timeout=15.0) as client:
-            resp = client.get(feed_url, headers=headers)
+            resp = client.get(feed_url, headers=_FEED_HEADERS)
             resp.raise_for_status()
             content = resp.content
             logging.debug(f"获取RSS成功 {feed_url} status={resp.status_code} bytes={len(content)}")
     except Exception as e:
         logging.warning(f"HTTP获取RSS失败，将直接解析URL: {feed_url} err={e}")
+    return parse_feed(feed_url, content, limit)
+
+
+async def fetch_feed_async(feed_url: str, client: httpx.AsyncClient, limit: Optional[int] = None) -> List[RSSItem]:
+    """Async variant of :func:`fetch_feed`; parsing runs in a worker thread."""
+    content: Optional[bytes] = None
+    try:
+        resp = await client.get(feed_url, headers=_FEED_HEADERS, timeout=15.0)
+        resp.raise_for_status()
+        content = resp.content
+        logging.debug(f"获取RSS成功 {feed_url} status={resp.status_code} bytes={len(content)}")
+    except Exception as e:
+        logging.warning(f"HTTP获取RSS失败，将直接解析URL: {feed_url} err={e}")
+    return await asyncio.to_thread(parse_feed, feed_url, content, limit)
+
+
+def parse_feed(feed_url: str, content: Optional[bytes], limit: Optional[int] = None) -> List[RSSItem]:
+    """Parse feed ``content`` (or fetch ``feed_url`` via feedparser when None).
+
+    Well-formed RSS 2.0 / Atom goes through :func:`parse_feed_fast`; anything
+    it cannot handle falls back to feedparser. ``limit`` lets the fast path
+    stop early once it has the newest ``limit`` entries.
+    """
+    if content is not None:
+        items = parse_feed_fast(feed_url, content, limit)
+        if items is not None:
+            logging.info(f"RSS结果 {feed_url}: 共 {len(items)} 条")
+            return items
+    # feedparser 导入较重，且快速解析覆盖了大多数源，用到时再导入
+    import feedparser
 
     try:
         parsed = feedparser.parse(content if content is not None else feed_url)
@@ -91,3 +127,148 @@ def fetch_feed(feed_url: str) -> List[RSSItem]:
             continue
     logging.info(f"RSS结果 {feed_url}: 共 {len(items)} 条")
     return items
+
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+_DC_CREATOR = "{http://purl.org/dc/elements/1.1/}creator"
+_DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+
+
+class _FastPathUnsupported(Exception):
+    """The document needs feedparser (unknown format, malformed XML or odd dates)."""
+
+
+def parse_feed_fast(feed_url: str, content: bytes, limit: Optional[int] = None) -> Optional[List[RSSItem]]:
+    """Streaming parser for well-formed RSS 2.0 and Atom that only extracts what RSSItem reads.
+
+    Returns None when the document should go through feedparser instead.
+    While entries arrive newest-first, parsing stops after ``limit`` of
+    them; an out-of-order entry disables the early stop so the caller's
+    sort still sees every entry.
+    """
+    items: List[RSSItem] = []
+    last_ts: Optional[int] = None
+    in_order = True
+    try:
+        for entry in _iter_entries(content):
+            item = RSSItem(feed_url, entry)
+            if last_ts is not None and item.sort_ts > last_ts:
+                in_order = False
+            last_ts = item.sort_ts
+            items.append(item)
+            if limit and in_order and len(items) >= limit:
+                break
+    except (_FastPathUnsupported, ElementTree.ParseError, ValueError) as e:
+        logging.debug(f"快速解析不适用，回退 feedparser: {feed_url} err={e}")
+        return None
+    return items
+
+
+def _iter_entries(content: bytes) -> Iterator[dict]:
+    events = ElementTree.iterparse(io.BytesIO(content), events=("start", "end"))
+    _, root = next(events)
+    if root.tag == "rss":
+        entry_tag, build = "item", _rss_entry
+    elif root.tag == f"{_ATOM}feed":
+        entry_tag, build = f"{_ATOM}entry", _atom_entry
+    else:
+        raise _FastPathUnsupported(root.tag)
+    for event, elem in events:
+        if event == "end" and elem.tag == entry_tag:
+            yield build(elem)
+            # 已处理的条目立即释放，避免整棵树常驻内存
+            elem.clear()
+            root.clear()
+
+
+def _text(elem, tag: str) -> str:
+    child = elem.find(tag)
+    if child is None:
+        return ""
+    return "".join(child.itertext()).strip()
+
+
+def _sanitize(value: str) -> str:
+    """The HTML sanitizing feedparser applies to entry content (strips scripts, event handlers...)."""
+    if "<" not in value:
+        return value
+    try:
+        from feedparser.sanitizer import _sanitize_html
+    except ImportError as e:  # feedparser 内部接口变化时整篇交给 feedparser 处理
+        raise _FastPathUnsupported("sanitizer") from e
+    return _sanitize_html(value, "utf-8", "text/html")
+
+
+def _html_text(elem, tag: str) -> str:
+    """Atom text construct, sanitized like feedparser; xhtml content goes to feedparser."""
+    child = elem.find(tag)
+    if child is None:
+        return ""
+    kind = child.get("type", "text")
+    if kind == "xhtml":
+        raise _FastPathUnsupported(f"xhtml {tag}")
+    value = "".join(child.itertext()).strip()
+    return _sanitize(value) if kind == "html" else value
+
+
+def _rss_entry(item) -> dict:
+    entry = {
+        "title": _text(item, "title"),
+        "link": _text(item, "link"),
+        "id": _text(item, "guid"),
+        "author": _text(item, _DC_CREATOR) or _text(item, "author"),
+    }
+    guid = item.find("guid")
+    if not entry["link"] and guid is not None and guid.get("isPermaLink", "true") != "false":
+        # 与 feedparser 一致：没有 <link> 时使用永久链接形式的 guid
+        entry["link"] = entry["id"]
+    published = _text(item, "pubDate") or _text(item, _DC_DATE)
+    if published:
+        entry["published"] = published
+        entry["published_parsed"] = _parse_date(published)
+    encoded = _sanitize(_text(item, _CONTENT_ENCODED))
+    if encoded:
+        entry["content"] = [{"value": encoded}]
+    entry["summary"] = _sanitize(_text(item, "description"))
+    return entry
+
+
+def _atom_entry(node) -> dict:
+    link = ""
+    for candidate in node.findall(f"{_ATOM}link"):
+        if candidate.get("rel", "alternate") == "alternate":
+            link = candidate.get("href", "")
+            break
+    entry = {
+        "title": _html_text(node, f"{_ATOM}title"),
+        "link": link.strip(),
+        "id": _text(node, f"{_ATOM}id"),
+        "author": _text(node, f"{_ATOM}author/{_ATOM}name"),
+    }
+    published = _text(node, f"{_ATOM}published")
+    updated = _text(node, f"{_ATOM}updated")
+    if published:
+        entry["published"] = published
+        entry["published_parsed"] = _parse_date(published)
+    if updated:
+        entry["updated"] = updated
+        entry["updated_parsed"] = _parse_date(updated)
+    content = _html_text(node, f"{_ATOM}content")
+    if content:
+        entry["content"] = [{"value": content}]
+    entry["summary"] = _html_text(node, f"{_ATOM}summary")
+    return entry
+
+
+def _parse_date(value: str) -> time.struct_time:
+    try:
+        if value[:4].isdigit() and "-" in value[:8]:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        else:
+            dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError) as e:
+        raise _FastPathUnsupported(f"date {value!r}") from e
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.utctimetuple()
@@ -1,108 +1,256 @@
 from __future__ import annotations
 
+import heapq
+import itertools
 import logging
+import random
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
+MISFIRE_POLICIES = ("run_once", "skip")
 
-class FetchScheduler:
-    def __init__(self, interval_minutes: int, task: Callable[[], None]):
-        self._interval_minutes = interval_minutes
-        self._task = task
-        self._thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
-        self._lock = threading.RLock()
-
-    def start(self):
-        with self._lock:
-            if self._thread and self._thread.is_alive():
-                return
-            self._stop_event.clear()
-            self._thread = threading.Thread(target=self._run, name="FetchScheduler", daemon=True)
-            self._thread.start()
 
-    def stop(self):
-        with self._lock:
-            self._stop_event.set()
-            if self._thread and self._thread.is_alive():
-                self._thread.join(timeout=2)
-            self._thread = None
+class _Job:
+    __slots__ = (
+        "name",
+        "task",
+        "compute_next_run",
+        "interval",
+        "jitter",
+        "misfire",
+        "misfire_grace",
+        "seq",
+        "next_run",
+        "last_finished",
+    )
 
-    def update_interval(self, interval_minutes: int):
-        with self._lock:
-            logging.info(f"更新抓取间隔为 {interval_minutes} 分钟")
-            self._interval_minutes = interval_minutes
-            # Trigger immediate cycle by setting stop and restart
-            self.stop()
-            self.start()
-
-    def _run(self):
-        logging.info("调度器已启动")
-        while not self._stop_event.is_set():
-            try:
-                self._task()
-            except Exception as e:
-                logging.exception(f"执行抓取任务时发生异常: {e}")
-            # Sleep with small steps to react to stop event quickly
-            total = max(self._interval_minutes, 1) * 60
-            for _ in range(total):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(1)
-        logging.info("调度器已停止")
-
-
-class AlignedScheduler:
     def __init__(
         self,
         name: str,
-        compute_next_run: Callable[[datetime], datetime],
         task: Callable[[], None],
+        compute_next_run: Optional[Callable[[datetime], datetime]],
+        interval: Optional[float],
+        jitter: float,
+        misfire: str,
+        misfire_grace: float,
     ):
+        if misfire not in MISFIRE_POLICIES:
+            raise ValueError(f"未知的错过策略: {misfire}")
+        self.name = name
+        self.task = task
+        self.compute_next_run = compute_next_run
+        self.interval = interval
+        self.jitter = jitter
+        self.misfire = misfire
+        self.misfire_grace = misfire_grace
+        self.seq = 0
+        self.next_run: Optional[datetime] = None
+        self.last_finished: Optional[float] = None
+
+
+class TimerService:
+    """Single timer thread for all periodic jobs, keeping next run times in a heap.
+
+    Calendar jobs (:meth:`add`) run at the times ``compute_next_run`` returns;
+    interval jobs (:meth:`every`) run ``interval`` seconds after their previous
+    run finished. Due jobs are handed to a small worker pool. A fire that is
+    late by more than ``misfire_grace`` or lands while the previous run is
+    still going is coalesced into one run (``run_once``) or dropped (``skip``).
+    """
+
+    def __init__(self, name: str = "Timers", workers: int = 4):
         self._name = name
-        self._compute_next_run = compute_next_run
-        self._task = task
+        self._workers = workers
+        self._jobs: Dict[str, _Job] = {}
+        # (运行时间, 序号, 任务名)；任务更新或移除后旧条目在出堆时丢弃
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count(1)
+        self._running: Set[str] = set()
+        # 运行期间又到期、需在结束后补跑一次的任务
+        self._pending: Set[str] = set()
+        self._cond = threading.Condition()
         self._thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
-        self._lock = threading.RLock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stopping = False
+
+    def add(
+        self,
+        name: str,
+        compute_next_run: Callable[[datetime], datetime],
+        task: Callable[[], None],
+        *,
+        jitter: float = 0.0,
+        misfire: str = "run_once",
+        misfire_grace: float = 60.0,
+    ):
+        """Add or replace calendar job ``name``; ``compute_next_run(now)`` returns the next UTC run time."""
+        job = _Job(name, task, compute_next_run, None, jitter, misfire, misfire_grace)
+        with self._cond:
+            self._jobs[name] = job
+            self._push(job, time.time())
+
+    def every(
+        self,
+        name: str,
+        interval: float,
+        task: Callable[[], None],
+        *,
+        jitter: float = 0.0,
+        misfire: str = "run_once",
+        misfire_grace: float = 60.0,
+        run_now: bool = True,
+    ):
+        """Add or replace interval job ``name``, first run now (or after one interval)."""
+        job = _Job(name, task, None, interval, jitter, misfire, misfire_grace)
+        with self._cond:
+            self._jobs[name] = job
+            now = time.time()
+            if run_now:
+                self._push_at(job, now)
+            else:
+                self._push(job, now)
+
+    def set_interval(self, name: str, interval: float, jitter: Optional[float] = None):
+        """Change an interval job's period in place; the next run counts from the previous one's end."""
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None or job.interval is None:
+                return
+            if jitter is not None:
+                job.jitter = jitter
+            if job.interval == interval:
+                return
+            logging.info(f"{name} 运行间隔调整为 {interval:g} 秒")
+            job.interval = interval
+            if name in self._running:
+                return  # 本次运行结束后按新间隔排期
+            base = job.last_finished if job.last_finished is not None else time.time()
+            self._push_at(job, max(time.time(), base + interval + self._jitter(job)))
+
+    def remove(self, name: str):
+        with self._cond:
+            self._jobs.pop(name, None)
+            self._pending.discard(name)
+            self._cond.notify()
+
+    def names(self) -> List[str]:
+        with self._cond:
+            return list(self._jobs)
+
+    def next_runs(self) -> Dict[str, Optional[datetime]]:
+        with self._cond:
+            return {name: job.next_run for name, job in self._jobs.items()}
 
     def start(self):
-        with self._lock:
+        with self._cond:
             if self._thread and self._thread.is_alive():
                 return
-            self._stop_event.clear()
+            self._stopping = False
+            self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix=f"{self._name}-task")
             self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
             self._thread.start()
 
     def stop(self):
-        with self._lock:
-            self._stop_event.set()
-            if self._thread and self._thread.is_alive():
-                self._thread.join(timeout=2)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread, pool = self._thread, self._pool
             self._thread = None
+            self._pool = None
+        if thread and thread.is_alive():
+            thread.join(timeout=2)
+        if pool:
+            # 不等待正在执行的任务（如耗时的抓取或 AI 报告）
+            pool.shutdown(wait=False)
 
-    def _run(self):
-        logging.info(f"{self._name} 调度器已启动")
+    @staticmethod
+    def _jitter(job: _Job) -> float:
+        # 随机延后，避免多个任务或多个实例在同一时刻集中触发
+        return random.uniform(0, job.jitter) if job.jitter > 0 else 0.0
+
+    def _push(self, job: _Job, now: float):
+        """Queue ``job``'s next regular run after ``now``."""
+        if job.interval is not None:
+            self._push_at(job, now + job.interval + self._jitter(job))
+            return
         try:
-            next_run = self._compute_next_run(datetime.now(timezone.utc))
+            run_at = job.compute_next_run(datetime.fromtimestamp(now, timezone.utc)).timestamp()
         except Exception:
-            logging.exception(f"{self._name} 获取下一次运行时间失败，调度器退出")
+            logging.exception(f"{job.name} 计算下一次运行时间失败，已移除")
+            self._jobs.pop(job.name, None)
+            return
+        if run_at <= now:
+            logging.error(f"{job.name} 下一次运行时间早于当前时间，已移除")
+            self._jobs.pop(job.name, None)
             return
+        self._push_at(job, run_at + self._jitter(job))
+
+    def _push_at(self, job: _Job, run_at: float):
+        job.seq = next(self._seq)
+        job.next_run = datetime.fromtimestamp(run_at, timezone.utc)
+        heapq.heappush(self._heap, (run_at, job.seq, job.name))
+        self._cond.notify()
 
-        while not self._stop_event.is_set():
-            now = datetime.now(timezone.utc)
-            wait_seconds = max((next_run - now).total_seconds(), 0)
-            if self._stop_event.wait(timeout=wait_seconds):
-                break
-            try:
-                self._task()
-            except Exception as exc:
-                logging.exception(f"{self._name} 执行任务时异常: {exc}")
-            try:
-                next_run = self._compute_next_run(datetime.now(timezone.utc))
-            except Exception:
-                logging.exception(f"{self._name} 计算下一次运行时间失败，调度器退出")
-                break
+    def _dispatch(self, job: _Job):
+        self._running.add(job.name)
+        self._pool.submit(self._execute, job)
+
+    def _execute(self, job: _Job):
+        try:
+            job.task()
+        except Exception as exc:
+            logging.exception(f"{job.name} 执行任务时异常: {exc}")
+        finally:
+            with self._cond:
+                self._running.discard(job.name)
+                job.last_finished = time.time()
+                # 运行期间任务可能已被移除或替换
+                current = self._jobs.get(job.name)
+                if current is None or self._stopping or self._pool is None:
+                    return
+                if job.name in self._pending:
+                    self._pending.discard(job.name)
+                    current.last_finished = job.last_finished
+                    logging.info(f"{job.name} 补跑运行期间错过的一次")
+                    self._dispatch(current)
+                elif current is job and job.interval is not None:
+                    self._push(job, job.last_finished)
+
+    def _run(self):
+        logging.info(f"{self._name} 调度器已启动")
+        with self._cond:
+            while not self._stopping:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                run_at, seq, name = self._heap[0]
+                job = self._jobs.get(name)
+                if job is None or job.seq != seq:
+                    heapq.heappop(self._heap)
+                    continue
+                now = time.time()
+                if run_at > now:
+                    self._cond.wait(timeout=run_at - now)
+                    continue
+                heapq.heappop(self._heap)
+                late = now - run_at
+                if name in self._running:
+                    if job.misfire == "run_once":
+                        self._pending.add(name)
+                    else:
+                        logging.warning(f"{name} 上一次运行尚未结束，跳过本次")
+                elif late > job.misfire_grace and job.misfire == "skip":
+                    logging.warning(f"{name} 错过运行时间 {late:.0f} 秒，跳过本次")
+                    if job.interval is not None:
+                        self._push(job, now)
+                else:
+                    if late > job.misfire_grace:
+                        logging.info(f"{name} 错过运行时间 {late:.0f} 秒，立即补跑一次")
+                    self._dispatch(job)
+                # 区间任务在运行结束后排期
+                if job.interval is None:
+                    self._push(job, now)
         logging.info(f"{self._name} 调度器已停止")
@@ -1,78 +1,406 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
 import sqlite3
 import threading
+import time
+import zlib
 from contextlib import contextmanager
-from datetime import datetime
-from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
 
+from .events import publish
 from .models import ArticleCreate, ArticleInDB, ReportCreate, ReportInDB
 
+try:  # 可选依赖，未安装时回退到 zlib
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
 
-DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "db.sqlite"))
+
+DB_PATH = os.path.abspath(
+    os.environ.get("RSS_AI_DB", os.path.join(os.path.dirname(__file__), "..", "data", "db.sqlite"))
+)
+# 长文本列（摘要）的压缩方式：zlib（默认）、zstd（需安装 zstandard）或 none
+COMPRESSION = os.environ.get("RSS_AI_DB_COMPRESSION", "zlib").lower()
+if COMPRESSION == "zstd" and zstandard is None:
+    logging.warning("未安装 zstandard，数据库压缩回退为 zlib")
+    COMPRESSION = "zlib"
+elif COMPRESSION not in ("zlib", "zstd", "none"):
+    COMPRESSION = "zlib"
+_COMPRESS_MIN_BYTES = 256
 _lock = threading.RLock()
+_write_version = 0
+# (本进程计数, 数据版本, 读取时间)：本进程没有写入时，短时间内复用上次读到的版本
+_version_seen: Tuple[int, int, float] = (-1, 0, 0.0)
+_VERSION_TTL = 0.5
+
+
+def write_version() -> int:
+    """Changes whenever articles or reports change, in this or any other process.
+
+    Backed by the single-row ``data_version`` table, which only article and
+    report writes bump; lease, job and watermark writes leave it alone.
+    Writes from this process are seen at once, other workers' within
+    ``_VERSION_TTL`` seconds.
+    """
+    global _version_seen
+    now = time.monotonic()
+    with _lock:
+        local, version, read_at = _version_seen
+        if local == _write_version and now - read_at < _VERSION_TTL:
+            return version
+        local = _write_version
+        with _connect() as conn:
+            row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+        version = int(row[0]) if row else 0
+        _version_seen = (local, version, now)
+        return version
+
+
+def _bump_write_version(conn: sqlite3.Connection):
+    """Bump the data version inside ``conn``'s transaction; call right before committing."""
+    global _write_version
+    conn.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+    with _lock:
+        _write_version += 1
 
 
 def init_db():
     db_dir = os.path.dirname(DB_PATH)
     os.makedirs(db_dir, exist_ok=True)
     with _connect() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                feed_url TEXT NOT NULL,
-                item_uid TEXT NOT NULL,
-                title TEXT NOT NULL,
-                link TEXT NOT NULL,
-                pub_date TEXT,
-                author TEXT,
-                summary_text TEXT NOT NULL,
-                matched_keywords TEXT,
-                created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                UNIQUE(feed_url, item_uid)
-            );
-            """
+        # WAL 允许多个 worker 进程并发读取，同时由单个进程写入
+        conn.execute("PRAGMA journal_mode=WAL")
+        _migrate(conn)
+
+
+def schema_version() -> int:
+    with _connect() as conn:
+        return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def _migrate(conn: sqlite3.Connection):
+    """Apply pending ``_MIGRATIONS`` in order, tracking progress in ``PRAGMA user_version``.
+
+    Everything runs in one ``BEGIN IMMEDIATE`` transaction, so concurrent
+    workers serialize here and the loser simply finds nothing left to do.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = int(conn.execute("PRAGMA user_version").fetchone()[0])
+        rewrote = False
+        for version, description, migration in _MIGRATIONS:
+            if version <= current:
+                continue
+            logging.info("数据库迁移 v%s: %s", version, description)
+            rewrote = bool(migration(conn)) or rewrote
+            conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if rewrote:
+        # 重建表后旧页变为空闲页，整理一次以真正缩小文件
+        conn.execute("VACUUM")
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def _rebuild_table(conn: sqlite3.Connection, table: str, ddl: str, copy_sql: str) -> bool:
+    """Recreate ``table`` from ``ddl`` (with ``{name}`` placeholder), copying rows via ``copy_sql``.
+
+    Keeps the AUTOINCREMENT sequence so deleted ids are never reused.
+    Returns whether any rows were copied.
+    """
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    last_seq = int(row[0]) if row else 0
+    had_rows = conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is not None
+    conn.execute(ddl.format(name=f"{table}_new"))
+    conn.execute(copy_sql.format(name=f"{table}_new"))
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    if last_seq:
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (last_seq, table))
+    return had_rows
+
+
+def _m001_baseline(conn: sqlite3.Connection) -> bool:
+    """Schema as it was before versioned migrations existed."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            feed_url TEXT NOT NULL,
+            item_uid TEXT NOT NULL,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            pub_date TEXT,
+            author TEXT,
+            summary_text TEXT NOT NULL,
+            matched_keywords TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            UNIQUE(feed_url, item_uid)
         )
-        conn.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_articles_created_at ON articles(created_at DESC);
-            """
+        """
+    )
+    if "matched_keywords" not in _columns(conn, "articles"):
+        conn.execute("ALTER TABLE articles ADD COLUMN matched_keywords TEXT")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_type TEXT NOT NULL,
+            title TEXT NOT NULL,
+            summary_text TEXT NOT NULL,
+            timeframe_start TEXT NOT NULL,
+            timeframe_end TEXT NOT NULL,
+            article_count INTEGER NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            UNIQUE(report_type, timeframe_start, timeframe_end)
         )
-        try:
-            conn.execute(
-                "ALTER TABLE articles ADD COLUMN matched_keywords TEXT"
-            )
-        except sqlite3.OperationalError:
-            pass
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                report_type TEXT NOT NULL,
-                title TEXT NOT NULL,
-                summary_text TEXT NOT NULL,
-                timeframe_start TEXT NOT NULL,
-                timeframe_end TEXT NOT NULL,
-                article_count INTEGER NOT NULL,
-                created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                UNIQUE(report_type, timeframe_start, timeframe_end)
-            );
-            """
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
         )
-        conn.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports(created_at DESC);
-            """
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS feed_queue (
+            feed_url TEXT PRIMARY KEY,
+            force INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            rerun INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            available_at REAL NOT NULL,
+            last_error TEXT,
+            updated_at REAL NOT NULL
         )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS fetch_jobs (
+            id TEXT PRIMARY KEY,
+            snapshot TEXT NOT NULL,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL
+        )
+        """
+    )
+    return False
+
+
+def _m002_feeds(conn: sqlite3.Connection) -> bool:
+    """Normalize ``articles.feed_url`` into ``feeds`` and compress stored summaries."""
+    conn.execute("CREATE TABLE IF NOT EXISTS feeds (id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE)")
+    if "feed_url" not in _columns(conn, "articles"):
+        return False
+    conn.create_function("pack_text", 1, _pack_text, deterministic=True)
+    conn.execute("INSERT OR IGNORE INTO feeds (url) SELECT DISTINCT feed_url FROM articles ORDER BY feed_url")
+    return _rebuild_table(
+        conn,
+        "articles",
+        """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            feed_id INTEGER NOT NULL REFERENCES feeds(id),
+            item_uid TEXT NOT NULL,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            pub_date TEXT,
+            author TEXT,
+            summary_text BLOB NOT NULL,
+            matched_keywords TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            UNIQUE(feed_id, item_uid)
+        )
+        """,
+        """
+        INSERT INTO {name} (id, feed_id, item_uid, title, link, pub_date, author, summary_text, matched_keywords, created_at)
+        SELECT a.id, f.id, a.item_uid, a.title, a.link, a.pub_date, a.author, pack_text(a.summary_text),
+               COALESCE(a.matched_keywords, '[]'), a.created_at
+        FROM articles a JOIN feeds f ON f.url = a.feed_url
+        """,
+    )
+
+
+_EPOCH_NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+
+def _m003_epochs_and_indexes(conn: sqlite3.Connection) -> bool:
+    """Store timestamps as integer epochs and add indexes matched to each query."""
+    rewrote = _rebuild_table(
+        conn,
+        "articles",
+        f"""
+        CREATE TABLE {{name}} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            feed_id INTEGER NOT NULL REFERENCES feeds(id),
+            item_uid TEXT NOT NULL,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            pub_date TEXT,
+            author TEXT,
+            summary_text BLOB NOT NULL,
+            matched_keywords TEXT,
+            created_ts INTEGER NOT NULL DEFAULT ({_EPOCH_NOW}),
+            UNIQUE(feed_id, item_uid)
+        )
+        """,
+        """
+        INSERT INTO {name} (id, feed_id, item_uid, title, link, pub_date, author, summary_text, matched_keywords, created_ts)
+        SELECT id, feed_id, item_uid, title, link, pub_date, author, summary_text, matched_keywords,
+               CAST(strftime('%s', created_at) AS INTEGER)
+        FROM articles
+        """,
+    )
+    rewrote = _rebuild_table(
+        conn,
+        "reports",
+        f"""
+        CREATE TABLE {{name}} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_type TEXT NOT NULL,
+            title TEXT NOT NULL,
+            summary_text BLOB NOT NULL,
+            timeframe_start_ts INTEGER NOT NULL,
+            timeframe_end_ts INTEGER NOT NULL,
+            article_count INTEGER NOT NULL,
+            created_ts INTEGER NOT NULL DEFAULT ({_EPOCH_NOW}),
+            UNIQUE(report_type, timeframe_start_ts, timeframe_end_ts)
+        )
+        """,
+        """
+        INSERT INTO {name} (id, report_type, title, summary_text, timeframe_start_ts, timeframe_end_ts, article_count, created_ts)
+        SELECT id, report_type, title, summary_text,
+               CAST(strftime('%s', timeframe_start) AS INTEGER), CAST(strftime('%s', timeframe_end) AS INTEGER),
+               article_count, CAST(strftime('%s', created_at) AS INTEGER)
+        FROM reports
+        """,
+    ) or rewrote
+    for ddl in (
+        # 报告/归档按时间范围查询
+        "CREATE INDEX IF NOT EXISTS idx_articles_created_ts ON articles(created_ts)",
+        # 按源筛选并按 id 倒序分页，COUNT 也只需扫描该索引
+        "CREATE INDEX IF NOT EXISTS idx_articles_feed_id ON articles(feed_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_reports_timeframe_end ON reports(timeframe_end_ts)",
+        "CREATE INDEX IF NOT EXISTS idx_reports_type_timeframe_end ON reports(report_type, timeframe_end_ts)",
+        "CREATE INDEX IF NOT EXISTS idx_fetch_jobs_updated_at ON fetch_jobs(updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_feed_queue_claim ON feed_queue(status, available_at)",
+        "CREATE INDEX IF NOT EXISTS idx_feed_queue_lease ON feed_queue(status, lease_expires)",
+    ):
+        conn.execute(ddl)
+    return rewrote
+
+
+def _m004_feed_watermarks(conn: sqlite3.Connection) -> bool:
+    """Remember, per feed, the newest entry and a digest of the last fully-stored entry window."""
+    existing = _columns(conn, "feeds")
+    for column, ddl in (
+        ("seen_digest", "seen_digest TEXT"),
+        ("seen_ts", "seen_ts INTEGER"),
+        ("seen_uid", "seen_uid TEXT"),
+        ("seen_checked_ts", "seen_checked_ts INTEGER"),
+    ):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE feeds ADD COLUMN {ddl}")
+    return False
+
+
+def _m005_report_fingerprints(conn: sqlite3.Connection) -> bool:
+    """Store a fingerprint of the inputs each report was generated from."""
+    if "input_fingerprint" not in _columns(conn, "reports"):
+        conn.execute("ALTER TABLE reports ADD COLUMN input_fingerprint TEXT")
+    return False
+
+
+def _m006_data_version(conn: sqlite3.Connection) -> bool:
+    """Counter bumped by article and report writes, for cross-process change detection."""
+    conn.execute("CREATE TABLE IF NOT EXISTS data_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+    return False
+
+
+def _m007_archived_items(conn: sqlite3.Connection) -> bool:
+    """Remember ``(feed_id, item_uid)`` of archived articles so ingest still treats them as seen."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archived_items (
+            feed_id INTEGER NOT NULL,
+            item_uid TEXT NOT NULL,
+            PRIMARY KEY (feed_id, item_uid)
+        ) WITHOUT ROWID
+        """
+    )
+    return False
+
+
+_MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], bool]]] = [
+    (1, "基础表结构", _m001_baseline),
+    (2, "源地址归一化到 feeds 表并压缩摘要", _m002_feeds),
+    (3, "时间戳改为整数 epoch，并按查询建立索引", _m003_epochs_and_indexes),
+    (4, "feeds 表记录已见条目水位", _m004_feed_watermarks),
+    (5, "报告记录输入指纹", _m005_report_fingerprints),
+    (6, "文章与报告的数据版本号", _m006_data_version),
+    (7, "记录已归档条目，去重时视为已见", _m007_archived_items),
+]
+
+
+def _pack_text(text: Optional[str]):
+    """Compress ``text`` into a tagged BLOB when that saves space; short text stays TEXT."""
+    if text is None or COMPRESSION == "none":
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < _COMPRESS_MIN_BYTES:
+        return text
+    if COMPRESSION == "zstd":
+        packed = b"s" + _zstd_compressor().compress(raw)
+    else:
+        packed = b"z" + zlib.compress(raw, 6)
+    return packed if len(packed) < len(raw) else text
+
+
+def _unpack_text(value) -> str:
+    if value is None or isinstance(value, str):
+        return value
+    data = bytes(value)
+    tag, body = data[:1], data[1:]
+    if tag == b"z":
+        return zlib.decompress(body).decode("utf-8")
+    if tag == b"s":
+        if zstandard is None:
+            raise RuntimeError("数据库中存在 zstd 压缩的内容，请安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+    return data.decode("utf-8")
+
+
+_zstd_local = threading.local()
+
+
+def _zstd_compressor():
+    compressor = getattr(_zstd_local, "compressor", None)
+    if compressor is None:
+        compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=9)
+    return compressor
 
 
 @contextmanager
 def _connect():
     with _lock:
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(DB_PATH, timeout=10)
         try:
             conn.row_factory = sqlite3.Row
             yield conn
@@ -81,25 +409,57 @@ def _connect():
             conn.close()
 
 
+_ARTICLE_SELECT = """
+    SELECT a.id, f.url AS feed_url, a.item_uid, a.title, a.link, a.pub_date, a.author,
+           a.summary_text, a.matched_keywords, datetime(a.created_ts, 'unixepoch') AS created_at
+    FROM articles a JOIN feeds f ON f.id = a.feed_id
+"""
+
+_REPORT_SELECT = """
+    SELECT id, report_type, title, summary_text,
+           strftime('%Y-%m-%dT%H:%M:%SZ', timeframe_start_ts, 'unixepoch') AS timeframe_start,
+           strftime('%Y-%m-%dT%H:%M:%SZ', timeframe_end_ts, 'unixepoch') AS timeframe_end,
+           article_count, datetime(created_ts, 'unixepoch') AS created_at
+    FROM reports
+"""
+
+
+def _epoch(value) -> int:
+    """UTC epoch seconds for a datetime (naive means UTC) or an ISO-8601 string."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _feed_id(conn: sqlite3.Connection, feed_url: str) -> int:
+    conn.execute("INSERT INTO feeds (url) VALUES (?) ON CONFLICT(url) DO NOTHING", (feed_url,))
+    return int(conn.execute("SELECT id FROM feeds WHERE url = ?", (feed_url,)).fetchone()[0])
+
+
 def insert_article(article: ArticleCreate) -> Optional[int]:
     with _connect() as conn:
         try:
             cur = conn.execute(
                 """
-                INSERT INTO articles (feed_url, item_uid, title, link, pub_date, author, summary_text, matched_keywords)
+                INSERT INTO articles (feed_id, item_uid, title, link, pub_date, author, summary_text, matched_keywords)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
-                    article.feed_url,
+                    _feed_id(conn, article.feed_url),
                     article.item_uid,
                     article.title,
                     article.link,
                     article.pub_date,
                     article.author,
-                    article.summary_text,
+                    _pack_text(article.summary_text),
                     json.dumps(article.matched_keywords, ensure_ascii=False) if article.matched_keywords else "[]",
                 ),
             )
+            _bump_write_version(conn)
+            conn.commit()
+            publish("article", {"id": cur.lastrowid, "feed_url": article.feed_url, "title": article.title})
             return cur.lastrowid
         except sqlite3.IntegrityError:
             return None
@@ -107,37 +467,126 @@ def insert_article(article: ArticleCreate) -> Optional[int]:
 
 def exists_article(feed_url: str, item_uid: str) -> bool:
     with _connect() as conn:
+        # 已归档的条目不在 articles 表中，靠 archived_items 的墓碑记录判重
         row = conn.execute(
-            "SELECT 1 FROM articles WHERE feed_url = ? AND item_uid = ? LIMIT 1",
-            (feed_url, item_uid),
+            """
+            SELECT 1 FROM feeds f
+            WHERE f.url = ?
+              AND (EXISTS (SELECT 1 FROM articles a WHERE a.feed_id = f.id AND a.item_uid = ?)
+                   OR EXISTS (SELECT 1 FROM archived_items t WHERE t.feed_id = f.id AND t.item_uid = ?))
+            """,
+            (feed_url, item_uid, item_uid),
         ).fetchone()
         return row is not None
 
 
+def get_feed_watermark(feed_url: str) -> Optional[dict]:
+    """Watermark saved by :func:`save_feed_watermark`, or None if the feed has none yet."""
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT seen_digest, seen_ts, seen_uid, seen_checked_ts FROM feeds WHERE url = ?",
+            (feed_url,),
+        ).fetchone()
+    if row is None or row["seen_digest"] is None:
+        return None
+    return dict(row)
+
+
+def save_feed_watermark(feed_url: str, digest: str, newest_ts: int, newest_uid: Optional[str]):
+    with _connect() as conn:
+        conn.execute(
+            f"""
+            UPDATE feeds SET seen_digest = ?, seen_ts = ?, seen_uid = ?, seen_checked_ts = {_EPOCH_NOW}
+            WHERE id = ?
+            """,
+            (digest, int(newest_ts), newest_uid, _feed_id(conn, feed_url)),
+        )
+
+
 def list_articles(limit: int = 20, offset: int = 0, feed_url: Optional[str] = None) -> Tuple[int, List[ArticleInDB]]:
     with _connect() as conn:
         params = []
         where = ""
         if feed_url:
-            where = " WHERE feed_url = ?"
+            where = " WHERE a.feed_id = (SELECT id FROM feeds WHERE url = ?)"
             params.append(feed_url)
 
-        total_row = conn.execute(f"SELECT COUNT(*) as c FROM articles{where}", params).fetchone()
+        total_row = conn.execute(f"SELECT COUNT(*) as c FROM articles a{where}", params).fetchone()
         total = int(total_row[0]) if total_row else 0
 
         params2 = list(params)
         params2.extend([limit, offset])
         rows = conn.execute(
-            f"SELECT * FROM articles{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            f"{_ARTICLE_SELECT}{where} ORDER BY a.id DESC LIMIT ? OFFSET ?",
             params2,
         ).fetchall()
         items = [_row_to_article(r) for r in rows]
         return total, items
 
 
+# 投影查询可选择的字段 -> SQL 表达式
+ARTICLE_FIELDS = {
+    "id": "a.id",
+    "feed_url": "f.url",
+    "item_uid": "a.item_uid",
+    "title": "a.title",
+    "link": "a.link",
+    "pub_date": "a.pub_date",
+    "author": "a.author",
+    "summary_text": "a.summary_text",
+    "matched_keywords": "a.matched_keywords",
+    "created_at": "datetime(a.created_ts, 'unixepoch')",
+}
+
+
+def list_article_rows(
+    limit: int = 20,
+    offset: int = 0,
+    feed_url: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    summary_chars: Optional[int] = None,
+) -> Tuple[int, List[dict]]:
+    """Like :func:`list_articles` but returns plain dicts with only ``fields``.
+
+    Skips model validation so callers can encode rows directly. With
+    ``summary_chars`` the summary is cut to that many characters and the row
+    gets ``summary_truncated: true``.
+    """
+    fields = list(fields or ARTICLE_FIELDS)
+    unknown = [f for f in fields if f not in ARTICLE_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    columns = ", ".join(f"{ARTICLE_FIELDS[f]} AS {f}" for f in fields)
+    join = " JOIN feeds f ON f.id = a.feed_id" if "feed_url" in fields else ""
+    with _connect() as conn:
+        params: List[object] = []
+        where = ""
+        if feed_url:
+            where = " WHERE a.feed_id = (SELECT id FROM feeds WHERE url = ?)"
+            params.append(feed_url)
+        total = int(conn.execute(f"SELECT COUNT(*) FROM articles a{where}", params).fetchone()[0])
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = cur.execute(
+            f"SELECT {columns} FROM articles a{join}{where} ORDER BY a.id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+    items = [dict(zip(fields, row)) for row in rows]
+    for item in items:
+        if "summary_text" in item:
+            text = _unpack_text(item["summary_text"]) or ""
+            if summary_chars is not None and len(text) > summary_chars:
+                text = text[:summary_chars].rstrip() + "…"
+                item["summary_truncated"] = True
+            item["summary_text"] = text
+        if "matched_keywords" in item:
+            item["matched_keywords"] = _parse_keywords(item["matched_keywords"])
+    return total, items
+
+
 def get_article(article_id: int) -> Optional[ArticleInDB]:
     with _connect() as conn:
-        row = conn.execute("SELECT * FROM articles WHERE id = ?", (article_id,)).fetchone()
+        row = conn.execute(f"{_ARTICLE_SELECT} WHERE a.id = ?", (article_id,)).fetchone()
         return _row_to_article(row) if row else None
 
 
@@ -154,19 +603,72 @@ def prune_articles(max_items: int):
                 "DELETE FROM articles WHERE id IN (SELECT id FROM articles ORDER BY id ASC LIMIT ?)",
                 (to_delete,),
             )
+            _bump_write_version(conn)
+            conn.commit()
+
+
+def articles_to_archive(cutoff: datetime, keep_newest: int, limit: int = 500) -> List[ArticleInDB]:
+    """Oldest articles created before ``cutoff`` or beyond the newest ``keep_newest`` rows."""
+    with _connect() as conn:
+        # id 与 created_ts 同步递增，两个条件都可以换算成 id 上界，从而按主键范围读取
+        by_count = conn.execute(
+            "SELECT id FROM articles ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (max(0, keep_newest - 1),),
+        ).fetchone()
+        by_age = conn.execute(
+            "SELECT MAX(id) FROM articles WHERE created_ts < ?",
+            (_epoch(cutoff),),
+        ).fetchone()
+        bound = max(int(by_count[0]) if by_count else 0, int(by_age[0] or 0) + 1 if by_age else 0)
+        rows = conn.execute(
+            f"""
+            {_ARTICLE_SELECT}
+            WHERE a.id < ?
+            ORDER BY a.id ASC
+            LIMIT ?
+            """,
+            (bound, limit),
+        ).fetchall()
+        return [_row_to_article(r) for r in rows]
+
+
+def delete_articles(article_ids: List[int], tombstone: bool = False) -> int:
+    """Delete articles by id; with ``tombstone`` their ``(feed_id, item_uid)`` stay marked as seen."""
+    if not article_ids:
+        return 0
+    with _connect() as conn:
+        if tombstone:
+            conn.executemany(
+                "INSERT OR IGNORE INTO archived_items (feed_id, item_uid) SELECT feed_id, item_uid FROM articles WHERE id = ?",
+                [(i,) for i in article_ids],
+            )
+        cur = conn.executemany("DELETE FROM articles WHERE id = ?", [(i,) for i in article_ids])
+        _bump_write_version(conn)
+        conn.commit()
+        return cur.rowcount
+
+
+def add_archived_items(items: List[Tuple[str, str]]):
+    """Mark ``(feed_url, item_uid)`` pairs as archived, e.g. for archives written before tombstones existed."""
+    if not items:
+        return
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO archived_items (feed_id, item_uid) VALUES (?, ?)",
+            [(_feed_id(conn, url), uid) for url, uid in items],
+        )
+        conn.commit()
 
 
 def list_articles_in_range(start: datetime, end: datetime) -> List[ArticleInDB]:
-    start_str = start.strftime("%Y-%m-%d %H:%M:%S")
-    end_str = end.strftime("%Y-%m-%d %H:%M:%S")
     with _connect() as conn:
         rows = conn.execute(
-            """
-            SELECT * FROM articles
-            WHERE created_at >= ? AND created_at < ?
-            ORDER BY created_at ASC
+            f"""
+            {_ARTICLE_SELECT}
+            WHERE a.created_ts >= ? AND a.created_ts < ?
+            ORDER BY a.created_ts ASC
             """,
-            (start_str, end_str),
+            (_epoch(start), _epoch(end)),
         ).fetchall()
         return [_row_to_article(r) for r in rows]
 
@@ -175,64 +677,101 @@ def _row_to_article(row: sqlite3.Row) -> ArticleInDB:
     if row is None:
         raise ValueError("row is None")
     data = dict(row)
-    raw_keywords = data.get("matched_keywords")
-    if isinstance(raw_keywords, str):
-        try:
-            parsed = json.loads(raw_keywords)
-            if isinstance(parsed, list):
-                data["matched_keywords"] = [str(k) for k in parsed if isinstance(k, str)]
-            else:
-                data["matched_keywords"] = []
-        except json.JSONDecodeError:
-            data["matched_keywords"] = []
-    elif raw_keywords is None:
-        data["matched_keywords"] = []
+    data["summary_text"] = _unpack_text(data.get("summary_text"))
+    data["matched_keywords"] = _parse_keywords(data.get("matched_keywords"))
     return ArticleInDB(**data)
 
 
+def _parse_keywords(raw) -> List[str]:
+    if not isinstance(raw, str):
+        return raw if isinstance(raw, list) else []
+    try:
+        parsed = json.loads(raw)
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(parsed, list):
+        return []
+    return [str(k) for k in parsed if isinstance(k, str)]
+
+
 def insert_report(report: ReportCreate) -> Optional[int]:
     with _connect() as conn:
         try:
             cur = conn.execute(
                 """
-                INSERT INTO reports (report_type, title, summary_text, timeframe_start, timeframe_end, article_count)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO reports (report_type, title, summary_text, timeframe_start_ts, timeframe_end_ts, article_count, input_fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     report.report_type,
                     report.title,
-                    report.summary_text,
-                    report.timeframe_start,
-                    report.timeframe_end,
+                    _pack_text(report.summary_text),
+                    _epoch(report.timeframe_start),
+                    _epoch(report.timeframe_end),
                     report.article_count,
+                    report.input_fingerprint,
                 ),
             )
+            _bump_write_version(conn)
+            conn.commit()
+            _publish_report(cur.lastrowid, report)
             return cur.lastrowid
         except sqlite3.IntegrityError:
             conn.execute(
-                """
+                f"""
                 UPDATE reports
-                SET title = ?, summary_text = ?, article_count = ?, created_at = datetime('now')
-                WHERE report_type = ? AND timeframe_start = ? AND timeframe_end = ?
+                SET title = ?, summary_text = ?, article_count = ?, input_fingerprint = ?, created_ts = {_EPOCH_NOW}
+                WHERE report_type = ? AND timeframe_start_ts = ? AND timeframe_end_ts = ?
                 """,
                 (
                     report.title,
-                    report.summary_text,
+                    _pack_text(report.summary_text),
                     report.article_count,
+                    report.input_fingerprint,
                     report.report_type,
-                    report.timeframe_start,
-                    report.timeframe_end,
+                    _epoch(report.timeframe_start),
+                    _epoch(report.timeframe_end),
                 ),
             )
             row = conn.execute(
-                "SELECT id FROM reports WHERE report_type = ? AND timeframe_start = ? AND timeframe_end = ?",
+                "SELECT id FROM reports WHERE report_type = ? AND timeframe_start_ts = ? AND timeframe_end_ts = ?",
                 (
                     report.report_type,
-                    report.timeframe_start,
-                    report.timeframe_end,
+                    _epoch(report.timeframe_start),
+                    _epoch(report.timeframe_end),
                 ),
             ).fetchone()
-            return int(row[0]) if row else None
+            _bump_write_version(conn)
+            conn.commit()
+            report_id = int(row[0]) if row else None
+            _publish_report(report_id, report)
+            return report_id
+
+
+def report_fingerprint(report_type: str, timeframe_start: str, timeframe_end: str) -> Optional[Tuple[int, Optional[str]]]:
+    """``(id, input_fingerprint)`` of the stored report for this window, or None."""
+    with _connect() as conn:
+        row = conn.execute(
+            """
+            SELECT id, input_fingerprint FROM reports
+            WHERE report_type = ? AND timeframe_start_ts = ? AND timeframe_end_ts = ?
+            """,
+            (report_type, _epoch(timeframe_start), _epoch(timeframe_end)),
+        ).fetchone()
+    return (int(row[0]), row[1]) if row else None
+
+
+def _publish_report(report_id: Optional[int], report: ReportCreate):
+    publish(
+        "report",
+        {
+            "id": report_id,
+            "report_type": report.report_type,
+            "title": report.title,
+            "timeframe_start": report.timeframe_start,
+            "timeframe_end": report.timeframe_end,
+        },
+    )
 
 
 def list_reports(limit: int = 20, offset: int = 0, report_type: Optional[str] = None) -> Tuple[int, List[ReportInDB]]:
@@ -248,14 +787,203 @@ def list_reports(limit: int = 20, offset: int = 0, report_type: Optional[str] =
         params2 = list(params)
         params2.extend([limit, offset])
         rows = conn.execute(
-            f"SELECT * FROM reports{where} ORDER BY timeframe_end DESC LIMIT ? OFFSET ?",
+            f"{_REPORT_SELECT}{where} ORDER BY timeframe_end_ts DESC LIMIT ? OFFSET ?",
             params2,
         ).fetchall()
-        items = [ReportInDB(**dict(r)) for r in rows]
+        items = [_row_to_report(r) for r in rows]
         return total, items
 
 
+def list_reports_in_range(report_type: str, start, end) -> List[ReportInDB]:
+    """Reports of ``report_type`` whose window lies inside ``[start, end]``, oldest first."""
+    with _connect() as conn:
+        rows = conn.execute(
+            f"""
+            {_REPORT_SELECT}
+            WHERE report_type = ? AND timeframe_end_ts > ? AND timeframe_end_ts <= ? AND timeframe_start_ts >= ?
+            ORDER BY timeframe_end_ts
+            """,
+            (report_type, _epoch(start), _epoch(end), _epoch(start)),
+        ).fetchall()
+        return [_row_to_report(r) for r in rows]
+
+
 def get_report(report_id: int) -> Optional[ReportInDB]:
     with _connect() as conn:
-        row = conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
-        return ReportInDB(**dict(row)) if row else None
+        row = conn.execute(f"{_REPORT_SELECT} WHERE id = ?", (report_id,)).fetchone()
+        return _row_to_report(row) if row else None
+
+
+def _row_to_report(row: sqlite3.Row) -> ReportInDB:
+    data = dict(row)
+    data["summary_text"] = _unpack_text(data.get("summary_text"))
+    return ReportInDB(**data)
+
+
+def try_acquire_lease(name: str, holder: str, ttl_seconds: float) -> bool:
+    """Take or renew lease ``name`` for ``holder``; False if another holder owns it."""
+    now = time.time()
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+            WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+            """,
+            (name, holder, now + ttl_seconds, now),
+        )
+        row = conn.execute("SELECT holder FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == holder
+
+
+def release_lease(name: str, holder: str):
+    with _connect() as conn:
+        conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+
+def save_fetch_job(snapshot: dict, keep: int = 50):
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO fetch_jobs (id, snapshot, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET snapshot = excluded.snapshot, updated_at = excluded.updated_at
+            """,
+            (snapshot["job_id"], json.dumps(snapshot, ensure_ascii=False), time.time()),
+        )
+        conn.execute(
+            "DELETE FROM fetch_jobs WHERE id NOT IN (SELECT id FROM fetch_jobs ORDER BY updated_at DESC LIMIT ?)",
+            (keep,),
+        )
+
+
+def load_fetch_job(job_id: str) -> Optional[dict]:
+    with _connect() as conn:
+        row = conn.execute("SELECT snapshot FROM fetch_jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+def list_fetch_jobs(limit: int = 20) -> List[dict]:
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT snapshot FROM fetch_jobs ORDER BY updated_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+
+def request_fetch_job_cancel(job_id: str) -> bool:
+    with _connect() as conn:
+        cur = conn.execute("UPDATE fetch_jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        return cur.rowcount > 0
+
+
+def fetch_job_cancel_requested(job_id: str) -> bool:
+    with _connect() as conn:
+        row = conn.execute("SELECT cancel_requested FROM fetch_jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+
+def enqueue_feeds(feed_urls: List[str], force: bool = False) -> int:
+    """Queue feeds for worker processes; a feed already queued or leased is not duplicated."""
+    now = time.time()
+    with _connect() as conn:
+        for feed_url in feed_urls:
+            conn.execute(
+                """
+                INSERT INTO feed_queue (feed_url, force, status, attempts, available_at, updated_at)
+                VALUES (?, ?, 'queued', 0, ?, ?)
+                ON CONFLICT(feed_url) DO UPDATE SET
+                    force = MAX(feed_queue.force, excluded.force),
+                    rerun = CASE WHEN feed_queue.status = 'leased' THEN 1 ELSE feed_queue.rerun END,
+                    status = CASE WHEN feed_queue.status = 'leased' THEN 'leased' ELSE 'queued' END,
+                    attempts = CASE WHEN feed_queue.status IN ('done', 'failed') THEN 0 ELSE feed_queue.attempts END,
+                    available_at = CASE WHEN feed_queue.status = 'queued' THEN MIN(feed_queue.available_at, excluded.available_at)
+                                        WHEN feed_queue.status = 'leased' THEN feed_queue.available_at
+                                        ELSE excluded.available_at END,
+                    updated_at = excluded.updated_at
+                """,
+                (feed_url, 1 if force else 0, now, now),
+            )
+        return len(feed_urls)
+
+
+def claim_feed(owner: str, visibility_timeout: float, max_attempts: int) -> Optional[dict]:
+    """Lease the next due feed to ``owner``; expired leases become claimable again."""
+    now = time.time()
+    with _connect() as conn:
+        # 超时未确认且已达重试上限的任务标记为失败，不再派发
+        conn.execute(
+            """
+            UPDATE feed_queue SET status = 'failed', lease_owner = NULL, last_error = '租约超时且重试次数耗尽', updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """,
+            (now, now, max_attempts),
+        )
+        row = conn.execute(
+            """
+            UPDATE feed_queue
+            SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?
+            WHERE feed_url = (
+                SELECT feed_url FROM feed_queue
+                WHERE (status = 'queued' AND available_at <= ?) OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY available_at ASC
+                LIMIT 1
+            )
+            RETURNING feed_url, force, attempts
+            """,
+            (owner, now + visibility_timeout, now, now, now),
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def extend_feed_lease(owner: str, feed_url: str, visibility_timeout: float) -> bool:
+    with _connect() as conn:
+        cur = conn.execute(
+            "UPDATE feed_queue SET lease_expires = ?, updated_at = ? WHERE feed_url = ? AND lease_owner = ? AND status = 'leased'",
+            (time.time() + visibility_timeout, time.time(), feed_url, owner),
+        )
+        return cur.rowcount > 0
+
+
+def ack_feed(owner: str, feed_url: str) -> bool:
+    now = time.time()
+    with _connect() as conn:
+        cur = conn.execute(
+            """
+            UPDATE feed_queue
+            SET status = CASE WHEN rerun = 1 THEN 'queued' ELSE 'done' END,
+                attempts = 0, rerun = 0, force = CASE WHEN rerun = 1 THEN force ELSE 0 END,
+                lease_owner = NULL, lease_expires = NULL, last_error = NULL,
+                available_at = ?, updated_at = ?
+            WHERE feed_url = ? AND lease_owner = ? AND status = 'leased'
+            """,
+            (now, now, feed_url, owner),
+        )
+        return cur.rowcount > 0
+
+
+def nack_feed(owner: str, feed_url: str, error: str, retry_delay: float, max_attempts: int) -> bool:
+    now = time.time()
+    with _connect() as conn:
+        cur = conn.execute(
+            """
+            UPDATE feed_queue
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                lease_owner = NULL, lease_expires = NULL, last_error = ?,
+                available_at = ? + ? * attempts, updated_at = ?
+            WHERE feed_url = ? AND lease_owner = ? AND status = 'leased'
+            """,
+            (max_attempts, error[:500], now, retry_delay, now, feed_url, owner),
+        )
+        return cur.rowcount > 0
+
+
+def list_feed_queue() -> List[dict]:
+    with _connect() as conn:
+        rows = conn.execute(
+            """
+            SELECT feed_url, force, status, attempts, lease_owner, lease_expires, available_at, last_error, updated_at
+            FROM feed_queue ORDER BY available_at ASC
+            """
+        ).fetchall()
+        return [dict(r) for r in rows]
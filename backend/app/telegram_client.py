@@ -7,14 +7,44 @@ import httpx
 
 
 class TelegramClient:
-    def __init__(self, bot_token: str, timeout: float = 20.0):
+    def __init__(self, bot_token: str, timeout: float = 20.0, api_base: str = "https://api.telegram.org"):
         self.bot_token = bot_token
         self.timeout = timeout
+        self.api_base = api_base.rstrip("/")
 
     def send_message(self, chat_id: str, text: str, parse_mode: Optional[str] = "HTML", disable_web_page_preview: bool = False) -> bool:
         if not self.bot_token:
             return False
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        url, payload = self._request(chat_id, text, parse_mode, disable_web_page_preview)
+        try:
+            with httpx.Client(timeout=self.timeout) as client:
+                resp = client.post(url, json=payload)
+                return self._handle_response(resp)
+        except Exception as exc:
+            logging.warning("Telegram API 请求异常: %s", exc)
+            return False
+
+    async def send_message_async(
+        self,
+        chat_id: str,
+        text: str,
+        *,
+        client: httpx.AsyncClient,
+        parse_mode: Optional[str] = "HTML",
+        disable_web_page_preview: bool = False,
+    ) -> bool:
+        if not self.bot_token:
+            return False
+        url, payload = self._request(chat_id, text, parse_mode, disable_web_page_preview)
+        try:
+            resp = await client.post(url, json=payload, timeout=self.timeout)
+            return self._handle_response(resp)
+        except Exception as exc:
+            logging.warning("Telegram API 请求异常: %s", exc)
+            return False
+
+    def _request(self, chat_id: str, text: str, parse_mode: Optional[str], disable_web_page_preview: bool):
+        url = f"{self.api_base}/bot{self.bot_token}/sendMessage"
         payload = {
             "chat_id": chat_id,
             "text": text,
@@ -22,21 +52,19 @@ class TelegramClient:
         }
         if parse_mode:
             payload["parse_mode"] = parse_mode
-        try:
-            with httpx.Client(timeout=self.timeout) as client:
-                resp = client.post(url, json=payload)
-                if resp.status_code >= 400:
-                    logging.warning(
-                        "Telegram API 调用失败 status=%s body=%s",
-                        resp.status_code,
-                        resp.text[:300],
-                    )
-                resp.raise_for_status()
-                data = resp.json()
-                ok = bool(data.get("ok"))
-                if not ok:
-                    logging.warning("Telegram API 返回失败响应: %s", data)
-                return ok
-        except Exception as exc:
-            logging.warning("Telegram API 请求异常: %s", exc)
-            return False
+        return url, payload
+
+    @staticmethod
+    def _handle_response(resp: httpx.Response) -> bool:
+        if resp.status_code >= 400:
+            logging.warning(
+                "Telegram API 调用失败 status=%s body=%s",
+                resp.status_code,
+                resp.text[:300],
+            )
+        resp.raise_for_status()
+        data = resp.json()
+        ok = bool(data.get("ok"))
+        if not ok:
+            logging.warning("Telegram API 返回失败响应: %s", data)
+        return ok
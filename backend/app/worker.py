@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+from typing import Optional
+
+from .config import load_settings
+from .ingest import IngestEngine
+from .leader import process_identity
+from .storage import ack_feed, claim_feed, extend_feed_lease, init_db, nack_feed
+
+
+class FeedWorker:
+    """Claims feeds from the shared ``feed_queue`` table and runs them through the ingest engine.
+
+    Each claimed feed is leased for ``visibility_timeout_seconds`` and the
+    lease is extended while the feed is being processed; if the worker dies
+    the lease runs out and another worker picks the feed up again.
+    """
+
+    def __init__(self, engine: IngestEngine, owner: Optional[str] = None):
+        self.engine = engine
+        self.owner = owner or process_identity()
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        settings = load_settings()
+        concurrency = max(1, settings.queue.worker_concurrency)
+        logging.info("抓取 worker 已启动: %s 并发 %s", self.owner, concurrency)
+        await asyncio.gather(*(self._loop(i) for i in range(concurrency)))
+        logging.info("抓取 worker 已停止: %s", self.owner)
+
+    async def _loop(self, slot: int):
+        owner = f"{self.owner}#{slot}"
+        while not self._stopping.is_set():
+            cfg = load_settings().queue
+            try:
+                claimed = await asyncio.to_thread(
+                    claim_feed,
+                    owner,
+                    cfg.visibility_timeout_seconds,
+                    cfg.max_attempts,
+                )
+            except Exception:
+                logging.exception("领取队列任务失败")
+                claimed = None
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=cfg.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(owner, claimed, cfg)
+
+    async def _process(self, owner: str, claimed: dict, cfg):
+        feed = claimed["feed_url"]
+        logging.info("领取源: %s (第 %s 次尝试)", feed, claimed["attempts"])
+        cycle = asyncio.create_task(
+            self.engine.run_cycle(
+                force=bool(claimed["force"]),
+                feeds=[feed],
+                push_summary=False,
+            )
+        )
+        lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(owner, feed, cfg.visibility_timeout_seconds, cycle, lost))
+        error: Optional[str] = None
+        try:
+            result = await cycle
+        except asyncio.CancelledError:
+            if not lost.is_set():
+                raise
+        except Exception as exc:
+            logging.exception("处理源失败: %s", feed)
+            error = str(exc) or exc.__class__.__name__
+        else:
+            error = "源抓取失败" if result.failed_feeds else None
+        finally:
+            heartbeat.cancel()
+        if lost.is_set():
+            # 租约过期后该源可能已被其他 worker 领取，既不确认也不重试，交由新的持有者处理
+            logging.warning("租约已丢失，放弃处理: %s", feed)
+            return
+        if error is None:
+            await asyncio.to_thread(ack_feed, owner, feed)
+            logging.info("源处理完成: %s", feed)
+        else:
+            await asyncio.to_thread(
+                nack_feed,
+                owner,
+                feed,
+                error,
+                cfg.retry_delay_seconds,
+                cfg.max_attempts,
+            )
+
+    async def _heartbeat(self, owner: str, feed: str, visibility_timeout: float, cycle: asyncio.Task, lost: asyncio.Event):
+        """Extend the feed's lease every third of its timeout; cancel ``cycle`` once the lease is lost."""
+        while True:
+            await asyncio.sleep(visibility_timeout / 3)
+            try:
+                ok = await asyncio.to_thread(extend_feed_lease, owner, feed, visibility_timeout)
+            except Exception:
+                logging.warning("续租失败: %s", feed, exc_info=True)
+                continue
+            if not ok:
+                logging.warning("租约已丢失，取消处理: %s", feed)
+                lost.set()
+                cycle.cancel()
+                return
+
+
+async def _main():
+    init_db()
+    engine = IngestEngine()
+    await engine.start()
+    worker = FeedWorker(engine)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            pass
+    try:
+        await worker.run()
+    finally:
+        await engine.aclose()
+
+
+def run_worker():
+    asyncio.run(_main())
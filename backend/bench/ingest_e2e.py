@@ -0,0 +1,338 @@
+"""End-to-end fetch cycles against local stand-ins for RSS, article pages, the AI API and Telegram.
+
+Run from ``backend``::
+
+    python -m bench.ingest_e2e                                  # 20 feeds x 10 items, 3 cycles
+    python -m bench.ingest_e2e --feeds 50 --ai-latency-ms 300 --out before.json
+    python -m bench.ingest_e2e --out after.json --compare before.json
+
+The stand-in servers run in a child process so the reported peak RSS is the
+ingest process alone. Every cycle serves fresh entry ids, so each cycle does
+the full fetch → extract → summarize → store → push path; a daily report
+over the stored articles is generated at the end. Prints (and with
+``--out`` saves) one JSON object: articles/s, p50/p99 latency per stage
+and peak RSS.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+_PARAGRAPH = "研究团队发布了新的开源模型，在推理与代码生成任务上取得明显提升，同时公开了训练数据的构成与评测方法。" * 3
+
+
+# ---- stand-in servers (child process) ----
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 头与正文分两次写出，关闭 Nagle 以免 keep-alive 连接上出现 40ms 的延迟确认
+    disable_nagle_algorithm = True
+    options: dict = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+
+class _RSSHandler(_Handler):
+    def do_GET(self):
+        # /feed/<n>?gen=<cycle>
+        path, _, query = self.path.partition("?")
+        feed = path.rsplit("/", 1)[-1]
+        gen = query.partition("gen=")[2] or "0"
+        html = self.options["html_base"]
+        now = datetime.now(timezone.utc)
+        items = []
+        for i in range(self.options["items"]):
+            items.append(
+                f"<item><title>Feed {feed} cycle {gen} item {i}</title>"
+                f"<link>{html}/a/{feed}/{gen}/{i}</link>"
+                f"<guid isPermaLink=\"false\">{feed}-{gen}-{i}</guid>"
+                f"<pubDate>{format_datetime(now - timedelta(minutes=i))}</pubDate>"
+                f"<description><![CDATA[<p>{_PARAGRAPH}</p>]]></description></item>"
+            )
+        body = (
+            f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Feed {feed}</title>'
+            + "".join(items)
+            + "</channel></rss>"
+        ).encode("utf-8")
+        self._send(body, "application/rss+xml")
+
+
+class _HTMLHandler(_Handler):
+    def do_GET(self):
+        paragraphs = "".join(f"<p>{_PARAGRAPH}</p>" for _ in range(self.options["paragraphs"]))
+        body = (
+            "<html><head><title>t</title><script>var x = 1;</script></head><body>"
+            "<nav><a href='/'>首页</a><a href='/about'>关于</a></nav>"
+            f"<article class='post-content'><h1>{self.path}</h1>{paragraphs}</article>"
+            "<aside class='sidebar'><p>相关推荐</p></aside><footer>footer</footer></body></html>"
+        ).encode("utf-8")
+        self._send(body, "text/html; charset=utf-8")
+
+
+class _AIHandler(_Handler):
+    def do_POST(self):
+        request = json.loads(self._read_body() or b"{}")
+        time.sleep(self.options["ai_latency"])
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        if "时间范围" in prompt[:64]:
+            content = "概览：本时段共有若干文章。\n重点事件：……"
+        else:
+            content = json.dumps({"title": "标题", "summary_text": _PARAGRAPH}, ensure_ascii=False)
+        body = json.dumps(
+            {
+                "choices": [{"message": {"content": content}}],
+                "usage": {"prompt_tokens": len(prompt), "completion_tokens": 120, "total_tokens": len(prompt) + 120},
+            },
+            ensure_ascii=False,
+        ).encode("utf-8")
+        self._send(body, "application/json")
+
+
+class _TelegramHandler(_Handler):
+    def do_POST(self):
+        self._read_body()
+        time.sleep(self.options["tg_latency"])
+        self._send(b'{"ok":true,"result":{}}', "application/json")
+
+
+def _serve(options: dict, ports: "multiprocessing.Queue"):
+    servers = {}
+    for name, handler in (("html", _HTMLHandler), ("rss", _RSSHandler), ("ai", _AIHandler), ("telegram", _TelegramHandler)):
+        handler.options = options
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        srv.daemon_threads = True
+        servers[name] = srv
+        if name == "html":
+            options["html_base"] = f"http://127.0.0.1:{srv.server_address[1]}"
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+    ports.put({name: srv.server_address[1] for name, srv in servers.items()})
+    threading.Event().wait()
+
+
+# ---- measurement ----
+
+_samples: Dict[str, List[float]] = defaultdict(list)
+
+
+def _timed_async(stage: str, fn):
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _samples[stage].append(time.perf_counter() - start)
+
+    return wrapper
+
+
+def _timed(stage: str, fn):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _samples[stage].append(time.perf_counter() - start)
+
+    return wrapper
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _stage_summary() -> dict:
+    return {
+        stage: {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 50) * 1000, 2),
+            "p99_ms": round(_percentile(values, 99) * 1000, 2),
+            "total_s": round(sum(values), 3),
+        }
+        for stage, values in sorted(_samples.items())
+        if values
+    }
+
+
+def _peak_rss_mb() -> float:
+    # Linux 上 ru_maxrss 单位为 KiB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _instrument():
+    from app import ai_client, extractor, ingest, report_service, telegram_client
+
+    ingest.fetch_feed_async = _timed_async("feed_fetch_parse", ingest.fetch_feed_async)
+    ingest.extract_from_url_async = _timed_async("article_fetch_extract", ingest.extract_from_url_async)
+    extractor._extract_or_none = _timed("extract_main_text", extractor._extract_or_none)
+    ai_client.AIClient.summarize_async = _timed_async("ai_summarize", ai_client.AIClient.summarize_async)
+    ingest.insert_article = _timed("store", ingest.insert_article)
+    telegram_client.TelegramClient.send_message_async = _timed_async(
+        "telegram_push", telegram_client.TelegramClient.send_message_async
+    )
+    report_service.generate_report = _timed("report", report_service.generate_report)
+
+
+def _settings(args, ports: dict, gen: int):
+    from app.models import AppSettings
+
+    rss = f"http://127.0.0.1:{ports['rss']}"
+    settings = AppSettings()
+    settings.fetch.feeds = [f"{rss}/feed/{i}?gen={gen}" for i in range(args.feeds)]
+    settings.fetch.per_feed_limit = args.items
+    settings.fetch.use_article_page = True
+    settings.fetch.feed_concurrency = args.feed_concurrency
+    settings.fetch.ai_concurrency = args.ai_concurrency
+    settings.fetch.max_items = 50000
+    settings.ai.enabled = True
+    settings.ai.base_url = f"http://127.0.0.1:{ports['ai']}/v1"
+    settings.ai.api_key = "bench"
+    settings.telegram.enabled = True
+    settings.telegram.bot_token = "bench"
+    settings.telegram.chat_id = "1"
+    settings.telegram.push_summary = True
+    settings.telegram.api_base = f"http://127.0.0.1:{ports['telegram']}"
+    settings.content_cache.enabled = args.content_cache
+    settings.archive.enabled = False
+    return settings
+
+
+async def _run_cycles(args, ports: dict) -> dict:
+    from app import ingest
+
+    engine = ingest.IngestEngine()
+    await engine.start()
+    cycles = []
+    try:
+        for gen in range(args.cycles):
+            settings = _settings(args, ports, gen)
+            ingest.load_settings = lambda settings=settings: settings
+            start = time.perf_counter()
+            result = await engine.run_cycle()
+            elapsed = time.perf_counter() - start
+            cycles.append({"seconds": round(elapsed, 3), "new_items": result.new_items, "failed_feeds": len(result.failed_feeds)})
+    finally:
+        await engine.aclose()
+    return {"cycles": cycles, "settings": settings}
+
+
+def _compare(current: dict, previous: dict) -> dict:
+    out = {"articles_per_s": _ratio(current["articles_per_s"], previous.get("articles_per_s"))}
+    for stage, values in current["stages"].items():
+        before = previous.get("stages", {}).get(stage)
+        if before:
+            out[stage] = {
+                "p50": _ratio(values["p50_ms"], before["p50_ms"]),
+                "p99": _ratio(values["p99_ms"], before["p99_ms"]),
+            }
+    out["peak_rss_mb"] = _ratio(current["peak_rss_mb"], previous.get("peak_rss_mb"))
+    return out
+
+
+def _ratio(now, before):
+    return round(now / before, 3) if before else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feeds", type=int, default=20)
+    parser.add_argument("--items", type=int, default=10, help="entries per feed and per_feed_limit")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--paragraphs", type=int, default=20, help="paragraphs per article page")
+    parser.add_argument("--ai-latency-ms", type=float, default=50)
+    parser.add_argument("--tg-latency-ms", type=float, default=5)
+    parser.add_argument("--feed-concurrency", type=int, default=4)
+    parser.add_argument("--ai-concurrency", type=int, default=8)
+    parser.add_argument("--content-cache", action="store_true", help="keep the extracted-content cache enabled")
+    parser.add_argument("--out", help="write the result JSON to this file")
+    parser.add_argument("--compare", help="previous result JSON; adds current/previous ratios")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    options = {
+        "items": args.items,
+        "paragraphs": args.paragraphs,
+        "ai_latency": args.ai_latency_ms / 1000,
+        "tg_latency": args.tg_latency_ms / 1000,
+    }
+    ports_q: "multiprocessing.Queue" = multiprocessing.Queue()
+    servers = multiprocessing.Process(target=_serve, args=(options, ports_q), daemon=True)
+    servers.start()
+    ports = ports_q.get(timeout=10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["RSS_AI_CONTENT_CACHE"] = os.path.join(tmp, "content_cache.sqlite")
+        from app import report_service, storage
+        from app.ingest import build_ai_client, build_telegram_client
+
+        storage.DB_PATH = os.path.join(tmp, "bench.sqlite")
+        storage.init_db()
+        _instrument()
+        rss_start = _peak_rss_mb()
+        try:
+            run = asyncio.run(_run_cycles(args, ports))
+            settings = run["settings"]
+            now = datetime.now(timezone.utc)
+            report_service.generate_report(
+                "daily",
+                settings=settings,
+                ai_client=build_ai_client(settings),
+                telegram_client=build_telegram_client(settings),
+                start_override=now - timedelta(days=1),
+                end_override=now + timedelta(minutes=1),
+            )
+        finally:
+            servers.terminate()
+
+    cycles = run["cycles"]
+    articles = sum(c["new_items"] for c in cycles)
+    seconds = sum(c["seconds"] for c in cycles)
+    result = {
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "articles": articles,
+        "seconds": round(seconds, 3),
+        "articles_per_s": round(articles / seconds, 2) if seconds else 0.0,
+        "cycles": cycles,
+        "stages": _stage_summary(),
+        "rss_before_mb": rss_start,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            result["vs_previous"] = _compare(result, json.load(fh))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Rows/second for article list pages: full Pydantic models vs. projection + direct JSON encoding.
+
+Run from ``backend``::
+
+    python -m bench.list_projection
+
+Fills a scratch database, then for page sizes 20/200/2000 times
+``list_articles`` + ``ArticleListResponse.model_dump_json`` against
+``list_article_rows`` (preview fields, truncated summary) + ``dumps_json``.
+Prints one JSON object.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from app import storage
+from app.models import ArticleCreate, ArticleListResponse
+from app.response_cache import dumps_json, orjson
+from bench.storage_compaction import _summary
+
+LIST_FIELDS = ["id", "title", "link", "pub_date", "author", "summary_text", "matched_keywords"]
+
+
+def _fill(rows: int):
+    rng = random.Random(3)
+    for i in range(rows):
+        storage.insert_article(
+            ArticleCreate(
+                feed_url=f"https://news.example-{i % 20}.com/rss.xml",
+                item_uid=str(i),
+                title=f"文章标题 {i}",
+                link=f"https://news.example-{i % 20}.com/articles/{i}",
+                pub_date="Mon, 01 Jan 2024 00:00:00 GMT",
+                author="作者",
+                summary_text=_summary(rng),
+                matched_keywords=["人工智能"],
+            )
+        )
+
+
+def _rate(fn, page: int, min_seconds: float) -> dict:
+    fn()  # warm-up
+    runs = 0
+    size = 0
+    start = time.perf_counter()
+    while True:
+        size = len(fn())
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+    return {
+        "rows_per_s": round(runs * page / elapsed),
+        "ms_per_page": round(elapsed / runs * 1000, 3),
+        "bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default="20,200,2000")
+    parser.add_argument("--summary-chars", type=int, default=300)
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    pages = [int(p) for p in args.pages.split(",")]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DB_PATH = os.path.join(tmp, "bench.sqlite")
+        storage.init_db()
+        _fill(max(pages))
+        for page in pages:
+
+            def full():
+                total, items = storage.list_articles(limit=page)
+                return ArticleListResponse(total=total, items=items).model_dump_json().encode("utf-8")
+
+            def projection():
+                total, items = storage.list_article_rows(
+                    limit=page, fields=LIST_FIELDS, summary_chars=args.summary_chars
+                )
+                return dumps_json({"total": total, "items": items})
+
+            results[page] = {
+                "full": _rate(full, page, args.min_seconds),
+                "projection": _rate(projection, page, args.min_seconds),
+            }
+            results[page]["speedup"] = round(
+                results[page]["projection"]["rows_per_s"] / results[page]["full"]["rows_per_s"], 2
+            )
+    print(
+        json.dumps(
+            {"encoder": "orjson" if orjson is not None else "json", "summary_chars": args.summary_chars, "pages": results},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
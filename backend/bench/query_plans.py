@@ -0,0 +1,149 @@
+"""Check that every query issued by ``app.storage`` is served by an index.
+
+Run from ``backend``::
+
+    python -m bench.query_plans
+
+Exercises the public storage functions against a scratch database, captures
+each executed statement through ``sqlite3``'s trace callback and runs
+``EXPLAIN QUERY PLAN`` on it. A bare ``SCAN <table>`` or a temp B-tree sort
+is reported as a violation, except for rowid-ordered ``ORDER BY id ... LIMIT``
+walks (the rowid is the table's clustered index) and the functions listed in
+``ALLOWED``. The exit status is non-zero when any violation is found.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from app import storage
+from app.models import ArticleCreate, ReportCreate
+
+# storage 函数 -> 允许全表扫描/临时排序的原因
+ALLOWED = {
+    "save_fetch_job": "fetch_jobs is capped at 50 rows",
+    "claim_feed": "feed_queue holds one row per configured feed",
+    "list_feed_queue": "feed_queue holds one row per configured feed",
+}
+
+_DML = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+_BARE_SCAN = re.compile(r"^SCAN (\w+)$")
+_ROWID_WALK = re.compile(r"ORDER BY (\w+\.)?id( ASC| DESC)? LIMIT", re.IGNORECASE)
+_LITERAL = re.compile(r"X?'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_globals.get("__name__") == storage.__name__ and not frame.f_code.co_name.startswith("_"):
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return "?"
+
+
+def _exercise():
+    now = datetime.utcnow()
+    for i in range(60):
+        storage.insert_article(
+            ArticleCreate(
+                feed_url=f"https://example.com/{i % 3}.xml",
+                item_uid=str(i),
+                title=f"t{i}",
+                link=f"https://example.com/a/{i}",
+                summary_text="摘要" * 200,
+            )
+        )
+    storage.exists_article("https://example.com/0.xml", "1")
+    storage.save_feed_watermark("https://example.com/0.xml", "d", 1, "1")
+    storage.get_feed_watermark("https://example.com/0.xml")
+    storage.list_articles(limit=20, offset=20)
+    storage.list_articles(limit=20, feed_url="https://example.com/1.xml")
+    storage.get_article(5)
+    storage.list_article_rows(limit=20, fields=["id", "title", "summary_text"], summary_chars=100)
+    storage.list_article_rows(limit=20, feed_url="https://example.com/2.xml", fields=["id", "feed_url"])
+    storage.list_articles_in_range(now - timedelta(hours=1), now + timedelta(hours=1))
+    storage.articles_to_archive(now - timedelta(days=30), keep_newest=50)
+    storage.prune_articles(55)
+    for report_type in ("daily", "hourly", "daily"):
+        storage.insert_report(
+            ReportCreate(
+                report_type=report_type,
+                title="r",
+                summary_text="报告",
+                timeframe_start="2024-01-01T00:00:00Z",
+                timeframe_end="2024-01-02T00:00:00Z",
+                article_count=1,
+            )
+        )
+    storage.report_fingerprint("daily", "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z")
+    storage.list_reports(limit=10)
+    storage.list_reports_in_range("hourly", now - timedelta(days=2), now)
+    storage.list_reports(limit=10, report_type="daily")
+    storage.get_report(1)
+    storage.try_acquire_lease("bench", "me", 30)
+    storage.release_lease("bench", "me")
+    storage.save_fetch_job({"job_id": "j1"})
+    storage.load_fetch_job("j1")
+    storage.list_fetch_jobs()
+    storage.request_fetch_job_cancel("j1")
+    storage.fetch_job_cancel_requested("j1")
+    storage.enqueue_feeds(["https://example.com/0.xml", "https://example.com/1.xml"])
+    claimed = storage.claim_feed("w", 60, 3)
+    storage.extend_feed_lease("w", claimed["feed_url"], 60)
+    storage.ack_feed("w", claimed["feed_url"])
+    claimed = storage.claim_feed("w", 60, 3)
+    storage.nack_feed("w", claimed["feed_url"], "err", 1, 3)
+    storage.list_feed_queue()
+    storage.delete_articles([1, 2])
+
+
+def main() -> int:
+    statements = []
+    original = storage._connect
+
+    @contextmanager
+    def traced():
+        with original() as conn:
+            conn.set_trace_callback(lambda sql: statements.append((_caller(), sql)) if _DML.match(sql) else None)
+            yield conn
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DB_PATH = os.path.join(tmp, "plans.sqlite")
+        storage.init_db()
+        storage._connect = traced
+        try:
+            _exercise()
+        finally:
+            storage._connect = original
+        conn = sqlite3.connect(storage.DB_PATH)
+        violations = 0
+        seen = set()
+        for func, sql in statements:
+            text = " ".join(sql.split())
+            key = (func, _LITERAL.sub("?", text))
+            if key in seen:
+                continue
+            seen.add(key)
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            bad = [p for p in plan if "TEMP B-TREE" in p]
+            if not _ROWID_WALK.search(text):
+                bad += [p for p in plan if _BARE_SCAN.match(p)]
+            status = "ok"
+            if bad:
+                status = "allowed" if func in ALLOWED else "VIOLATION"
+                violations += 0 if func in ALLOWED else 1
+            print(f"[{status}] {func}: {key[1][:100]}")
+            for p in plan:
+                print(f"    {p}")
+        conn.close()
+    print(f"{len(seen)} statements, {violations} violations")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
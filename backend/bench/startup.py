@@ -0,0 +1,139 @@
+"""Time-to-first-request and time-to-ready of the API process.
+
+Run from ``backend``::
+
+    python -m bench.startup                      # 3 runs, AI stand-in answering after 5 s
+    python -m bench.startup --ai-latency-ms 30000 --runs 5
+
+Each run starts ``uvicorn app.main:app`` in a fresh process with a scratch
+database and config that enables hourly and daily reports against a slow
+OpenAI-compatible stand-in, then polls ``/api/health`` and ``/api/ready``.
+Also reports the bare ``import app.main`` time. Prints one JSON object.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import yaml
+
+from bench.ingest_e2e import _serve
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _write_config(path: str, tmp: str, port: int, ai_port: int):
+    from app.models import AppSettings
+
+    settings = AppSettings()
+    settings.server.host = "127.0.0.1"
+    settings.server.port = port
+    settings.fetch.feeds = []
+    settings.ai.enabled = True
+    settings.ai.api_key = "bench"
+    settings.ai.base_url = f"http://127.0.0.1:{ai_port}/v1"
+    settings.reports.hourly_enabled = True
+    settings.reports.daily_enabled = True
+    settings.logging.file = os.path.join(tmp, "logs", "app.log")
+    with open(path, "w", encoding="utf-8") as fh:
+        yaml.safe_dump(settings.model_dump(), fh, allow_unicode=True)
+
+
+def _poll(url: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def run_once(ai_port: int, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = _free_port()
+        config = os.path.join(tmp, "config.yaml")
+        _write_config(config, tmp, port, ai_port)
+        env = dict(os.environ, RSS_AI_CONFIG=config, RSS_AI_DB=os.path.join(tmp, "db.sqlite"))
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = start + timeout
+            health = _poll(f"http://127.0.0.1:{port}/api/health", deadline)
+            ready = _poll(f"http://127.0.0.1:{port}/api/ready", deadline)
+            t0 = time.perf_counter()
+            httpx.get(f"http://127.0.0.1:{port}/api/articles?limit=20", timeout=timeout)
+            first_list = time.perf_counter() - t0
+            body = httpx.get(f"http://127.0.0.1:{port}/api/ready").json()
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return {
+        "first_request_s": round(health - start, 3),
+        "ready_s": round(ready - start, 3),
+        "in_process_startup_s": body.get("startup_seconds"),
+        "first_article_list_ms": round(first_list * 1000, 2),
+    }
+
+
+def import_time() -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return round(float(out.stdout.strip()), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--ai-latency-ms", type=float, default=5000, help="stand-in AI response time for the initial reports")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    options = {"items": 1, "paragraphs": 1, "ai_latency": args.ai_latency_ms / 1000, "tg_latency": 0}
+    ports_q: "multiprocessing.Queue" = multiprocessing.Queue()
+    servers = multiprocessing.Process(target=_serve, args=(options, ports_q), daemon=True)
+    servers.start()
+    try:
+        ports = ports_q.get(timeout=10)
+        runs = [run_once(ports["ai"], args.timeout) for _ in range(args.runs)]
+    finally:
+        servers.terminate()
+    imports = [import_time() for _ in range(args.runs)]
+    summary = {key: statistics.median(r[key] for r in runs) for key in ("first_request_s", "ready_s", "first_article_list_ms")}
+    print(
+        json.dumps(
+            {
+                "ai_latency_ms": args.ai_latency_ms,
+                "median": summary,
+                "import_app_main_s": statistics.median(imports),
+                "runs": runs,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""DB size and read latency before/after the feeds table + summary compression migration.
+
+Run from ``backend``::
+
+    python -m bench.storage_compaction --rows 5000
+    RSS_AI_DB_COMPRESSION=zstd python -m bench.storage_compaction
+
+Builds a database with the legacy articles schema (feed_url TEXT per row,
+plain summaries), measures it, runs ``init_db`` to migrate it in place and
+measures again. Prints one JSON object.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from app import storage
+from app.models import ArticleInDB
+
+LEGACY_DDL = """
+CREATE TABLE articles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    feed_url TEXT NOT NULL,
+    item_uid TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    pub_date TEXT,
+    author TEXT,
+    summary_text TEXT NOT NULL,
+    matched_keywords TEXT,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    UNIQUE(feed_url, item_uid)
+);
+CREATE INDEX idx_articles_created_at ON articles(created_at DESC);
+"""
+
+_WORDS = (
+    "人工智能 模型 发布 开源 推理 训练 数据 安全 芯片 算力 研究 团队 用户 平台 产品 "
+    "性能 提升 成本 降低 市场 竞争 监管 政策 生态 开发者 应用 场景 自动驾驶 机器人 云计算"
+).split()
+
+
+def _summary(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(6, 14)):
+        sentences.append("".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 16))) + "。")
+    return "".join(sentences)
+
+
+def build_legacy(path: str, rows: int, feeds: int, seed: int = 7):
+    rng = random.Random(seed)
+    feed_urls = [f"https://news.example-{i}.com/rss/technology/artificial-intelligence.xml" for i in range(feeds)]
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(LEGACY_DDL)
+    conn.executemany(
+        """
+        INSERT INTO articles (feed_url, item_uid, title, link, pub_date, author, summary_text, matched_keywords, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now', ?))
+        """,
+        (
+            (
+                feed_urls[i % feeds],
+                f"uid-{i}",
+                f"文章标题 {i}",
+                f"https://news.example-{i % feeds}.com/articles/{i}",
+                "Mon, 01 Jan 2024 00:00:00 GMT",
+                "作者",
+                _summary(rng),
+                json.dumps(rng.sample(_WORDS, 2), ensure_ascii=False),
+                f"-{rows - i} minutes",
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return feed_urls
+
+
+def _legacy_row(row: sqlite3.Row) -> ArticleInDB:
+    data = dict(row)
+    data["matched_keywords"] = json.loads(data["matched_keywords"] or "[]")
+    return ArticleInDB(**data)
+
+
+def _legacy_list(path: str, offset: int, feed_url=None):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        where, params = ("", []) if feed_url is None else (" WHERE feed_url = ?", [feed_url])
+        conn.execute(f"SELECT COUNT(*) FROM articles{where}", params).fetchone()
+        rows = conn.execute(f"SELECT * FROM articles{where} ORDER BY id DESC LIMIT 20 OFFSET ?", params + [offset]).fetchall()
+        return [_legacy_row(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def _legacy_get(path: str, article_id: int):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return _legacy_row(conn.execute("SELECT * FROM articles WHERE id = ?", (article_id,)).fetchone())
+    finally:
+        conn.close()
+
+
+def _timed(fn, iterations: int) -> dict:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+def _size(path: str) -> int:
+    return sum(os.path.getsize(path + suf) for suf in ("", "-wal") if os.path.exists(path + suf))
+
+
+def _measure(path: str, rows: int, feed_urls, legacy: bool, iterations: int) -> dict:
+    rng = random.Random(1)
+    offsets = [rng.randrange(0, max(1, rows - 20)) for _ in range(iterations)]
+    ids = [rng.randint(1, rows) for _ in range(iterations)]
+    if legacy:
+        list_fn = lambda i: _legacy_list(path, offsets[i])
+        feed_fn = lambda i: _legacy_list(path, 0, feed_urls[i % len(feed_urls)])
+        get_fn = lambda i: _legacy_get(path, ids[i])
+    else:
+        list_fn = lambda i: storage.list_articles(limit=20, offset=offsets[i])
+        feed_fn = lambda i: storage.list_articles(limit=20, feed_url=feed_urls[i % len(feed_urls)])
+        get_fn = lambda i: storage.get_article(ids[i])
+    return {
+        "db_bytes": _size(path),
+        "list": _timed(list_fn, iterations),
+        "list_by_feed": _timed(feed_fn, iterations),
+        "get": _timed(get_fn, iterations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--feeds", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite")
+        feed_urls = build_legacy(path, args.rows, args.feeds)
+        before = _measure(path, args.rows, feed_urls, legacy=True, iterations=args.iterations)
+
+        storage.DB_PATH = path
+        start = time.perf_counter()
+        storage.init_db()
+        migrate_s = time.perf_counter() - start
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        after = _measure(path, args.rows, feed_urls, legacy=False, iterations=args.iterations)
+
+    print(
+        json.dumps(
+            {
+                "rows": args.rows,
+                "feeds": args.feeds,
+                "compression": storage.COMPRESSION,
+                "migrate_seconds": round(migrate_s, 3),
+                "before": before,
+                "after": after,
+                "size_ratio": round(after["db_bytes"] / before["db_bytes"], 3),
+            },
+            indent=2,
+            ensure_ascii=False,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
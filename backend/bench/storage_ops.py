@@ -0,0 +1,245 @@
+"""Storage function throughput and latency as the articles table grows, with a baseline gate.
+
+Run from ``backend``::
+
+    python -m bench.storage_ops                                   # 10k and 100k rows, compare to baseline
+    python -m bench.storage_ops --rows 10000,100000,1000000 --db-dir /tmp/rss-bench
+    python -m bench.storage_ops --update-baseline                 # record this machine's numbers
+
+For every size a database is seeded directly through SQL (reused from
+``--db-dir`` when given), then each storage function runs for ``--seconds``
+or ``--max-ops`` calls, keeping the best of ``--repeat`` runs. Prints one
+JSON object with ops/s and p50/p99 per function and exits 1 when any
+function's ops/s drops below the baseline by more than ``--tolerance``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from app import storage
+from app.models import ArticleCreate, ReportCreate
+from bench.storage_compaction import _summary
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "storage_ops.json")
+FEEDS = 50
+SPAN_SECONDS = 30 * 86400  # 种子数据的入库时间均匀分布在最近 30 天
+
+
+def _feed_url(i: int) -> str:
+    return f"https://news.example-{i % FEEDS}.com/rss.xml"
+
+
+def seed(path: str, rows: int, seed: int = 11):
+    """Create a current-schema database at ``path`` holding ``rows`` articles."""
+    storage.DB_PATH = path
+    storage.init_db()
+    rng = random.Random(seed)
+    # 摘要生成较慢，预先生成一批压缩后的摘要循环使用
+    summaries = [storage._pack_text(_summary(rng)) for _ in range(256)]
+    now = int(time.time())
+    with storage._connect() as conn:
+        conn.executemany("INSERT INTO feeds (id, url) VALUES (?, ?)", ((i + 1, _feed_url(i)) for i in range(FEEDS)))
+        batch = 50000
+        for lo in range(0, rows, batch):
+            conn.executemany(
+                """
+                INSERT INTO articles (feed_id, item_uid, title, link, pub_date, author, summary_text, matched_keywords, created_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (
+                        i % FEEDS + 1,
+                        f"uid-{i}",
+                        f"文章标题 {i}",
+                        f"https://news.example-{i % FEEDS}.com/articles/{i}",
+                        "Mon, 01 Jan 2024 00:00:00 GMT",
+                        "作者",
+                        summaries[i % len(summaries)],
+                        '["人工智能"]',
+                        now - SPAN_SECONDS + i * SPAN_SECONDS // rows,
+                    )
+                    for i in range(lo, min(rows, lo + batch))
+                ),
+            )
+            conn.commit()
+        conn.execute("ANALYZE")
+
+
+def _operations(rows: int, rng: random.Random) -> Dict[str, Callable[[], object]]:
+    counter = iter(range(10**9))
+    now = datetime.now(timezone.utc)
+
+    def insert_article():
+        n = next(counter)
+        storage.insert_article(
+            ArticleCreate(
+                feed_url=_feed_url(n),
+                item_uid=f"bench-{n}",
+                title=f"新文章 {n}",
+                link=f"https://news.example.com/new/{n}",
+                pub_date="Mon, 01 Jan 2024 00:00:00 GMT",
+                author="作者",
+                summary_text=_summary(rng),
+                matched_keywords=["人工智能"],
+            )
+        )
+
+    def exists_article_hit():
+        i = rng.randrange(rows // 2, rows)
+        return storage.exists_article(_feed_url(i), f"uid-{i}")
+
+    def exists_article_miss():
+        return storage.exists_article(_feed_url(rng.randrange(FEEDS)), f"missing-{rng.random()}")
+
+    def list_articles_in_range():
+        start = now - timedelta(seconds=rng.randrange(3600, SPAN_SECONDS // 2))
+        return storage.list_articles_in_range(start, start + timedelta(hours=1))
+
+    def prune_articles():
+        # 每次比当前总数少保留一条，即删除最旧的一条
+        with storage._connect() as conn:
+            total = conn.execute("SELECT MAX(id) - MIN(id) + 1 FROM articles").fetchone()[0]
+        storage.prune_articles(max(1, total - 1))
+
+    def insert_report():
+        n = next(counter)
+        start = now - timedelta(hours=n + 1)
+        storage.insert_report(
+            ReportCreate(
+                report_type="hourly",
+                title=f"小时报 {n}",
+                summary_text=_summary(rng),
+                timeframe_start=start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                timeframe_end=(start + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                article_count=10,
+            )
+        )
+
+    return {
+        "insert_article": insert_article,
+        "exists_article_hit": exists_article_hit,
+        "exists_article_miss": exists_article_miss,
+        "list_articles_first_page": lambda: storage.list_articles(limit=20),
+        "list_articles_feed_page": lambda: storage.list_articles(limit=20, offset=40, feed_url=_feed_url(rng.randrange(FEEDS))),
+        "list_articles_deep_page": lambda: storage.list_articles(limit=20, offset=rows // 2),
+        "get_article": lambda: storage.get_article(rng.randrange(1, rows)),
+        "list_articles_in_range": list_articles_in_range,
+        "prune_articles": prune_articles,
+        "insert_report": insert_report,
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def measure(fn: Callable[[], object], seconds: float, max_ops: int) -> dict:
+    fn()  # warm-up
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < max_ops and time.perf_counter() - start < seconds:
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    total = sum(latencies)
+    return {
+        "ops": len(latencies),
+        "ops_per_s": round(len(latencies) / total, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def gate(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Functions whose ops/s fell below ``baseline`` by more than ``tolerance`` (0.5 = 50%)."""
+    failures = []
+    for rows, ops in results.items():
+        for name, now in ops.items():
+            before = baseline.get(rows, {}).get(name)
+            if not before:
+                continue
+            # 只按吞吐判定：亚毫秒级操作的分位数在共享机器上抖动过大
+            if now["ops_per_s"] < before["ops_per_s"] * (1 - tolerance):
+                failures.append(f"{rows} rows {name}: {now['ops_per_s']} ops/s < baseline {before['ops_per_s']}")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="10000,100000", help="comma-separated table sizes")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time budget per function")
+    parser.add_argument("--max-ops", type=int, default=2000, help="call budget per function")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per function; the best one is kept")
+    parser.add_argument("--only", help="comma-separated function names to run")
+    parser.add_argument("--db-dir", help="keep seeded databases here and reuse them across runs")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed ops/s drop vs. baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.rows.split(",") if x.strip()]
+    only = {x.strip() for x in args.only.split(",")} if args.only else None
+    tmp = tempfile.mkdtemp(prefix="storage-ops-")
+    results: Dict[str, dict] = {}
+    try:
+        for rows in sizes:
+            work = os.path.join(tmp, f"{rows}.sqlite")
+            if args.db_dir:
+                os.makedirs(args.db_dir, exist_ok=True)
+                cached = os.path.join(args.db_dir, f"storage-ops-{rows}-v{len(storage._MIGRATIONS)}.sqlite")
+                if not os.path.exists(cached):
+                    seed(cached, rows)
+                # 测量会写入数据，在副本上进行以保证每次起点一致
+                shutil.copyfile(cached, work)
+            else:
+                seed(work, rows)
+            storage.DB_PATH = work
+            rng = random.Random(rows)
+            results[str(rows)] = {}
+            for name, fn in _operations(rows, rng).items():
+                if only and name not in only:
+                    continue
+                # 取多次中最好的一次，降低共享机器上的抖动
+                runs = [measure(fn, args.seconds, args.max_ops) for _ in range(max(1, args.repeat))]
+                results[str(rows)][name] = max(runs, key=lambda r: r["ops_per_s"])
+                print(f"{rows:>8} {name:<26} {results[str(rows)][name]}", file=sys.stderr)
+            os.remove(work)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    out: dict = {"results": results}
+    status = 0
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as fh:
+                baseline = json.load(fh)
+        for rows, ops in results.items():
+            baseline.setdefault(rows, {}).update(ops)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        out["baseline_updated"] = args.baseline
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            failures = gate(results, json.load(fh), args.tolerance)
+        out["tolerance"] = args.tolerance
+        out["regressions"] = failures
+        status = 1 if failures else 0
+    print(json.dumps(out, indent=2))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Archived items must still count as seen when their feed lists them again.
+
+Run from ``backend``::
+
+    python -m pytest tests
+"""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import archive, ingest, storage
+from app.models import AppSettings
+
+
+@pytest.fixture
+def feed():
+    items = {"uids": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = "".join(
+                f"<item><title>t-{uid}</title><link>http://example.com/{uid}</link><guid>{uid}</guid></item>"
+                for uid in items["uids"]
+            )
+            data = f'<rss version="2.0"><channel><title>f</title>{body}</channel></rss>'.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    items["url"] = f"http://127.0.0.1:{server.server_address[1]}/feed.xml"
+    yield items
+    server.shutdown()
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch, feed):
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("RSS_AI_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setenv("RSS_AI_CONTENT_CACHE", str(tmp_path / "content_cache.sqlite"))
+    storage.init_db()
+    s = AppSettings()
+    s.fetch.feeds = [feed["url"]]
+    s.fetch.use_article_page = False
+    s.ai.enabled = False
+    s.telegram.enabled = False
+    s.archive.enabled = True
+    monkeypatch.setattr(ingest, "load_settings", lambda: s)
+    return s
+
+
+def _ingest() -> int:
+    async def run():
+        engine = ingest.IngestEngine()
+        await engine.start()
+        try:
+            return (await engine.run_cycle()).new_items
+        finally:
+            await engine.aclose()
+
+    return asyncio.run(run())
+
+
+def _age_all_articles(days: int):
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("UPDATE articles SET created_ts = ?", (int(time.time()) - days * 86400,))
+    conn.commit()
+    conn.close()
+
+
+def _uids(articles) -> list:
+    return sorted(a.item_uid for a in articles)
+
+
+def _window():
+    now = datetime.utcnow()
+    return now - timedelta(days=365), now + timedelta(days=1)
+
+
+def test_archived_items_are_not_ingested_again(settings, feed):
+    feed["uids"] = ["a", "b", "c"]
+    assert _ingest() == 3
+
+    _age_all_articles(settings.archive.after_days + 1)
+    assert archive.archive_articles(settings) == 3
+    assert storage.list_articles()[0] == 0
+
+    # 源新增一条，水位摘要随之变化，已归档的旧条目仍在列表中
+    feed["uids"] = ["d", "a", "b", "c"]
+    assert _ingest() == 1
+
+    start, end = _window()
+    assert _uids(storage.list_articles_in_range(start, end)) == ["d"]
+    # 报告窗口合并数据库与归档，不应出现重复条目
+    assert _uids(archive.articles_in_range(start, end)) == ["a", "b", "c", "d"]
+
+
+def test_archives_written_before_tombstones_are_backfilled(settings, feed):
+    feed["uids"] = ["a", "b"]
+    assert _ingest() == 2
+    _age_all_articles(settings.archive.after_days + 1)
+    assert archive.archive_articles(settings) == 2
+
+    # 模拟旧版本写出的归档：没有墓碑记录，清单也未标记
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("DELETE FROM archived_items")
+    conn.commit()
+    conn.close()
+    manifest = archive._load_manifest()
+    for entry in manifest.values():
+        del entry["tombstoned"]
+    archive._save_manifest(manifest)
+
+    assert archive.archive_articles(settings) == 0
+    feed["uids"] = ["c", "a", "b"]
+    assert _ingest() == 1
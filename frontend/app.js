@@ -17,6 +17,8 @@ let state = {
   filterFeed: '',
   autoRefresh: false,
   autoTimer: null,
+  eventSource: null,
+  manualFetching: false,
   reports: [],
   reportPage: 0,
   reportPageSize: 10,
@@ -95,15 +97,19 @@ async function api(path, opts = {}) {
   return res.json();
 }
 
-async function loadArticles() {
-  showSkeleton(true);
+const LIST_FIELDS = 'id,title,link,pub_date,author,summary_text,matched_keywords';
+const LIST_SUMMARY_CHARS = 300;
+
+async function loadArticles({ silent = false } = {}) {
+  if (!silent) showSkeleton(true);
   const offset = state.page * state.pageSize;
   const feedParam = state.filterFeed ? `&feed=${encodeURIComponent(state.filterFeed)}` : '';
-  const data = await api(`/api/articles?limit=${state.pageSize}&offset=${offset}${feedParam}`);
+  // 列表只需预览：按字段投影并截断摘要，完整内容在详情弹窗中按需获取
+  const data = await api(`/api/articles?limit=${state.pageSize}&offset=${offset}${feedParam}&fields=${LIST_FIELDS}&summary_chars=${LIST_SUMMARY_CHARS}`);
   state.items = data.items || [];
   state.total = data.total || 0;
   renderArticles();
-  showSkeleton(false);
+  if (!silent) showSkeleton(false);
 }
 
 function renderArticles() {
@@ -152,17 +158,39 @@ function formatDateTime(value) {
   return dt.toLocaleString();
 }
 
+function formatJobProgress(job) {
+  const p = job.progress || {};
+  if (job.status === 'pending') return '排队中…';
+  if (!p.feeds_total) return '抓取中…';
+  return `抓取中… 源 ${p.feeds_done}/${p.feeds_total} · 条目 ${p.processed_items} · 新增 ${p.new_items}`;
+}
+
+async function waitFetchJob(jobId) {
+  const sleep = (ms) => new Promise(r => setTimeout(r, ms));
+  for (;;) {
+    const job = await api(`/api/fetch/jobs/${encodeURIComponent(jobId)}`);
+    if (['succeeded', 'failed', 'cancelled'].includes(job.status)) return job;
+    q('#statusText').textContent = formatJobProgress(job);
+    await sleep(1500);
+  }
+}
+
 async function manualFetch() {
   q('#statusText').textContent = '抓取中…';
+  state.manualFetching = true;
   try {
     const force = q('#forceFetch').checked;
-    await api('/api/fetch', { method: 'POST', body: JSON.stringify({ force }) });
+    const job = await api('/api/fetch', { method: 'POST', body: JSON.stringify({ force }) });
+    const done = await waitFetchJob(job.job_id);
     await loadArticles();
-    toast('抓取完成');
+    if (done.status === 'succeeded') toast('抓取完成');
+    else if (done.status === 'cancelled') toast('抓取已取消');
+    else toast('抓取失败');
   } catch (e) {
     console.error(e);
     toast('抓取失败');
   } finally {
+    state.manualFetching = false;
     q('#statusText').textContent = '';
   }
 }
@@ -223,6 +251,7 @@ function gatherSettingsFromForm() {
   return {
     server: current.server,
     fetch: {
+      ...current.fetch,
       interval_minutes: parseInt(q('#interval').value, 10),
       max_items: parseInt(q('#maxItems').value, 10),
       per_feed_limit: parseInt(q('#perFeedLimit').value, 10),
@@ -241,18 +270,25 @@ function gatherSettingsFromForm() {
       user_prompt_template: q('#aiUserPrompt').value,
     },
     telegram: {
+      ...current.telegram,
       enabled: q('#tgEnabled').checked,
       bot_token: q('#tgToken').value.trim() || '***',
       chat_id: q('#tgChatId').value.trim(),
       push_summary: q('#tgPushSummary').checked,
+      api_base: current.telegram.api_base,
     },
+    destinations: current.destinations,
     reports: {
+      ...current.reports,
       hourly_enabled: q('#reportHourly').checked,
       daily_enabled: q('#reportDaily').checked,
       report_timeout_seconds: reportTimeout,
       system_prompt: q('#reportSystemPrompt').value,
       user_prompt_template: q('#reportUserPrompt').value,
     },
+    queue: current.queue,
+    archive: current.archive,
+    content_cache: current.content_cache,
     logging: current.logging,
   };
 }
@@ -291,13 +327,35 @@ async function saveSettings(e) {
   }
 }
 
+function onFetchEvent(e) {
+  if (state.manualFetching) return;
+  let job;
+  try { job = JSON.parse(e.data); } catch { return; }
+  const status = q('#statusText');
+  status.textContent = ['pending', 'running'].includes(job.status) ? formatJobProgress(job) : '';
+}
+
 function setAutoRefresh(enabled) {
   state.autoRefresh = enabled;
   localStorage.setItem('autoRefresh', enabled ? '1' : '0');
   if (state.autoTimer) { clearInterval(state.autoTimer); state.autoTimer = null; }
-  if (enabled) {
-    state.autoTimer = setInterval(() => { loadArticles().catch(()=>{}); }, 60000);
+  if (state.eventSource) { state.eventSource.close(); state.eventSource = null; }
+  if (!enabled) return;
+  if (!window.EventSource) {
+    // 不支持 SSE 的环境退回定时轮询
+    state.autoTimer = setInterval(() => { loadArticles({ silent: true }).catch(()=>{}); }, 60000);
+    return;
   }
+  // 后端在文章/报告入库与抓取进度变化时推送事件，空闲时仅有心跳
+  const es = new EventSource(API_BASE + '/api/stream');
+  const refreshArticles = debounce(() => { loadArticles({ silent: true }).catch(()=>{}); }, 500);
+  const refreshReports = debounce(() => { loadReports().catch(()=>{}); }, 500);
+  es.addEventListener('article', refreshArticles);
+  es.addEventListener('report', refreshReports);
+  // 其他 worker 进程写入的数据只会以通用 changed 事件通知
+  es.addEventListener('changed', () => { refreshArticles(); refreshReports(); });
+  es.addEventListener('fetch', onFetchEvent);
+  state.eventSource = es;
 }
 
 function debounce(fn, delay=300) {
@@ -367,7 +425,7 @@ function renderReports() {
     const el = document.createElement('div');
     el.className = 'card enter';
     el.style.animationDelay = `${Math.min(idx * 30, 300)}ms`;
-    const typeLabel = report.report_type === 'daily' ? '日报' : '小时报';
+    const typeLabel = { daily: '日报', hourly: '小时报' }[report.report_type] || report.report_type;
     const start = formatDateTime(report.timeframe_start);
     const end = formatDateTime(report.timeframe_end);
     el.innerHTML = `
@@ -385,8 +443,11 @@ function renderReports() {
 
 async function openModal(id) {
   try {
-    const item = state.items.find(i=>i.id===id) || null;
+    let item = state.items.find(i=>i.id===id) || null;
     if (!item) return;
+    if (item.summary_truncated) {
+      item = await api(`/api/articles/${id}`);
+    }
     const m = q('#modal');
     q('#modalTitle').textContent = item.title;
     const keywordList = Array.isArray(item.matched_keywords) ? item.matched_keywords : [];
@@ -480,7 +541,9 @@ function bindEvents() {
 async function init() {
   initTheme();
   bindEvents();
-  setAutoRefresh(localStorage.getItem('autoRefresh')==='1');
+  const live = localStorage.getItem('autoRefresh') !== '0';
+  q('#autoRefresh').checked = live;
+  setAutoRefresh(live);
   await loadSettings();
   await loadArticles();
   await loadReports();
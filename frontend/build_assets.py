@@ -0,0 +1,77 @@
+"""Build fingerprinted, precompressed static assets into ``dist/``.
+
+Usage: ``python build_assets.py``. ``server.py`` serves ``dist/`` when it
+exists and falls back to the source files otherwise.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # brotli 为可选依赖，缺失时仅生成 gzip
+    brotli = None
+
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(ROOT_DIR, "dist")
+HASHED_ASSETS = ["app.js", "styles.css"]
+ENTRY = "index.html"
+
+
+def _hashed_name(name: str, data: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return f"{stem}.{digest}{ext}"
+
+
+def _write_variants(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+    with open(path + ".gz", "wb") as f:
+        # mtime=0 让同样的输入产生同样的输出
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build() -> dict:
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    for name in HASHED_ASSETS:
+        with open(os.path.join(ROOT_DIR, name), "rb") as f:
+            data = f.read()
+        hashed = _hashed_name(name, data)
+        _write_variants(os.path.join(DIST_DIR, hashed), data)
+        manifest[name] = hashed
+
+    with open(os.path.join(ROOT_DIR, ENTRY), "r", encoding="utf-8") as f:
+        html = f.read()
+    for name, hashed in manifest.items():
+        pattern = r'((?:href|src)=["\'])(?:\./)?' + re.escape(name) + r'(["\'])'
+        html, count = re.subn(pattern, r"\g<1>./" + hashed + r"\g<2>", html)
+        if not count:
+            raise SystemExit(f"{ENTRY} 中未找到对 {name} 的引用")
+    _write_variants(os.path.join(DIST_DIR, ENTRY), html.encode("utf-8"))
+
+    with open(os.path.join(DIST_DIR, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    result = build()
+    for src, dst in result.items():
+        print(f"{src} -> dist/{dst}")
+    if brotli is None:
+        print("未安装 brotli，已跳过 .br 预压缩")
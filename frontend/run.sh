@@ -8,6 +8,9 @@ cd "$ROOT_DIR"
 : "${PORT:=3602}"
 : "${BACKEND_BASE_URL:=http://127.0.0.1:3601}"
 
+# 构建指纹化 + 预压缩静态资源（dist/），失败时回退为直接提供源文件
+python build_assets.py || echo "[frontend] asset build failed, serving source files"
+
 echo "[frontend] serving at :$PORT -> proxy /api to ${BACKEND_BASE_URL}"
 python server.py
 
@@ -1,47 +1,208 @@
 from __future__ import annotations
 
 import os
-from typing import Dict
+import re
+import time
+from collections import OrderedDict
+from mimetypes import guess_type
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
 
 
 BACKEND_BASE = os.environ.get("BACKEND_BASE_URL", "http://127.0.0.1:3601").rstrip("/")
+# 幂等 GET 的微缓存时长（秒），0 表示关闭
+MICROCACHE_TTL = float(os.environ.get("PROXY_MICROCACHE_TTL", "2"))
+MICROCACHE_PATHS = {"health", "settings"}
+# 微缓存最多保留的条目数，超出时淘汰最久未使用的（查询串由客户端控制，必须有上限）
+MICROCACHE_MAX_ENTRIES = int(os.environ.get("PROXY_MICROCACHE_MAX_ENTRIES", "64"))
+
+HOP_BY_HOP = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
 
 app = FastAPI(title="RSS-AI Frontend Server")
 
+_client: Optional[httpx.AsyncClient] = None
+# key -> (expires_at, status_code, headers, body)
+_micro_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, int, List[Tuple[str, str]], bytes]]" = OrderedDict()
+
+
+@app.on_event("startup")
+async def on_startup():
+    global _client
+    _client = httpx.AsyncClient(
+        timeout=httpx.Timeout(30.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _forward_headers(request: Request) -> Dict[str, str]:
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP}
+    headers.pop("host", None)
+    return headers
+
+
+def _response_headers(resp: httpx.Response) -> List[Tuple[str, str]]:
+    # content-encoding / content-length 原样透传：响应体按原始字节转发，不做解压
+    return [(k, v) for k, v in resp.headers.multi_items() if k.lower() not in HOP_BY_HOP]
+
+
+def _build_response(status_code: int, headers: List[Tuple[str, str]], body: bytes) -> Response:
+    response = Response(content=body, status_code=status_code)
+    response.raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+    return response
+
+
+def _micro_cache_put(key: Tuple[str, str, str], entry: Tuple[float, int, List[Tuple[str, str]], bytes]):
+    now = time.monotonic()
+    for stale in [k for k, v in _micro_cache.items() if v[0] <= now]:
+        del _micro_cache[stale]
+    _micro_cache[key] = entry
+    _micro_cache.move_to_end(key)
+    while len(_micro_cache) > max(1, MICROCACHE_MAX_ENTRIES):
+        _micro_cache.popitem(last=False)
+
+
+async def _relay(resp: httpx.Response):
+    # 客户端断开（例如关闭页面上的 SSE 连接）时生成器被取消，这里确保上游连接归还连接池
+    try:
+        async for chunk in resp.aiter_raw():
+            yield chunk
+    finally:
+        await resp.aclose()
+
 
 @app.api_route("/api/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
 async def proxy_api(path: str, request: Request):
-    target = f"{BACKEND_BASE}/api/{path}"
-    body = await request.body()
-    headers: Dict[str, str] = dict(request.headers)
-    headers.pop("host", None)
-    # Avoid hop-by-hop headers
-    for k in ["content-length", "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailers", "transfer-encoding", "upgrade"]:
-        headers.pop(k, None)
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.request(
-            request.method,
-            target,
-            params=request.query_params,
-            headers=headers,
-            content=body,
-        )
-    # Filter response headers
-    resp_headers = {
-        k: v
-        for k, v in resp.headers.items()
-        if k.lower() not in {"content-encoding", "transfer-encoding", "connection"}
-    }
-    return Response(content=resp.content, status_code=resp.status_code, headers=resp_headers)
-
-
-# 静态资源（最后挂载，避免覆盖 /api 前缀）
-static_dir = os.path.dirname(__file__)
-app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
+    assert _client is not None
+    method = request.method
+    cache_key = None
+    if method == "GET" and MICROCACHE_TTL > 0 and path in MICROCACHE_PATHS:
+        cache_key = (path, str(request.query_params), request.headers.get("accept-encoding", ""))
+        cached = _micro_cache.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            _micro_cache.move_to_end(cache_key)
+            return _build_response(cached[1], cached[2], cached[3])
+    elif method != "GET":
+        # 写操作（例如保存设置）后立即丢弃微缓存，避免读到旧配置
+        _micro_cache.clear()
+
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    upstream = _client.build_request(
+        method,
+        f"{BACKEND_BASE}/api/{path}",
+        params=request.query_params,
+        headers=_forward_headers(request),
+        content=request.stream() if has_body else None,
+        # SSE 长连接没有读超时，后端每 15 秒发送心跳
+        timeout=httpx.Timeout(30.0, read=None) if path == "stream" else httpx.USE_CLIENT_DEFAULT,
+    )
+    resp = await _client.send(upstream, stream=True)
+    headers = _response_headers(resp)
+
+    if cache_key is not None and resp.status_code == 200:
+        try:
+            body = await resp.aread()
+        finally:
+            await resp.aclose()
+        _micro_cache_put(cache_key, (time.monotonic() + MICROCACHE_TTL, resp.status_code, headers, body))
+        return _build_response(resp.status_code, headers, body)
+
+    response = StreamingResponse(_relay(resp), status_code=resp.status_code)
+    response.raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+    return response
+
+
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{12}\.(?:js|css)$")
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves build_assets.py's .br/.gz siblings when accepted."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        media_type = guess_type(full_path)[0] or "text/plain"
+        if FINGERPRINTED.search(full_path):
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = "no-cache"
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        response = None
+        for encoding, suffix in PRECOMPRESSED:
+            variant = full_path + suffix
+            if encoding in accepted and os.path.isfile(variant):
+                response = FileResponse(
+                    variant,
+                    status_code=status_code,
+                    headers=headers,
+                    media_type=media_type,
+                    stat_result=os.stat(variant),
+                )
+                response.headers["Content-Encoding"] = encoding
+                break
+        if response is None:
+            response = FileResponse(
+                full_path,
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+                stat_result=stat_result,
+            )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+# 静态资源（最后挂载，避免覆盖 /api 前缀）；存在 build_assets.py 的构建产物时优先使用
+static_dir = os.path.dirname(os.path.abspath(__file__))
+dist_dir = os.path.join(static_dir, "dist")
+if os.path.isfile(os.path.join(dist_dir, "index.html")):
+    static_dir = dist_dir
+app.mount("/", PrecompressedStaticFiles(directory=static_dir, html=True), name="static")
 
 
 if __name__ == "__main__":
@@ -49,4 +210,3 @@ if __name__ == "__main__":
 
     port = int(os.environ.get("PORT", "3602"))
     uvicorn.run("server:app", host="0.0.0.0", port=port, reload=False)
-